@@ -0,0 +1,189 @@
+"""
+Article Index - Tabla artículo -> chunks, construida en la ingesta
+"""
+
+import json
+import os
+import re
+import unicodedata
+from pathlib import Path
+
+from .keyword_index import append_jsonl, read_jsonl
+
+
+def normalize_article(label: str) -> str:
+    """
+    Normaliza la etiqueta de un artículo para usarla como clave.
+
+    "Artículo 43°" / "art. 43" / "43" -> "43"; "Art. 102-a" -> "102-A";
+    "Norma iv" -> "NORMA IV"; "Primera Disposición Final" ->
+    "PRIMERA DISPOSICION FINAL".
+    """
+    text = unicodedata.normalize("NFD", label)
+    text = "".join(c for c in text if unicodedata.category(c) != "Mn")
+    text = text.upper().replace("°", "").replace("º", "")
+    text = re.sub(r"^\s*ART(?:ICULO|\.)?\s*", "", text)
+    text = re.sub(r"\s*-\s*", "-", text)
+    return " ".join(text.split()).strip(" .-")
+
+
+class ArticleIndex:
+    """
+    Índice source -> artículo -> chunk IDs (en orden de aparición).
+
+    Se alimenta con la metadata `article` que produce LegalChunker y se
+    persiste junto al vector store como snapshot JSON más un log JSONL de
+    cambios (igual que KeywordIndex).
+    """
+
+    INDEX_VERSION = 1
+
+    def __init__(self, persist_path: str | Path):
+        self.persist_path = Path(persist_path)
+        self.log_path = self.persist_path.with_suffix(".log.jsonl")
+        self._sources: dict[str, dict[str, list[str]]] = {}
+        self._chunk_keys: dict[str, tuple[str, str]] = {}
+        self._pending: list[dict] = []
+        self._log_records = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._chunk_keys)
+
+    def add(self, chunk_id: str, metadata: dict) -> None:
+        """Registra un chunk si su metadata tiene artículo."""
+        article = metadata.get("article")
+        if not article:
+            return
+        source = metadata.get("source", "unknown")
+        key = normalize_article(str(article))
+        self._add(chunk_id, source, key)
+        self._pending.append({"id": chunk_id, "source": source, "article": key})
+
+    def _add(self, chunk_id: str, source: str, key: str) -> None:
+        """Registra un chunk ya normalizado (sin anotarlo en el log)."""
+        if chunk_id in self._chunk_keys:
+            self._remove([chunk_id])
+        self._sources.setdefault(source, {}).setdefault(key, []).append(chunk_id)
+        self._chunk_keys[chunk_id] = (source, key)
+
+    def remove(self, chunk_ids: list[str]) -> None:
+        """Elimina chunks del índice."""
+        for chunk_id in self._remove(chunk_ids):
+            self._pending.append({"id": chunk_id, "deleted": True})
+
+    def _remove(self, chunk_ids: list[str]) -> list[str]:
+        """Quita chunks del índice; retorna los que estaban registrados."""
+        removed = []
+        for chunk_id in chunk_ids:
+            entry = self._chunk_keys.pop(chunk_id, None)
+            if entry is None:
+                continue
+            removed.append(chunk_id)
+            source, key = entry
+            articles = self._sources[source]
+            articles[key].remove(chunk_id)
+            if not articles[key]:
+                del articles[key]
+            if not articles:
+                del self._sources[source]
+        return removed
+
+    def lookup(self, article: str, source: str | None = None) -> list[str]:
+        """
+        Chunk IDs de un artículo (ej. "43", "Artículo 102-A").
+
+        Args:
+            article: Etiqueta del artículo, en cualquier formato
+            source: Solo buscar en este documento (None = todos)
+        """
+        key = normalize_article(article)
+        sources = [source] if source else list(self._sources)
+        return [
+            chunk_id
+            for name in sources
+            for chunk_id in self._sources.get(name, {}).get(key, [])
+        ]
+
+    def sources(self) -> list[str]:
+        """Documentos con artículos indexados."""
+        return list(self._sources)
+
+    def articles(self, source: str) -> list[str]:
+        """Artículos indexados de un documento."""
+        return list(self._sources.get(source, {}))
+
+    def clear(self) -> None:
+        """Vacía el índice y elimina los archivos persistidos."""
+        self._sources = {}
+        self._chunk_keys = {}
+        self._pending = []
+        self._log_records = 0
+        for path in (self.persist_path, self.log_path):
+            if path.exists():
+                path.unlink()
+
+    def load(self) -> None:
+        """Carga el snapshot y aplica el log de cambios, si son compatibles."""
+        if self.persist_path.exists():
+            try:
+                with open(self.persist_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != self.INDEX_VERSION:
+                    return
+                self._sources = data["sources"]
+                self._chunk_keys = {
+                    chunk_id: (source, key)
+                    for source, articles in self._sources.items()
+                    for key, chunk_ids in articles.items()
+                    for chunk_id in chunk_ids
+                }
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                print(f"⚠️ Error cargando índice de artículos: {e}")
+                self._sources = {}
+                self._chunk_keys = {}
+                return
+
+        for record in read_jsonl(self.log_path):
+            try:
+                if record.get("deleted"):
+                    self._remove([record["id"]])
+                else:
+                    self._add(record["id"], record["source"], record["article"])
+            except (KeyError, TypeError) as e:
+                print(f"⚠️ Registro inválido en el log de artículos: {e}")
+                continue
+            self._log_records += 1
+
+    def save(self) -> None:
+        """
+        Persiste los cambios pendientes en el log, o reescribe el snapshot
+        si aún no existe o el log ya supera al índice.
+        """
+        if not self._pending and self.persist_path.exists():
+            return
+        if not self.persist_path.exists() or self._log_records + len(
+            self._pending
+        ) > len(self._chunk_keys):
+            self.compact()
+            return
+        append_jsonl(self.log_path, self._pending)
+        self._log_records += len(self._pending)
+        self._pending = []
+
+    def compact(self) -> None:
+        """Reescribe el snapshot de forma atómica y vacía el log."""
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {"version": self.INDEX_VERSION, "sources": self._sources},
+                f,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            )
+        os.replace(tmp_path, self.persist_path)
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self._pending = []
+        self._log_records = 0
@@ -6,13 +6,31 @@ Evita llamadas repetidas a la API para preguntas similares.
 import hashlib
 import json
 import re
+import sqlite3
 import threading
 import time
 import unicodedata
-from dataclasses import asdict, dataclass
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    question_hash TEXT PRIMARY KEY,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+CREATE TABLE IF NOT EXISTS citations (
+    question_hash TEXT NOT NULL,
+    source TEXT NOT NULL,
+    PRIMARY KEY (question_hash, source)
+);
+"""
+
 
 @dataclass
 class CacheEntry:
@@ -32,8 +50,11 @@ class ResponseCache:
     Features:
     - Hash de preguntas normalizadas para matching exacto
     - TTL (Time To Live) configurable
-    - Persistencia en JSON para sobrevivir reinicios
-    - Thread-safe para uso concurrente
+    - Persistencia en SQLite (modo WAL): cada escritura es O(1) y atómica,
+      y las lecturas no se bloquean mientras se escribe
+    - Sin carga al inicio: cada `get` es una consulta por clave
+    - Migra el antiguo response_cache.json la primera vez
+    - Thread-safe para uso concurrente (una conexión por thread)
     - Estadísticas de uso
     """
 
@@ -51,17 +72,34 @@ class ResponseCache:
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
-        self.cache_file = self.cache_dir / "response_cache.json"
+        self.db_path = self.cache_dir / "response_cache.sqlite"
+        self.legacy_file = self.cache_dir / "response_cache.json"
 
         self.ttl_seconds = ttl_hours * 3600
         self.max_entries = max_entries
 
-        self._cache: dict[str, CacheEntry] = {}
         self._lock = threading.Lock()
+        self._local = threading.local()
         self._stats = {"hits": 0, "misses": 0, "saves": 0}
-
-        # Cargar caché existente
-        self._load_cache()
+        # Número de entradas, contado recién en la primera escritura
+        self._entries: int | None = None
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        if self.legacy_file.exists():
+            self._migrate_json()
+
+    @contextmanager
+    def _connect(self):
+        """Transacción sobre la conexión del thread actual."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        with conn:
+            yield conn
 
     def _normalize_question(self, question: str) -> str:
         """Normaliza la pregunta para mejor matching"""
@@ -94,26 +132,31 @@ class ResponseCache:
         """
         question_hash = self._hash_question(question)
 
-        with self._lock:
-            if question_hash not in self._cache:
-                self._stats["misses"] += 1
-                return None
-
-            entry = self._cache[question_hash]
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT answer, timestamp, hits FROM entries WHERE question_hash = ?",
+                (question_hash,),
+            ).fetchone()
+            expired = row is not None and time.time() - row[1] > self.ttl_seconds
+            if expired:
+                self._delete(conn, [question_hash])
+            elif row is not None:
+                conn.execute(
+                    "UPDATE entries SET hits = hits + 1 WHERE question_hash = ?",
+                    (question_hash,),
+                )
 
-            # Verificar TTL
-            if time.time() - entry.timestamp > self.ttl_seconds:
-                del self._cache[question_hash]
+        with self._lock:
+            if row is None or expired:
                 self._stats["misses"] += 1
+                if expired and self._entries is not None:
+                    self._entries -= 1
                 return None
-
             # Cache hit!
-            entry.hits += 1
             self._stats["hits"] += 1
 
-            print(f"📦 Cache HIT para: '{question[:50]}...' (hits: {entry.hits})")
-
-            return entry.answer
+        print(f"📦 Cache HIT para: '{question[:50]}...' (hits: {row[2] + 1})")
+        return json.loads(row[0])
 
     def set(self, question: str, answer: dict) -> None:
         """
@@ -124,82 +167,145 @@ class ResponseCache:
             answer: Respuesta generada
         """
         question_hash = self._hash_question(question)
-
-        with self._lock:
-            # Limpiar entradas antiguas si excedemos el límite
-            if len(self._cache) >= self.max_entries:
-                self._evict_oldest()
-
-            self._cache[question_hash] = CacheEntry(
-                question_hash=question_hash,
-                question=question,
-                answer=answer,
-                timestamp=time.time(),
-                hits=0,
+        entry = CacheEntry(
+            question_hash=question_hash,
+            question=question,
+            answer=answer,
+            timestamp=time.time(),
+        )
+
+        with self._connect() as conn:
+            is_new = self._insert(conn, entry)
+            with self._lock:
+                if self._entries is None:
+                    self._entries = self._count(conn)
+                else:
+                    self._entries += is_new
+                self._stats["saves"] += 1
+                full = self._entries > self.max_entries
+            if full:
+                self._evict_oldest(conn)
+
+        print(f"💾 Cache SAVE para: '{question[:50]}...'")
+
+    def _insert(self, conn: sqlite3.Connection, entry: CacheEntry) -> bool:
+        """Inserta o reemplaza una entrada. Retorna True si es nueva."""
+        is_new = (
+            conn.execute(
+                "SELECT 1 FROM entries WHERE question_hash = ?", (entry.question_hash,)
+            ).fetchone()
+            is None
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+            (
+                entry.question_hash,
+                entry.question,
+                json.dumps(entry.answer, ensure_ascii=False),
+                entry.timestamp,
+                entry.hits,
+            ),
+        )
+        conn.execute(
+            "DELETE FROM citations WHERE question_hash = ?", (entry.question_hash,)
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO citations VALUES (?, ?)",
+            [(entry.question_hash, source) for source in _cited_sources(entry.answer)],
+        )
+        return is_new
+
+    def _delete(self, conn: sqlite3.Connection, question_hashes: list[str]) -> None:
+        """Elimina entradas y sus citas."""
+        for table in ("entries", "citations"):
+            conn.executemany(
+                f"DELETE FROM {table} WHERE question_hash = ?",
+                [(h,) for h in question_hashes],
             )
 
-            self._stats["saves"] += 1
-            self._save_cache()
+    @staticmethod
+    def _count(conn: sqlite3.Connection) -> int:
+        return conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
 
-            print(f"💾 Cache SAVE para: '{question[:50]}...'")
-
-    def _evict_oldest(self) -> None:
+    def _evict_oldest(self, conn: sqlite3.Connection) -> None:
         """Elimina las entradas más antiguas (LRU simple)"""
-        if not self._cache:
-            return
-
-        # Ordenar por timestamp y eliminar el 20% más antiguo
-        sorted_entries = sorted(self._cache.items(), key=lambda x: x[1].timestamp)
-
-        entries_to_remove = max(1, len(sorted_entries) // 5)
-
-        for key, _ in sorted_entries[:entries_to_remove]:
-            del self._cache[key]
-
-        print(f"🗑️ Cache eviction: eliminadas {entries_to_remove} entradas antiguas")
+        # Eliminar el 20% más antiguo
+        entries_to_remove = max(1, self.max_entries // 5)
+        oldest = [
+            row[0]
+            for row in conn.execute(
+                "SELECT question_hash FROM entries ORDER BY timestamp LIMIT ?",
+                (entries_to_remove,),
+            )
+        ]
+        self._delete(conn, oldest)
+        with self._lock:
+            self._entries = self._count(conn)
 
-    def _load_cache(self) -> None:
-        """Carga el caché desde disco"""
-        if not self.cache_file.exists():
-            return
+        print(f"🗑️ Cache eviction: eliminadas {len(oldest)} entradas antiguas")
 
+    def _migrate_json(self) -> None:
+        """Importa el caché JSON de versiones anteriores y lo renombra."""
         try:
-            with open(self.cache_file, "r", encoding="utf-8") as f:
+            with open(self.legacy_file, "r", encoding="utf-8") as f:
                 data = json.load(f)
 
             current_time = time.time()
-            loaded = 0
-
-            for entry_data in data.get("entries", []):
-                # Verificar TTL al cargar
-                if current_time - entry_data["timestamp"] <= self.ttl_seconds:
-                    entry = CacheEntry(**entry_data)
-                    self._cache[entry.question_hash] = entry
-                    loaded += 1
-
-            print(f"📂 Cache cargado: {loaded} entradas válidas")
-
-        except (json.JSONDecodeError, KeyError) as e:
-            print(f"⚠️ Error cargando caché: {e}")
-            self._cache = {}
+            entries = [
+                CacheEntry(**entry_data)
+                for entry_data in data.get("entries", [])
+                # Verificar TTL al migrar
+                if current_time - entry_data["timestamp"] <= self.ttl_seconds
+            ]
+            with self._connect() as conn:
+                for entry in entries:
+                    self._insert(conn, entry)
+            self.legacy_file.replace(self.legacy_file.with_suffix(".json.migrated"))
+
+            print(f"📂 Cache migrado a SQLite: {len(entries)} entradas válidas")
+
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"⚠️ Error migrando caché JSON: {e}")
+
+    def invalidate_source(self, source: str) -> int:
+        """
+        Elimina las respuestas que citan un documento.
 
-    def _save_cache(self) -> None:
-        """Guarda el caché a disco"""
-        try:
-            data = {
-                "version": 1,
-                "saved_at": time.time(),
-                "entries": [asdict(entry) for entry in self._cache.values()],
-            }
+        Args:
+            source: Nombre del documento (metadata `source`)
 
-            with open(self.cache_file, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+        Returns:
+            Número de entradas eliminadas
+        """
+        source = source.lower()
+
+        def cites_source(cited: str) -> bool:
+            return source in cited or cited in source
+
+        with self._connect() as conn:
+            stale = list(
+                dict.fromkeys(
+                    question_hash
+                    for question_hash, cited in conn.execute(
+                        "SELECT question_hash, source FROM citations"
+                    )
+                    if cites_source(cited)
+                )
+            )
+            self._delete(conn, stale)
+            with self._lock:
+                if self._entries is not None:
+                    self._entries -= len(stale)
 
-        except IOError as e:
-            print(f"⚠️ Error guardando caché: {e}")
+        if stale:
+            print(f"🗑️ Cache: invalidadas {len(stale)} respuestas que citan {source}")
+        return len(stale)
 
     def get_stats(self) -> dict:
         """Retorna estadísticas del caché"""
+        with self._connect() as conn:
+            total_entries = self._count(conn)
+
         with self._lock:
             total_requests = self._stats["hits"] + self._stats["misses"]
             hit_rate = (
@@ -207,7 +313,7 @@ class ResponseCache:
             )
 
             return {
-                "total_entries": len(self._cache),
+                "total_entries": total_entries,
                 "hits": self._stats["hits"],
                 "misses": self._stats["misses"],
                 "saves": self._stats["saves"],
@@ -217,14 +323,27 @@ class ResponseCache:
 
     def clear(self) -> None:
         """Limpia todo el caché"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM citations")
         with self._lock:
-            self._cache = {}
             self._stats = {"hits": 0, "misses": 0, "saves": 0}
-
-            if self.cache_file.exists():
-                self.cache_file.unlink()
-
-            print("🧹 Cache limpiado completamente")
+            self._entries = 0
+
+        print("🧹 Cache limpiado completamente")
+
+
+def _cited_sources(answer: dict) -> set[str]:
+    """Documentos citados por una respuesta (nombres en minúsculas)."""
+    sources = set()
+    for citation in answer.get("citations") or []:
+        cited = (citation.get("source") or "").lower()
+        uri = (citation.get("source_uri") or "").lower()
+        if cited:
+            sources.add(cited)
+        if uri:
+            sources.add(Path(uri).name)
+    return sources
 
 
 # Singleton global
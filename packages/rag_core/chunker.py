@@ -2,19 +2,99 @@
 Text Chunker - División de documentos en chunks con metadata
 """
 
-import uuid
-from dataclasses import dataclass
+import hashlib
+import re
+from bisect import bisect_right
 
 from .loaders import Document
 
 
-@dataclass
 class Chunk:
-    """Representa un chunk de texto con su metadata"""
+    """
+    Representa un chunk de texto con su metadata.
+
+    Representación compacta (`__slots__`): guarda offsets sobre un buffer de
+    texto compartido (la página o el documento) y referencias a los dicts de
+    metadata del documento, compartidos entre todos sus chunks. `content` y
+    `metadata` se materializan recién al leerlos (al embeber o escribir en
+    el store).
+
+    También acepta `content` y `metadata` explícitos:
+        Chunk(chunk_id="a::c0", content="texto", metadata={"source": "a.pdf"})
+    """
+
+    __slots__ = ("chunk_id", "_buffer", "_start", "_end", "_layers")
+
+    def __init__(
+        self,
+        chunk_id: str,
+        content: str | None = None,
+        metadata: dict | None = None,
+        *,
+        buffer: str | None = None,
+        start: int = 0,
+        end: int | None = None,
+        shared_metadata: tuple[dict, ...] = (),
+    ):
+        """
+        Args:
+            chunk_id: ID determinista del chunk
+            content: Texto propio (alternativa a buffer/start/end)
+            metadata: Metadata propia del chunk, aplicada sobre la compartida
+            buffer: Texto compartido del que el chunk es el rango [start, end)
+            shared_metadata: Dicts compartidos, en orden de precedencia creciente
+        """
+        self.chunk_id = chunk_id
+        if content is not None:
+            buffer, start, end = content, 0, len(content)
+        self._buffer = buffer or ""
+        self._start = start
+        self._end = len(self._buffer) if end is None else end
+        self._layers = (*shared_metadata, metadata) if metadata else shared_metadata
+
+    @property
+    def content(self) -> str:
+        """Texto del chunk (se copia del buffer compartido en cada lectura)"""
+        return self._buffer[self._start : self._end]
+
+    @property
+    def metadata(self) -> dict:
+        """Metadata combinada (dict nuevo en cada lectura)"""
+        merged = {}
+        for layer in self._layers:
+            merged.update(layer)
+        return merged
+
+    def add_metadata(self, values: dict) -> None:
+        """Agrega metadata propia sobre la existente (sin copiar las capas)"""
+        self._layers = (*self._layers, values)
+
+    @property
+    def buffer(self) -> str:
+        """Texto compartido sobre el que apuntan los offsets"""
+        return self._buffer
 
-    chunk_id: str
-    content: str
-    metadata: dict
+    @property
+    def span(self) -> tuple[int, int]:
+        """Offsets (inicio, fin) del chunk dentro de `buffer`"""
+        return self._start, self._end
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Chunk):
+            return NotImplemented
+        return (
+            self.chunk_id == other.chunk_id
+            and self.content == other.content
+            and self.metadata == other.metadata
+        )
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Chunk(chunk_id={self.chunk_id!r}, content={self.content[:40]!r}..., "
+            f"metadata={self.metadata!r})"
+        )
 
 
 class TextChunker:
@@ -54,14 +134,19 @@ class TextChunker:
                 if last_space > start:
                     end = last_space
 
-            chunk_text = text[start:end].strip()
+            raw = text[start:end]
+            chunk_text = raw.strip()
 
             if chunk_text:
+                # Offsets del texto sin espacios de borde dentro de la página
+                content_start = start + len(raw) - len(raw.lstrip())
                 chunk = Chunk(
-                    chunk_id=self._generate_chunk_id(document, chunk_index),
-                    content=chunk_text,
+                    chunk_id=self._generate_chunk_id(document, chunk_index, chunk_text),
+                    buffer=text,
+                    start=content_start,
+                    end=content_start + len(chunk_text),
+                    shared_metadata=(document.metadata,),
                     metadata={
-                        **document.metadata,
                         "chunk_index": chunk_index,
                         "chunk_start": start,
                         "chunk_end": end,
@@ -87,20 +172,469 @@ class TextChunker:
             all_chunks.extend(chunks)
         return all_chunks
 
-    def _generate_chunk_id(self, document: Document, chunk_index: int) -> str:
-        """Genera un ID único para el chunk"""
+    def _generate_chunk_id(
+        self, document: Document, chunk_index: int, chunk_text: str
+    ) -> str:
+        """
+        Genera un ID determinista para el chunk.
+
+        Mismo source, página, posición y contenido -> mismo ID, de modo que
+        re-ingestar un archivo actualiza sus chunks en lugar de duplicarlos.
+        """
         source = document.metadata.get("source", "unknown")
-        page = document.metadata.get("page", 0)
-        # ID corto pero único
-        unique_part = uuid.uuid4().hex[:8]
-        return f"{source}::p{page}::c{chunk_index}::{unique_part}"
+        # Las secciones HTML no tienen página: usar su índice
+        page = document.metadata.get("page", document.metadata.get("section_index", 0))
+        content_hash = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()[:8]
+        return f"{source}::p{page}::c{chunk_index}::{content_hash}"
+
+
+# Encabezados de textos legales peruanos. El texto llega con los espacios
+# colapsados, así que se reconocen en línea y no por inicio de línea.
+_NAME = (
+    r"(?P<{0}>(?:\s+(?!(?:LIBRO|T[ÍI]TULO|CAP[ÍI]TULO|NORMA)\b)"
+    r"(?:-|[A-ZÁÉÍÓÚÑÜ]+,?)(?=\s|$))*)"
+)
+_LEGAL_HEADING = re.compile(
+    "|".join(
+        [
+            r"LIBRO\s+(?P<book>PRIMERO|SEGUNDO|TERCERO|CUARTO|QUINTO|SEXTO"
+            r"|S[ÉE]TIMO|OCTAVO|NOVENO|D[ÉE]CIMO|[IVXLC]+)\b"
+            + _NAME.format("book_name"),
+            r"T[ÍI]TULO\s+(?P<title>[IVXLC]+|PRELIMINAR)\b\.?"
+            + _NAME.format("title_name"),
+            r"CAP[ÍI]TULO\s+(?P<chapter>[IVXLC]+|[ÚU]NICO)\b\.?"
+            + _NAME.format("chapter_name"),
+            r"(?P<disposition>DISPOSICI[OÓ]N(?:ES)?(?:\s+(?:COMPLEMENTARIAS?|FINAL(?:ES)?"
+            r"|TRANSITORIAS?|DEROGATORIAS?|MODIFICATORIAS?))+)\b",
+            r"(?:Art[íi]culo|ART[ÍI]CULO)\s+(?P<article>\d+)\s*[°º]?"
+            r"(?:\s*-\s*(?P<suffix>[A-Z])\b)?"
+            r"\s*(?:\.\s*-|-(?!\s*[A-Z]\b)|\.(?=\s+[A-ZÁÉÍÓÚÑ]{3,}))"
+            + _NAME.format("article_name"),
+            r"NORMA\s+(?P<norma>[IVXLC]+)\s*:" + _NAME.format("norma_name"),
+            r"(?P<ordinal>(?:(?:D[ÉE]CIMO|VIG[ÉE]SIMO)\s*)?(?:PRIMERA|SEGUNDA"
+            r"|TERCERA|CUARTA|QUINTA|SEXTA|S[ÉE]TIMA|OCTAVA|NOVENA|D[ÉE]CIMA"
+            r"|[ÚU]NICA))\s*\.\s*-",
+        ]
+    )
+)
+
+_DISPOSITION_SINGULAR = {
+    "DISPOSICIONES": "Disposición",
+    "DISPOSICION": "Disposición",
+    "DISPOSICIÓN": "Disposición",
+    "COMPLEMENTARIAS": "Complementaria",
+    "COMPLEMENTARIA": "Complementaria",
+    "FINALES": "Final",
+    "FINAL": "Final",
+    "TRANSITORIAS": "Transitoria",
+    "TRANSITORIA": "Transitoria",
+    "DEROGATORIAS": "Derogatoria",
+    "DEROGATORIA": "Derogatoria",
+    "MODIFICATORIAS": "Modificatoria",
+    "MODIFICATORIA": "Modificatoria",
+}
+
+
+def _heading(kind: str, number: str, name: str | None) -> str:
+    """Etiqueta legible de un encabezado (ej. "Título I DISPOSICIONES GENERALES")."""
+    name = (name or "").strip(" ,-")
+    return f"{kind} {number} {name}".strip()
+
+
+class LegalChunker(TextChunker):
+    """
+    Divide textos legales por su estructura: Artículo, Norma (Título
+    Preliminar) y Disposiciones, subdividiendo los artículos largos.
+
+    Las páginas consecutivas de un mismo documento se unen para que un
+    artículo no se corte en el salto de página; `chunk_start`/`chunk_end`
+    son offsets sobre ese texto unido y `chunk_index` cuenta los chunks
+    de la página donde empieza cada uno. Cada chunk registra en su
+    metadata el artículo (`article`, `article_name`) y su ubicación en la
+    estructura (`book`, `law_title`, `chapter`), además de `page` y, si
+    abarca varias, `page_end`.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 512,
+        chunk_overlap: int = 50,
+        max_chunk_size: int = 1500,
+    ):
+        super().__init__(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        self.max_chunk_size = max(max_chunk_size, chunk_size)
+
+    def split_documents(self, documents: list[Document]) -> list[Chunk]:
+        """
+        Divide múltiples documentos en chunks (agrupando páginas por source)
+        """
+        all_chunks = []
+        group: list[Document] = []
+        for doc in documents:
+            if group and doc.metadata.get("source") != group[0].metadata.get("source"):
+                all_chunks.extend(self._split_group(group))
+                group = []
+            group.append(doc)
+        if group:
+            all_chunks.extend(self._split_group(group))
+        return all_chunks
+
+    def split_document(self, document: Document) -> list[Chunk]:
+        """
+        Divide un documento en chunks
+        """
+        return self._split_group([document])
+
+    def _split_group(self, documents: list[Document]) -> list[Chunk]:
+        """Divide las páginas de un documento en unidades legales y chunks."""
+        starts = []
+        parts = []
+        offset = 0
+        for doc in documents:
+            starts.append(offset)
+            parts.append(doc.content)
+            offset += len(doc.content) + 1
+        text = " ".join(parts)
+        # Una metadata base por página, compartida por sus chunks
+        bases = [
+            {k: v for k, v in doc.metadata.items() if k != "content_hash"}
+            for doc in documents
+        ]
+
+        chunks = []
+        # Índice por página (la del inicio del chunk), como en TextChunker:
+        # editar una página no desplaza los IDs de las siguientes
+        page_counts = [0] * len(documents)
+        for start, end, structure in self._units(text):
+            structure = {k: v for k, v in structure.items() if v is not None}
+            for span_start, span_end in self._spans(text, start, end):
+                raw = text[span_start:span_end]
+                chunk_text = raw.strip()
+                if not chunk_text:
+                    continue
+                span_start += len(raw) - len(raw.lstrip())
+                span_end = span_start + len(chunk_text)
+
+                first_index = bisect_right(starts, span_start) - 1
+                first = documents[first_index]
+                last = documents[bisect_right(starts, span_end - 1) - 1]
+                chunk_index = page_counts[first_index]
+                page_counts[first_index] += 1
+                metadata = {
+                    "chunk_index": chunk_index,
+                    "chunk_start": span_start,
+                    "chunk_end": span_end,
+                }
+                chunk_id = self._generate_chunk_id(first, chunk_index, chunk_text)
+                if last is first:
+                    # Apunta al texto de la página: el texto unido no se retiene
+                    offset = starts[first_index]
+                    chunk = Chunk(
+                        chunk_id=chunk_id,
+                        buffer=first.content,
+                        start=span_start - offset,
+                        end=span_end - offset,
+                        shared_metadata=(bases[first_index], structure),
+                        metadata=metadata,
+                    )
+                else:
+                    if last.metadata.get("page") is not None:
+                        metadata["page_end"] = last.metadata["page"]
+                    chunk = Chunk(
+                        chunk_id=chunk_id,
+                        content=chunk_text,
+                        shared_metadata=(bases[first_index], structure),
+                        metadata=metadata,
+                    )
+                chunks.append(chunk)
+        return chunks
+
+    def _units(self, text: str) -> list[tuple[int, int, dict]]:
+        """
+        Retorna las unidades (inicio, fin, estructura) del texto.
+
+        Los encabezados de Libro/Título/Capítulo/Disposiciones no forman
+        unidad propia: actualizan el contexto y se anteponen a la unidad
+        siguiente.
+        """
+        context = {
+            "book": None,
+            "law_title": None,
+            "chapter": None,
+            "disposition": None,
+        }
+        units = []
+        unit_start = 0
+        unit_structure = {"article": None, **context}
+        pending = False  # hay encabezados de estructura sin unidad aún
+
+        def close(end: int) -> None:
+            if end > unit_start:
+                units.append((unit_start, end, unit_structure))
+
+        for match in _LEGAL_HEADING.finditer(text):
+            groups = match.groupdict()
+            article = None
+            name = None
+
+            if groups["book"]:
+                context.update(
+                    book=_heading("Libro", groups["book"], groups["book_name"]),
+                    law_title=None,
+                    chapter=None,
+                    disposition=None,
+                )
+            elif groups["title"]:
+                context.update(
+                    law_title=_heading("Título", groups["title"], groups["title_name"]),
+                    chapter=None,
+                    disposition=None,
+                )
+            elif groups["chapter"]:
+                context["chapter"] = _heading(
+                    "Capítulo", groups["chapter"], groups["chapter_name"]
+                )
+            elif groups["disposition"]:
+                context["disposition"] = " ".join(
+                    _DISPOSITION_SINGULAR.get(word.upper(), word.capitalize())
+                    for word in groups["disposition"].split()
+                )
+            elif groups["article"]:
+                article = groups["article"]
+                if groups["suffix"]:
+                    article += f"-{groups['suffix']}"
+                name = groups["article_name"]
+            elif groups["norma"]:
+                article = f"Norma {groups['norma']}"
+                name = groups["norma_name"]
+            elif groups["ordinal"] and context["disposition"]:
+                article = f"{groups['ordinal'].capitalize()} {context['disposition']}"
+            else:
+                # Ordinal fuera de una sección de disposiciones: no es encabezado
+                continue
+
+            if article is None:
+                # Encabezado de estructura: cierra la unidad previa y queda
+                # pendiente de anteponerse a la siguiente
+                if not pending:
+                    close(match.start())
+                    unit_start = match.start()
+                    pending = True
+                unit_structure = {"article": None, **context}
+                continue
+
+            if not pending:
+                close(match.start())
+                unit_start = match.start()
+            pending = False
+            unit_structure = {
+                "article": article,
+                "article_name": (name or "").strip(" ,-") or None,
+                **context,
+            }
+
+        close(len(text))
+        return units
+
+    def _spans(self, text: str, start: int, end: int) -> list[tuple[int, int]]:
+        """
+        Subdivide [start, end) en ventanas de hasta `max_chunk_size`
+        cortando en espacios, con `chunk_overlap` de solapamiento.
+        """
+        if end - start <= self.max_chunk_size:
+            return [(start, end)]
+
+        spans = []
+        while start < end:
+            stop = min(start + self.max_chunk_size, end)
+            if stop < end:
+                last_space = text.rfind(" ", start, stop)
+                if last_space > start:
+                    stop = last_space
+            spans.append((start, stop))
+            if stop >= end:
+                break
+            start = max(stop - self.chunk_overlap, start + 1)
+        return spans
+
+
+class TokenChunker(TextChunker):
+    """
+    Divide documentos en ventanas de tokens del modelo de embeddings.
+
+    Cada chunk llena la ventana del modelo (`max_seq_length` menos los
+    tokens especiales) sin excederla, así el encoder no trunca texto. El
+    overlap se cuenta en tokens y los cortes caen en inicios de palabra.
+
+    Las páginas se tokenizan por batches (`encode_batch`) con offsets, de
+    modo que cada chunk es un slice del texto de su página.
+
+    Args:
+        tokenizer: `tokenizers.Tokenizer` sin truncado ni padding
+            (ver EmbeddingModel.create_tokenizer)
+        max_seq_length: Ventana del modelo, incluidos los tokens especiales
+        chunk_size: Tokens por chunk (None = toda la ventana)
+        chunk_overlap: Tokens de solapamiento entre chunks consecutivos
+        batch_size: Páginas por llamada a `encode_batch`
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_seq_length: int,
+        chunk_size: int | None = None,
+        chunk_overlap: int = 32,
+        batch_size: int = 256,
+    ):
+        processor = tokenizer.post_processor
+        special = processor.num_special_tokens_to_add(False) if processor else 0
+        window = max(max_seq_length - special, 1)
+        chunk_size = min(chunk_size or window, window)
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=min(chunk_overlap, chunk_size // 2),
+            length_function=self.count_tokens,
+        )
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+
+    def count_tokens(self, text: str) -> int:
+        """Tokens de un texto, sin contar los especiales."""
+        return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+
+    def split_documents(self, documents: list[Document]) -> list[Chunk]:
+        """
+        Divide múltiples documentos en chunks (tokenizando por batches)
+        """
+        all_chunks = []
+        for start in range(0, len(documents), self.batch_size):
+            batch = documents[start : start + self.batch_size]
+            encodings = self.tokenizer.encode_batch(
+                [doc.content for doc in batch], add_special_tokens=False
+            )
+            for doc, encoding in zip(batch, encodings):
+                all_chunks.extend(self._split_encoded(doc, encoding.offsets))
+        return all_chunks
+
+    def split_document(self, document: Document) -> list[Chunk]:
+        """
+        Divide un documento en chunks
+        """
+        return self.split_documents([document])
+
+    def _split_encoded(
+        self, document: Document, offsets: list[tuple[int, int]]
+    ) -> list[Chunk]:
+        """Agrupa los tokens de una página en ventanas de `chunk_size`."""
+        text = document.content
+        total = len(offsets)
+        # Un token inicia palabra si está al comienzo o tras un espacio
+        word_start = [
+            s == 0 or text[s - 1].isspace() or text[s].isspace() for s, _ in offsets
+        ]
+
+        chunks = []
+        start = 0
+        while start < total:
+            stop = min(start + self.chunk_size, total)
+            if stop < total:
+                # Retroceder hasta un inicio de palabra para no partirla
+                cut = stop
+                while cut > start + 1 and not word_start[cut]:
+                    cut -= 1
+                if cut > start + 1:
+                    stop = cut
+
+            raw = text[offsets[start][0] : offsets[stop - 1][1]]
+            chunk_text = raw.strip()
+            if chunk_text:
+                content_start = offsets[start][0] + len(raw) - len(raw.lstrip())
+                chunks.append(
+                    Chunk(
+                        chunk_id=self._generate_chunk_id(
+                            document, len(chunks), chunk_text
+                        ),
+                        buffer=text,
+                        start=content_start,
+                        end=content_start + len(chunk_text),
+                        shared_metadata=(document.metadata,),
+                        metadata={
+                            "chunk_index": len(chunks),
+                            "chunk_start": offsets[start][0],
+                            "chunk_end": offsets[stop - 1][1],
+                            "chunk_tokens": stop - start,
+                        },
+                    )
+                )
+            if stop >= total:
+                break
+
+            # Overlap en tokens, arrancando también en inicio de palabra
+            next_start = max(stop - self.chunk_overlap, start + 1)
+            while next_start < stop and not word_start[next_start]:
+                next_start += 1
+            start = next_start
+        return chunks
+
+
+def create_chunker(
+    strategy: str = "fixed",
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    max_chunk_size: int = 1500,
+    tokenizer=None,
+    max_seq_length: int = 128,
+) -> TextChunker:
+    """
+    Crea el chunker de una estrategia.
+
+    Args:
+        strategy: "fixed" (ventanas de `chunk_size` caracteres), "legal" (por
+            artículos, ver LegalChunker, con hasta `max_chunk_size`) o
+            "tokens" (ventanas de tokens, ver TokenChunker; `chunk_size` y
+            `chunk_overlap` se cuentan en tokens y `chunk_size=0` usa toda
+            la ventana `max_seq_length`)
+        tokenizer: Tokenizer del modelo de embeddings (solo "tokens")
+    """
+    if strategy == "legal":
+        return LegalChunker(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            max_chunk_size=max_chunk_size,
+        )
+    if strategy == "tokens":
+        if tokenizer is None:
+            raise ValueError('La estrategia "tokens" requiere un tokenizer')
+        return TokenChunker(
+            tokenizer,
+            max_seq_length=max_seq_length,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+    return TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
 
 
 def chunk_documents(
-    documents: list[Document], chunk_size: int = 512, chunk_overlap: int = 50
+    documents: list[Document],
+    chunk_size: int = 512,
+    chunk_overlap: int = 50,
+    strategy: str = "fixed",
+    max_chunk_size: int = 1500,
+    tokenizer=None,
+    max_seq_length: int = 128,
 ) -> list[Chunk]:
     """
     Función de conveniencia para dividir documentos en chunks
+
+    Args:
+        strategy: "fixed", "legal" o "tokens" (ver create_chunker)
     """
-    chunker = TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    chunker = create_chunker(
+        strategy,
+        chunk_size=chunk_size,
+        chunk_overlap=chunk_overlap,
+        max_chunk_size=max_chunk_size,
+        tokenizer=tokenizer,
+        max_seq_length=max_seq_length,
+    )
     return chunker.split_documents(documents)
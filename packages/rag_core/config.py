@@ -32,19 +32,82 @@ class Settings(BaseSettings):
 
     # Embeddings
     embedding_model: str = "paraphrase-multilingual-MiniLM-L12-v2"
+    # Textos por batch al generar embeddings en la ingesta
+    embedding_batch_size: int = 64
+    # Procesos para embeddings en la ingesta (0/1 = proceso principal)
+    embedding_workers: int = 0
+    embedding_worker_threads: int = 1
+    # Backend de embeddings: "torch" (sentence-transformers) u "onnx" (onnxruntime)
+    embedding_backend: str = "torch"
+    onnx_quantize: bool = False
+    onnx_cache_dir: str = "./data/onnx"
+    # Caché en disco de embeddings de chunks (clave: hash del texto + modelo)
+    chunk_embedding_cache: bool = True
+    # LRU de embeddings de queries (0 = desactivado), persistible en cache_dir
+    query_embedding_cache_size: int = 1024
+    query_embedding_cache_persist: bool = False
+    cache_dir: str = "./data/cache"
 
     # ChromaDB
     chroma_persist_dir: str = "./data/chroma"
+    # Backend vectorial: "chroma" (HNSW) o "numpy" (búsqueda exacta en memoria)
+    vector_backend: str = "chroma"
+    # Solo backend numpy: "none", "int8" o "binary" + tamaño del pool a re-puntuar
+    vector_quantization: str = "none"
+    rescore_pool: int = 100
+    # Solo backend numpy: compactar sola la colección cuando las filas
+    # muertas (reemplazadas o borradas) superan esta fracción
+    compact_dead_ratio: float = 0.2
+
+    # Escrituras al vector store: chunks por upsert (acotado al máximo de
+    # Chroma) y reintentos ante errores transitorios
+    write_batch_size: int = 1000
+    write_retries: int = 3
+
+    # Extracción de PDFs: procesos (0/1 = secuencial) y páginas por tarea
+    pdf_workers: int = 0
+    pdf_pages_per_task: int = 25
+
+    # Caché de texto extraído por página (clave: sha256 del archivo)
+    extraction_cache: bool = True
+    extraction_cache_path: str = "./data/processed/extraction.sqlite"
+
+    # Ingesta en streaming: chunks por batch de embeddings, chunks por
+    # escritura en el vector store y capacidad de las colas entre etapas
+    ingest_batch_size: int = 256
+    ingest_flush_size: int = 2048
+    ingest_queue_size: int = 4
 
     # RAG Parameters
     chunk_size: int = 512
     chunk_overlap: int = 50
+    # Chunking: "fixed" (ventanas de chunk_size), "legal" (por artículos,
+    # subdividiendo los que superan legal_max_chunk_size) o "tokens"
+    # (ventanas de tokens del modelo de embeddings, sin exceder su
+    # max_seq_length; token_chunk_size=0 usa toda la ventana)
+    chunking_strategy: str = "fixed"
+    legal_max_chunk_size: int = 1500
+    token_chunk_size: int = 0
+    token_chunk_overlap: int = 32
+    # Fusionar chunks casi duplicados de un documento (MinHash/LSH) antes de
+    # embeberlos; las páginas de las copias quedan en la metadata `also_in`.
+    # Desactivado por defecto: activarlo cambia los chunks (y sus IDs) de
+    # una colección ya indexada, que se reindexa en la siguiente ingesta
+    dedup_chunks: bool = False
+    dedup_threshold: float = 0.85
     top_k_results: int = 5
+    # Preguntas que citan artículos ("artículo 132", "inciso b del art. 43")
+    # se resuelven con el índice de artículos, sin búsqueda vectorial
+    article_fast_path: bool = True
 
     # Hybrid Search (vector + keyword)
     hybrid_search: bool = True
     vector_weight: float = 0.7
     keyword_weight: float = 0.3
+    # Backend de scoring keyword: "counts" (conteo de ocurrencias) o "bm25"
+    keyword_backend: str = "counts"
+    bm25_k1: float = 1.2
+    bm25_b: float = 0.75
 
     # API
     api_host: str = "0.0.0.0"
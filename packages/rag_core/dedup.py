@@ -0,0 +1,159 @@
+"""
+Deduplicación - Chunks casi duplicados con MinHash/LSH
+
+Los PDFs normativos repiten encabezados, pies de página, banners del Diario
+Oficial y artículos completos (ej. textos consolidados). Antes de embeber, los
+chunks casi idénticos de un documento se fusionan en uno solo, que recuerda
+en `also_in` las demás páginas donde aparece el texto.
+"""
+
+import hashlib
+import re
+import zlib
+
+import numpy as np
+
+from .chunker import Chunk
+
+_WORD = re.compile(r"\w+")
+# Hashing universal (a·x + b) mod p con p = 2^31 - 1: a, b y x (reducido
+# mod p) son menores que 2^31, así que a·x + b cabe en uint64 sin desbordar
+_PRIME = np.uint64((1 << 31) - 1)
+
+
+def shingles(text: str, size: int = 3) -> set[int]:
+    """Hashes (crc32) de los n-gramas de palabras del texto en minúsculas."""
+    words = _WORD.findall(text.lower())
+    grams = (" ".join(words[i : i + size]) for i in range(len(words) - size + 1))
+    return {zlib.crc32(gram.encode("utf-8")) for gram in grams}
+
+
+class MinHasher:
+    """Firmas MinHash de `num_perm` permutaciones (deterministas por `seed`)."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: set[int]) -> np.ndarray:
+        """Mínimo de cada permutación sobre los hashes (vectorizado)."""
+        values = np.fromiter(hashes, dtype=np.uint64, count=len(hashes)) % _PRIME
+        permuted = (np.outer(self._a, values) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+
+class ChunkDeduplicator:
+    """
+    Fusiona chunks casi duplicados de un mismo documento.
+
+    Cada chunk se resume en una firma MinHash de sus shingles; el LSH por
+    bandas propone candidatos en O(1) y se confirman con la similitud de
+    Jaccard estimada (fracción de posiciones iguales en la firma). Se
+    conserva la primera aparición y las páginas de las copias quedan en su
+    metadata `also_in` ("3,7,12"), para que las citas lleguen a todas.
+
+    Solo se comparan chunks del mismo artículo (metadata `article`, si la
+    hay) para no perder entradas del índice de artículos.
+
+    Args:
+        threshold: Jaccard estimada mínima para considerar duplicados
+        num_perm: Permutaciones de la firma MinHash
+        bands: Bandas del LSH (`num_perm` debe ser múltiplo)
+        shingle_size: Palabras por shingle; chunks más cortos no se fusionan
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+
+    def deduplicate(self, chunks: list[Chunk]) -> list[Chunk]:
+        """
+        Retorna los chunks sin casi duplicados, en su orden original.
+
+        Los chunks que absorben copias reciben `also_in` y un sufijo en su
+        ID, de modo que cambie si cambian las páginas fusionadas.
+        """
+        kept: list[Chunk] = []
+        signatures: list[np.ndarray] = []
+        articles: list[str | None] = []
+        buckets: dict[tuple[int, bytes], list[int]] = {}
+        # Firma -> (posición del representante en `kept`, páginas de copias)
+        also_in: dict[int, tuple[int, set]] = {}
+
+        for chunk in chunks:
+            metadata = chunk.metadata
+            hashes = shingles(chunk.content, self.shingle_size)
+            if not hashes:
+                kept.append(chunk)
+                continue
+
+            signature = self.hasher.signature(hashes)
+            article = metadata.get("article")
+            keys = [
+                (band, signature[band * self.rows : (band + 1) * self.rows].tobytes())
+                for band in range(self.bands)
+            ]
+            match = self._find_match(
+                keys, signature, article, buckets, signatures, articles
+            )
+            if match is None:
+                index = len(signatures)
+                signatures.append(signature)
+                articles.append(article)
+                for key in keys:
+                    buckets.setdefault(key, []).append(index)
+                kept.append(chunk)
+                also_in[index] = (len(kept) - 1, set())
+                continue
+
+            _, pages = also_in[match]
+            page = metadata.get("page", metadata.get("section_index"))
+            if page is not None:
+                pages.add(page)
+
+        for position, pages in also_in.values():
+            chunk = kept[position]
+            metadata = chunk.metadata
+            pages.discard(metadata.get("page", metadata.get("section_index")))
+            if not pages:
+                continue
+            label = ",".join(str(p) for p in sorted(pages))
+            chunk.add_metadata({"also_in": label})
+            suffix = hashlib.sha256(label.encode("utf-8")).hexdigest()[:6]
+            chunk.chunk_id = f"{chunk.chunk_id}::d{suffix}"
+        return kept
+
+    def _find_match(
+        self,
+        keys: list[tuple[int, bytes]],
+        signature: np.ndarray,
+        article: str | None,
+        buckets: dict[tuple[int, bytes], list[int]],
+        signatures: list[np.ndarray],
+        articles: list[str | None],
+    ) -> int | None:
+        """Primer representante candidato por LSH que supera el umbral."""
+        seen = set()
+        for key in keys:
+            for index in buckets.get(key, ()):
+                if index in seen:
+                    continue
+                seen.add(index)
+                if articles[index] != article:
+                    continue
+                if np.mean(signatures[index] == signature) >= self.threshold:
+                    return index
+        return None
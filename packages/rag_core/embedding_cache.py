@@ -0,0 +1,390 @@
+"""
+Cachés de embeddings.
+
+- QueryEmbeddingCache: LRU en memoria para queries repetidas.
+- ChunkEmbeddingCache: caché en disco direccionado por contenido para la
+  ingesta, evita re-embeber chunks ya vistos al re-ingestar o reconstruir.
+"""
+
+import atexit
+import fcntl
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .config import get_settings
+
+
+def embedding_variant(
+    model_name: str, backend: str = "torch", quantization: str = "fp32"
+) -> str:
+    """
+    Identifica qué produjo un embedding: modelo, backend (torch/onnx) y
+    precisión (fp32/int8). Los vectores de variantes distintas no son
+    intercambiables, así que forma parte de las claves de los cachés.
+    """
+    return f"{model_name}|{backend}|{quantization}"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normaliza una query para usarla como clave del caché.
+
+    Solo aplica cambios que no alteran el embedding (forma Unicode NFC y
+    espacios); mayúsculas y acentos se conservan porque el tokenizer los ve.
+    """
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    """
+    LRU acotado de embeddings de queries, opcionalmente persistido.
+
+    Features:
+    - Clave: (variante del modelo, ver embedding_variant; query normalizada)
+    - Eviction LRU con OrderedDict
+    - Persistencia opcional en `.npz` (se guarda cada `save_every` entradas
+      nuevas y al terminar el proceso)
+    - Thread-safe y con estadísticas de hits/misses
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        persist_path: str | Path | None = None,
+        save_every: int = 32,
+    ):
+        """
+        Args:
+            max_entries: Número máximo de embeddings en memoria
+            persist_path: Archivo `.npz` donde persistir (None = solo memoria)
+            save_every: Entradas nuevas entre guardados a disco
+        """
+        self.max_entries = max_entries
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.save_every = save_every
+
+        self._cache: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        self._unsaved = 0
+
+        if self.persist_path:
+            self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+            self._load()
+            atexit.register(self.save)
+
+    def get(self, model_name: str, query: str) -> Optional[np.ndarray]:
+        """Retorna el embedding cacheado o None."""
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            vector = self._cache.get(key)
+            if vector is None:
+                self._stats["misses"] += 1
+                return None
+            self._cache.move_to_end(key)
+            self._stats["hits"] += 1
+            return vector
+
+    def put(self, model_name: str, query: str, vector) -> None:
+        """Guarda un embedding, expulsando el menos usado si hace falta."""
+        if self.max_entries <= 0:
+            return
+        key = (model_name, normalize_query(query))
+        with self._lock:
+            self._cache[key] = np.asarray(vector, dtype=np.float32)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            self._unsaved += 1
+            should_save = self.persist_path and self._unsaved >= self.save_every
+        if should_save:
+            self.save()
+
+    def _load(self) -> None:
+        """Carga el caché desde disco"""
+        if not self.persist_path.exists():
+            return
+        try:
+            with np.load(self.persist_path) as data:
+                models = data["models"].tolist()
+                queries = data["queries"].tolist()
+                vectors = data["vectors"]
+                for model, query, vector in zip(models, queries, vectors):
+                    self._cache[(model, query)] = vector
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            print(f"📂 Caché de embeddings cargado: {len(self._cache)} queries")
+        except (OSError, KeyError, ValueError) as e:
+            print(f"⚠️ Error cargando caché de embeddings: {e}")
+            self._cache = OrderedDict()
+
+    def save(self) -> None:
+        """Guarda el caché a disco (en orden LRU)"""
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._unsaved:
+                return
+            items = list(self._cache.items())
+            self._unsaved = 0
+        if not items:
+            return
+        tmp_path = self.persist_path.with_suffix(".tmp.npz")
+        try:
+            np.savez(
+                tmp_path,
+                models=np.array([model for (model, _), _ in items]),
+                queries=np.array([query for (_, query), _ in items]),
+                vectors=np.stack([vector for _, vector in items]),
+            )
+            tmp_path.replace(self.persist_path)
+        except OSError as e:
+            print(f"⚠️ Error guardando caché de embeddings: {e}")
+
+    def get_stats(self) -> dict:
+        """Retorna estadísticas del caché"""
+        with self._lock:
+            total_requests = self._stats["hits"] + self._stats["misses"]
+            hit_rate = (
+                self._stats["hits"] / total_requests * 100 if total_requests > 0 else 0
+            )
+            return {
+                "total_entries": len(self._cache),
+                "max_entries": self.max_entries,
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+                "hit_rate_percent": round(hit_rate, 2),
+            }
+
+    def clear(self) -> None:
+        """Limpia todo el caché"""
+        with self._lock:
+            self._cache = OrderedDict()
+            self._stats = {"hits": 0, "misses": 0}
+            self._unsaved = 0
+            if self.persist_path and self.persist_path.exists():
+                self.persist_path.unlink()
+
+
+def content_key(variant: str, text: str) -> bytes:
+    """Clave de un chunk: sha256 de la variante del modelo y el texto (32 bytes)."""
+    return hashlib.sha256(f"{variant}\0{text}".encode("utf-8")).digest()
+
+
+class ChunkEmbeddingCache:
+    """
+    Caché persistente de embeddings de chunks, direccionado por contenido.
+
+    Formato binario append-only, un archivo por variante del modelo
+    (nombre, backend y precisión, ver embedding_variant):
+    - Cabecera: magic `EMBC1` + dimensión (uint32)
+    - Registros: digest sha256 (32 bytes) + vector float32
+
+    Los registros se leen con memory-map; un registro final truncado (por
+    ejemplo tras un corte a mitad de escritura) se descarta al cargar.
+
+    Varios procesos pueden compartir el archivo: cada escritura toma un
+    lock exclusivo (flock), lee los registros que otros añadieron desde la
+    última vez y calcula la posición de los nuevos desde el tamaño real
+    del archivo, no desde la vista en memoria.
+    """
+
+    MAGIC = b"EMBC1"
+    HEADER_SIZE = len(MAGIC) + 4
+
+    def __init__(
+        self,
+        cache_dir: str | Path,
+        model_name: str,
+        backend: str = "torch",
+        quantization: str = "fp32",
+    ):
+        """
+        Args:
+            cache_dir: Directorio donde guardar el caché
+            model_name: Modelo de embeddings
+            backend: Backend que genera los embeddings ("torch" u "onnx")
+            quantization: Precisión del modelo ("fp32" o "int8")
+
+        Modelo, backend y precisión forman parte de la clave y del archivo.
+        """
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.model_name = model_name
+        self.variant = embedding_variant(model_name, backend, quantization)
+        slug = re.sub(r"[^\w.-]+", "_", self.variant)
+        self.cache_file = self.cache_dir / f"embeddings_{slug}.bin"
+
+        self.dim: int | None = None
+        self._records: np.ndarray | None = None
+        self._rows: dict[bytes, int] = {}
+        # Registros del archivo ya indexados (puede haber claves repetidas)
+        self._count = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+        self._load()
+
+    def _dtype(self) -> np.dtype:
+        # V32 y no S32: numpy recorta los \x00 finales de los bytes "S"
+        return np.dtype([("key", "V32"), ("vector", "<f4", (self.dim,))])
+
+    def _load(self) -> None:
+        """Abre el archivo con memory-map e indexa los digests."""
+        if not self.cache_file.exists():
+            return
+        with open(self.cache_file, "rb") as f:
+            # Otro proceso puede estar escribiendo: no truncar a medias
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                header = f.read(self.HEADER_SIZE)
+                if len(header) < self.HEADER_SIZE or not header.startswith(self.MAGIC):
+                    print(
+                        f"⚠️ Caché de embeddings inválido, se ignora: {self.cache_file}"
+                    )
+                    self.cache_file.unlink()
+                    return
+                self.dim = int(np.frombuffer(header[len(self.MAGIC) :], dtype="<u4")[0])
+                self._refresh(os.fstat(f.fileno()).st_size)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refresh(self, size: int) -> None:
+        """
+        Indexa los registros añadidos (por este u otro proceso) hasta `size`
+        bytes del archivo y reabre el memory-map.
+        """
+        record_size = self._dtype().itemsize
+        payload = size - self.HEADER_SIZE
+        count = payload // record_size
+        if payload % record_size:
+            # Descartar el registro incompleto del final
+            os.truncate(self.cache_file, self.HEADER_SIZE + count * record_size)
+        if count == self._count:
+            return
+
+        self._records = np.memmap(
+            self.cache_file,
+            dtype=self._dtype(),
+            mode="r",
+            offset=self.HEADER_SIZE,
+            shape=(count,),
+        )
+        new_keys = self._records["key"][self._count : count].tolist()
+        for row, key in enumerate(new_keys, self._count):
+            self._rows.setdefault(key, row)
+        self._count = count
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, texts: list[str]) -> tuple[list[bytes], dict[int, np.ndarray]]:
+        """
+        Busca los embeddings de varios textos.
+
+        Returns:
+            (claves de todos los textos, {índice: embedding} de los encontrados)
+        """
+        keys = [content_key(self.variant, text) for text in texts]
+        found = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._rows.get(key)
+                if row is not None:
+                    found[i] = self._records["vector"][row]
+            self._stats["hits"] += len(found)
+            self._stats["misses"] += len(keys) - len(found)
+        return keys, found
+
+    def add(self, keys: list[bytes], embeddings: np.ndarray) -> None:
+        """
+        Agrega embeddings nuevos al final del archivo.
+
+        Con el lock exclusivo tomado, primero se indexan los registros que
+        otros procesos hayan escrito, así no se duplican claves y las filas
+        nuevas se numeran desde el final real del archivo.
+        """
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        with self._lock, open(self.cache_file, "a+b") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                size = os.fstat(f.fileno()).st_size
+                if size < self.HEADER_SIZE:
+                    # Archivo nuevo (o cabecera a medio escribir)
+                    f.truncate(0)
+                    self._rows = {}
+                    self._count = 0
+                    self.dim = embeddings.shape[1]
+                    f.write(self.MAGIC + np.uint32(self.dim).astype("<u4").tobytes())
+                    f.flush()
+                    size = self.HEADER_SIZE
+                elif self.dim is None:
+                    f.seek(len(self.MAGIC))
+                    self.dim = int(np.frombuffer(f.read(4), dtype="<u4")[0])
+                self._refresh(size)
+
+                new = list(
+                    {
+                        key: i for i, key in enumerate(keys) if key not in self._rows
+                    }.values()
+                )
+                if not new:
+                    return
+                records = np.empty(len(new), dtype=self._dtype())
+                records["key"] = [keys[i] for i in new]
+                records["vector"] = embeddings[new]
+                f.seek(0, os.SEEK_END)
+                f.write(records.tobytes())
+                f.flush()
+                self._refresh(
+                    self.HEADER_SIZE + (self._count + len(new)) * records.itemsize
+                )
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_stats(self) -> dict:
+        """Retorna estadísticas del caché"""
+        with self._lock:
+            return {
+                "total_entries": len(self._rows),
+                "hits": self._stats["hits"],
+                "misses": self._stats["misses"],
+            }
+
+    def clear(self) -> None:
+        """Elimina el caché del disco"""
+        with self._lock:
+            self._records = None
+            self._rows = {}
+            self._count = 0
+            self.dim = None
+            if self.cache_file.exists():
+                self.cache_file.unlink()
+
+
+# Singleton global
+_query_cache_instance: Optional[QueryEmbeddingCache] = None
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Obtiene la instancia singleton del caché de embeddings de queries"""
+    global _query_cache_instance
+    if _query_cache_instance is None:
+        settings = get_settings()
+        _query_cache_instance = QueryEmbeddingCache(
+            max_entries=settings.query_embedding_cache_size,
+            persist_path=(
+                Path(settings.cache_dir) / "query_embeddings.npz"
+                if settings.query_embedding_cache_persist
+                else None
+            ),
+        )
+    return _query_cache_instance
@@ -0,0 +1,117 @@
+"""
+Pool de procesos para generar embeddings en ingestas grandes.
+
+Cada worker carga el modelo una sola vez (en el initializer) y procesa
+batches completos; los resultados se devuelven en el orden de envío.
+"""
+
+import multiprocessing
+import os
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .config import get_settings
+
+# Modelo cargado en cada proceso worker
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int) -> None:
+    """Carga el modelo en el worker con un número acotado de threads."""
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    if backend == "onnx":
+        from .onnx_backend import OnnxEncoder
+
+        settings = get_settings()
+        _worker_model = OnnxEncoder(
+            model_name,
+            cache_dir=settings.onnx_cache_dir,
+            quantize=settings.onnx_quantize,
+            num_threads=threads,
+        )
+    else:
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        torch.set_num_threads(threads)
+        _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_batch(texts: list[str]) -> np.ndarray:
+    """Genera los embeddings de un batch en el worker."""
+    embeddings = _worker_model.encode(
+        texts, batch_size=len(texts), convert_to_numpy=True
+    )
+    return embeddings.astype(np.float32, copy=False)
+
+
+class EmbeddingPool:
+    """
+    Pool de workers de embeddings (contexto `spawn`).
+
+    Uso:
+        with EmbeddingPool(model_name, workers=4) as pool:
+            for embeddings in pool.map_batches(batches):
+                ...
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        workers: int,
+        threads_per_worker: int = 1,
+        backend: str = "torch",
+    ):
+        self.model_name = model_name
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.backend = backend
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> "EmbeddingPool":
+        if self._executor is not None:
+            return self
+        if self.backend == "onnx":
+            # Exportar una sola vez antes de que los workers lo necesiten
+            from .onnx_backend import export_model
+
+            settings = get_settings()
+            export_model(
+                self.model_name,
+                settings.onnx_cache_dir,
+                quantize=settings.onnx_quantize,
+            )
+
+        print(
+            f"Iniciando pool de embeddings: {self.workers} workers x "
+            f"{self.threads_per_worker} threads"
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name, self.backend, self.threads_per_worker),
+        )
+        return self
+
+    def map_batches(self, batches: list[list[str]]) -> Iterator[np.ndarray]:
+        """Reparte los batches entre los workers y los devuelve en orden."""
+        if self._executor is None:
+            self.start()
+        return self._executor.map(_encode_batch, batches)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "EmbeddingPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
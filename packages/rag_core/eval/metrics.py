@@ -85,6 +85,7 @@ class RAGMetrics:
         expected_sources: list[str],
         gold_answer: Optional[str] = None,
         top_k: int = 5,
+        relevant_chunks: Optional[list[dict]] = None,
     ) -> MetricsResult:
         """
         Evalúa un item individual.
@@ -94,12 +95,15 @@ class RAGMetrics:
             expected_sources: Fuentes esperadas en la respuesta
             gold_answer: Respuesta esperada (opcional)
             top_k: Número de chunks a recuperar
+            relevant_chunks: Chunks ya recuperados (opcional)
 
         Returns:
             MetricsResult con todas las métricas
         """
         # Ejecutar query
-        result = self.pipeline.query(question, top_k=top_k)
+        result = self.pipeline.query(
+            question, top_k=top_k, relevant_chunks=relevant_chunks
+        )
 
         # Extraer fuentes recuperadas
         sources_retrieved = []
@@ -167,14 +171,21 @@ class RAGMetrics:
             AggregatedMetrics con métricas agregadas
         """
         results = []
+        items = list(dataset)
+
+        # Retrieval de todo el dataset en un solo batch
+        retrieved = self.pipeline.retrieve_many(
+            [item.question for item in items], top_k=top_k
+        )
 
-        for item in dataset:
+        for item, relevant_chunks in zip(items, retrieved):
             print(f"Evaluando: {item.question[:50]}...")
             result = self.evaluate_item(
                 question=item.question,
                 expected_sources=item.expected_sources,
                 gold_answer=item.gold_answer,
                 top_k=top_k,
+                relevant_chunks=relevant_chunks,
             )
             results.append(result)
 
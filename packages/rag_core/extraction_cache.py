@@ -0,0 +1,180 @@
+"""
+Caché de extracción - Texto limpio por página en SQLite
+
+Guarda el texto extraído de cada página (PDF) o sección (HTML) indexado por
+el sha256 del archivo, de modo que re-ingestar o re-chunkear un documento sin
+cambios no vuelve a pasar por pdfplumber/BeautifulSoup.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Optional
+
+from .config import get_settings
+from .manifest import file_sha256
+
+# Incrementar si cambia la extracción o limpieza (invalida entradas previas)
+EXTRACTION_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    sha256 TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    total_pages INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    sha256 TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    meta TEXT,
+    PRIMARY KEY (sha256, page)
+);
+CREATE TABLE IF NOT EXISTS paths (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    sha256 TEXT NOT NULL
+);
+"""
+
+# (número de página o sección, texto limpio, metadata extra o None)
+PageRow = tuple[int, str, Optional[dict]]
+
+
+class ExtractionCache:
+    """
+    Caché persistente de páginas extraídas, en un archivo SQLite.
+
+    Features:
+    - Clave: sha256 del archivo (+ EXTRACTION_VERSION)
+    - El hash de cada ruta se recuerda por (size, mtime) para no releer
+      archivos sin cambios
+    - Una conexión por operación: seguro entre threads y procesos
+    """
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            with conn:
+                yield conn
+
+    def fingerprint(self, path: str | Path) -> str:
+        """sha256 del archivo, reutilizado mientras no cambien size y mtime."""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT size, mtime, sha256 FROM paths WHERE path = ?", (str(path),)
+            ).fetchone()
+            if row and row[0] == stat.st_size and row[1] == stat.st_mtime:
+                return row[2]
+
+            digest = file_sha256(path)
+            conn.execute(
+                "INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)",
+                (str(path), stat.st_size, stat.st_mtime, digest),
+            )
+        return digest
+
+    def get(self, digest: str) -> Optional[tuple[int, list[PageRow]]]:
+        """Retorna (total de páginas, filas en orden) o None si no está."""
+        with self._connect() as conn:
+            entry = conn.execute(
+                "SELECT total_pages FROM files WHERE sha256 = ? AND version = ?",
+                (digest, EXTRACTION_VERSION),
+            ).fetchone()
+            rows = (
+                conn.execute(
+                    "SELECT page, text, meta FROM pages WHERE sha256 = ? ORDER BY page",
+                    (digest,),
+                ).fetchall()
+                if entry
+                else []
+            )
+
+        with self._lock:
+            self._stats["hits" if entry else "misses"] += 1
+        if entry is None:
+            return None
+        return entry[0], [
+            (page, text, json.loads(meta) if meta else None)
+            for page, text, meta in rows
+        ]
+
+    def put(
+        self, digest: str, kind: str, total_pages: int, pages: list[PageRow]
+    ) -> None:
+        """Guarda (o reemplaza) las páginas extraídas de un archivo."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages WHERE sha256 = ?", (digest,))
+            conn.executemany(
+                "INSERT INTO pages VALUES (?, ?, ?, ?)",
+                [
+                    (
+                        digest,
+                        page,
+                        text,
+                        json.dumps(meta, ensure_ascii=False) if meta else None,
+                    )
+                    for page, text, meta in pages
+                ],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?)",
+                (digest, kind, total_pages, EXTRACTION_VERSION, time.time()),
+            )
+
+    def get_stats(self) -> dict:
+        """Retorna estadísticas del caché"""
+        with self._connect() as conn:
+            files = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            pages = conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+        with self._lock:
+            hits, misses = self._stats["hits"], self._stats["misses"]
+        total = hits + misses
+        return {
+            "files": files,
+            "pages": pages,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": f"{(hits / total * 100):.1f}%" if total > 0 else "0%",
+            "db_path": str(self.db_path),
+        }
+
+    def clear(self) -> None:
+        """Elimina todas las entradas"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM pages")
+            conn.execute("DELETE FROM files")
+            conn.execute("DELETE FROM paths")
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0}
+
+
+# Instancia global del caché
+_extraction_cache_instance: Optional[ExtractionCache] = None
+
+
+def get_extraction_cache() -> Optional[ExtractionCache]:
+    """Obtiene el caché de extracción singleton (None si está desactivado)"""
+    global _extraction_cache_instance
+    settings = get_settings()
+    if not settings.extraction_cache:
+        return None
+    if _extraction_cache_instance is None:
+        _extraction_cache_instance = ExtractionCache(settings.extraction_cache_path)
+    return _extraction_cache_instance
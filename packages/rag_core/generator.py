@@ -49,6 +49,20 @@ NOTAS:
 - NO agregues texto fuera del JSON"""
 
 
+def _also_in_pages(metadata: dict) -> list[int]:
+    """Páginas donde también aparece el texto de un chunk fusionado (ver dedup)"""
+    also_in = metadata.get("also_in") or ""
+    return [int(page) for page in also_in.split(",") if page.isdigit()]
+
+
+def _page_number(page) -> int | None:
+    """Página como entero (el LLM puede citarla como "12")"""
+    try:
+        return int(page)
+    except (TypeError, ValueError):
+        return None
+
+
 class MultiProviderGenerator:
     """
     Generador de respuestas con soporte multi-provider.
@@ -101,6 +115,9 @@ class MultiProviderGenerator:
         for i, chunk in enumerate(context_chunks, 1):
             source = chunk["metadata"].get("source", "Desconocido")
             page = chunk["metadata"].get("page", "?")
+            also_in = chunk["metadata"].get("also_in")
+            if also_in:
+                page = f"{page}; mismo texto en páginas {also_in.replace(',', ', ')}"
             context_parts.append(
                 f"[Documento {i}: {source}, Página {page}]\n{chunk['content']}"
             )
@@ -355,19 +372,34 @@ Responde SOLO con el JSON estructurado:"""
                 "quote": citation.get("quote", ""),
                 "source": citation.get("source", "Desconocido"),
                 "page": citation.get("page"),
+                "also_in": [],
                 "source_uri": None,
                 "relevance_score": 0.0,
             }
 
             source_name = citation.get("source", "").lower()
-            for chunk in context_chunks:
-                chunk_source = chunk["metadata"].get("source", "").lower()
-                if source_name in chunk_source or chunk_source in source_name:
-                    enriched_citation["source_uri"] = chunk["metadata"].get(
-                        "source_path"
+            candidates = [
+                chunk
+                for chunk in context_chunks
+                if source_name in chunk["metadata"].get("source", "").lower()
+                or chunk["metadata"].get("source", "").lower() in source_name
+            ]
+            # Entre los chunks del documento, el de la página citada (propia
+            # o una de sus copias fusionadas); si ninguno, el primero
+            page = _page_number(citation.get("page"))
+            for chunk in candidates:
+                pages = [_page_number(chunk["metadata"].get("page"))]
+                pages += _also_in_pages(chunk["metadata"])
+                if page is not None and page in pages:
+                    enriched_citation["also_in"] = sorted(
+                        p for p in pages if p is not None and p != page
                     )
-                    enriched_citation["relevance_score"] = chunk.get("score", 0)
                     break
+            else:
+                chunk = candidates[0] if candidates else None
+            if chunk is not None:
+                enriched_citation["source_uri"] = chunk["metadata"].get("source_path")
+                enriched_citation["relevance_score"] = chunk.get("score", 0)
 
             enriched.append(enriched_citation)
 
@@ -379,6 +411,7 @@ Responde SOLO con el JSON estructurado:"""
                         "quote": chunk["content"][:150] + "...",
                         "source": chunk["metadata"].get("source", "Desconocido"),
                         "page": chunk["metadata"].get("page"),
+                        "also_in": _also_in_pages(chunk["metadata"]),
                         "source_uri": chunk["metadata"].get("source_path"),
                         "relevance_score": chunk.get("score", 0),
                     }
@@ -0,0 +1,229 @@
+"""
+Ingesta en streaming - Etapas encadenadas con colas acotadas
+
+load (+ limpieza) → chunk → embed → add
+
+Cada etapa es un generador que corre en su propio thread y entrega sus
+resultados por una cola de tamaño fijo, así que las etapas se solapan en el
+tiempo y la memoria no crece con el tamaño del corpus.
+"""
+
+import queue
+import threading
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from .chunker import Chunk, TextChunker
+from .dedup import ChunkDeduplicator
+from .loaders import iter_document_files
+
+_DONE = object()
+
+
+@dataclass
+class _Failure:
+    """Excepción de una etapa, re-lanzada en el consumidor"""
+
+    error: BaseException
+
+
+def threaded(iterable: Iterable, maxsize: int, poll: float = 0.1) -> Iterator:
+    """
+    Consume `iterable` en un thread y entrega sus items por una cola acotada.
+
+    Si el productor falla, la excepción se re-lanza al consumir. Si el
+    consumidor se detiene antes de tiempo (error o close()), avisa al
+    productor con un Event: este deja de encolar (revisa el aviso cada
+    `poll` segundos mientras la cola está llena), cierra `iterable` y
+    termina; el consumidor espera al thread antes de salir.
+    """
+    items: queue.Queue = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        """Encola `item`; False si el consumidor ya no lo va a leer."""
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=poll)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    break
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            # Cierra el generador de la etapa (ejecuta sus finally)
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
+            put(_DONE)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+@dataclass
+class StreamStats:
+    """Estadísticas acumuladas por las etapas"""
+
+    loaded_files: list[Path] = field(default_factory=list)
+    sources: set[str] = field(default_factory=set)
+    pages: int = 0
+    chunks: int = 0
+    duplicates: int = 0
+    added: int = 0
+    chunk_ids_by_file: dict[Path, list[str]] = field(default_factory=dict)
+    timings: dict[str, float] = field(default_factory=dict)
+
+
+class IngestStream:
+    """
+    Pipeline de ingesta en streaming sobre un VectorStore.
+
+    Args:
+        vector_store: Destino de los chunks
+        chunker: Chunker a usar (ver create_chunker)
+        deduplicator: Fusiona casi duplicados de cada archivo (None = no)
+        batch_size: Chunks por batch de embeddings
+        flush_size: Chunks acumulados antes de escribir en el vector store
+        queue_size: Capacidad de cada cola entre etapas
+        skip_ids: IDs ya indexados que no hace falta volver a escribir
+        progress: Callback (chunks escritos, chunks generados hasta ahora)
+    """
+
+    def __init__(
+        self,
+        vector_store,
+        chunker: TextChunker,
+        deduplicator: ChunkDeduplicator | None = None,
+        batch_size: int = 256,
+        flush_size: int = 2048,
+        queue_size: int = 4,
+        skip_ids: set[str] | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        self.vector_store = vector_store
+        self.chunker = chunker
+        self.deduplicator = deduplicator
+        self.batch_size = batch_size
+        self.flush_size = flush_size
+        self.queue_size = queue_size
+        self.skip_ids = skip_ids or set()
+        self.progress = progress
+        self.stats = StreamStats()
+
+    def _load(self, files: list[Path], pdf_workers: int, pages_per_task: int):
+        """Etapa 1: extrae y limpia el texto de cada archivo."""
+        for path, docs, elapsed in iter_document_files(
+            files, pdf_workers, pages_per_task
+        ):
+            if isinstance(docs, Exception):
+                print(f"✗ Error cargando {path.name}: {docs}")
+                continue
+            unit = "páginas" if path.suffix.lower() == ".pdf" else "secciones"
+            print(f"✓ Cargado: {path.name} ({len(docs)} {unit}, {elapsed:.1f}s)")
+            self.stats.timings[path.name] = round(elapsed, 2)
+            yield path, docs
+
+    def _chunk(self, loaded: Iterable) -> Iterator[list[Chunk]]:
+        """Etapa 2: divide cada archivo en chunks y los agrupa en batches."""
+        batch: list[Chunk] = []
+        for path, docs in loaded:
+            chunks = self.chunker.split_documents(docs)
+            if self.deduplicator:
+                total = len(chunks)
+                chunks = self.deduplicator.deduplicate(chunks)
+                self.stats.duplicates += total - len(chunks)
+            self.stats.loaded_files.append(path)
+            self.stats.sources.update(d.metadata["source"] for d in docs)
+            self.stats.pages += len(docs)
+            self.stats.chunks += len(chunks)
+            self.stats.chunk_ids_by_file[path] = [c.chunk_id for c in chunks]
+
+            for chunk in chunks:
+                if chunk.chunk_id in self.skip_ids:
+                    continue
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+        if batch:
+            yield batch
+
+    def _embed(
+        self, batches: Iterable[list[Chunk]]
+    ) -> Iterator[tuple[list[Chunk], np.ndarray]]:
+        """Etapa 3: genera los embeddings de cada batch."""
+        for batch in batches:
+            embeddings = self.vector_store.embed_documents([c.content for c in batch])
+            yield batch, embeddings
+
+    def _add(self, embedded: Iterable[tuple[list[Chunk], np.ndarray]]) -> None:
+        """Etapa 4 (thread actual): escribe en el vector store por bloques."""
+        pending_chunks: list[Chunk] = []
+        pending_embeddings: list[np.ndarray] = []
+
+        def flush():
+            if not pending_chunks:
+                return
+            self.stats.added += self.vector_store.add_embedded(
+                pending_chunks, np.concatenate(pending_embeddings), save_index=False
+            )
+            pending_chunks.clear()
+            pending_embeddings.clear()
+            if self.progress:
+                self.progress(self.stats.added, self.stats.chunks)
+
+        try:
+            for batch, embeddings in embedded:
+                pending_chunks.extend(batch)
+                pending_embeddings.append(embeddings)
+                if len(pending_chunks) >= self.flush_size:
+                    flush()
+            flush()
+        finally:
+            # Lo escrito hasta un fallo también queda en los índices
+            self.vector_store.save_indexes()
+
+    def run(
+        self, files: list[Path], pdf_workers: int = 0, pages_per_task: int = 25
+    ) -> StreamStats:
+        """
+        Ejecuta las cuatro etapas y retorna las estadísticas.
+
+        Si una etapa falla, las demás se detienen (sus threads terminan)
+        antes de re-lanzar el error.
+        """
+        loaded = threaded(
+            self._load(files, pdf_workers, pages_per_task), self.queue_size
+        )
+        batches = threaded(self._chunk(loaded), self.queue_size)
+        embedded = threaded(self._embed(batches), self.queue_size)
+        try:
+            self._add(embedded)
+        finally:
+            # De la última etapa a la primera: al cerrar una, su productor
+            # ya terminó y nadie más itera la anterior
+            for stage in (embedded, batches, loaded):
+                stage.close()
+        return self.stats
@@ -0,0 +1,669 @@
+"""
+Keyword Index - Índice invertido persistente para búsqueda por palabras clave
+"""
+
+import json
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+from collections.abc import Iterator
+from pathlib import Path
+
+STOPWORDS = {
+    "de",
+    "del",
+    "la",
+    "el",
+    "los",
+    "las",
+    "un",
+    "una",
+    "unos",
+    "unas",
+    "y",
+    "o",
+    "u",
+    "que",
+    "como",
+    "para",
+    "por",
+    "sobre",
+    "en",
+    "al",
+    "se",
+    "es",
+}
+
+ROMAN_NUMERALS = {
+    "i",
+    "ii",
+    "iii",
+    "iv",
+    "v",
+    "vi",
+    "vii",
+    "viii",
+    "ix",
+    "x",
+    "xi",
+    "xii",
+    "xiii",
+    "xiv",
+    "xv",
+    "xvi",
+    "xvii",
+    "xviii",
+    "xix",
+    "xx",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto para comparaciones simples."""
+    normalized = unicodedata.normalize("NFD", text)
+    normalized = "".join(
+        char for char in normalized if unicodedata.category(char) != "Mn"
+    )
+    normalized = normalized.lower()
+    normalized = re.sub(r"[^a-z0-9]+", " ", normalized)
+    return re.sub(r"\s+", " ", normalized).strip()
+
+
+def tokenize(text: str) -> list[str]:
+    """Tokeniza texto normalizado en palabras relevantes."""
+    filtered = []
+    for token in re.findall(r"\b\w+\b", text):
+        if token in STOPWORDS:
+            continue
+        if len(token) >= 3 or token in ROMAN_NUMERALS:
+            filtered.append(token)
+    return filtered
+
+
+def extract_phrases(tokens: list[str]) -> list[str]:
+    """Construye bigramas y trigramas para boosting."""
+    phrases = []
+    for i in range(len(tokens) - 1):
+        phrases.append(f"{tokens[i]} {tokens[i + 1]}")
+    for i in range(len(tokens) - 2):
+        phrases.append(f"{tokens[i]} {tokens[i + 1]} {tokens[i + 2]}")
+    # Deduplicar manteniendo orden
+    return list(dict.fromkeys(phrases))
+
+
+def read_jsonl(path: Path) -> Iterator[dict]:
+    """Registros de un archivo JSONL (omite líneas truncadas)."""
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Línea truncada por una escritura interrumpida
+                continue
+
+
+def append_jsonl(path: Path, records: list[dict]) -> None:
+    """Añade registros JSON al final de un archivo JSONL."""
+    if not records:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a+b") as f:
+        # Cerrar una posible línea truncada para no corromper la siguiente
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    with open(path, "a", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+class NormalizedTextStore:
+    """
+    Sidecar JSONL con el texto normalizado de cada chunk.
+
+    Se escribe una vez en ingesta (append) para que reconstruir índices no
+    repita la normalización Unicode de todo el corpus. Los borrados también
+    se añaden (como tombstones), así que cuestan proporcional a lo borrado.
+    """
+
+    def __init__(self, persist_path: str | Path):
+        self.persist_path = Path(persist_path)
+
+    def load(self) -> dict[str, str]:
+        """Retorna chunk_id -> texto normalizado (la última escritura gana)."""
+        texts: dict[str, str] = {}
+        for record in read_jsonl(self.persist_path):
+            if record.get("deleted"):
+                texts.pop(record["id"], None)
+            else:
+                texts[record["id"]] = record["text"]
+        return texts
+
+    def append(self, items: list[tuple[str, str]]) -> None:
+        """Añade pares (chunk_id, texto normalizado)."""
+        append_jsonl(
+            self.persist_path,
+            [{"id": chunk_id, "text": text} for chunk_id, text in items],
+        )
+
+    def remove(self, chunk_ids: list[str]) -> None:
+        """Marca chunks como borrados (tombstones al final del sidecar)."""
+        append_jsonl(
+            self.persist_path,
+            [{"id": chunk_id, "deleted": True} for chunk_id in chunk_ids],
+        )
+
+    def compact(self) -> dict[str, str]:
+        """
+        Reescribe el sidecar solo con los registros vigentes.
+        Retorna chunk_id -> texto normalizado.
+        """
+        texts = self.load()
+        if not self.persist_path.exists():
+            return texts
+        tmp_path = self.persist_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for chunk_id, text in texts.items():
+                f.write(
+                    json.dumps({"id": chunk_id, "text": text}, ensure_ascii=False)
+                    + "\n"
+                )
+        os.replace(tmp_path, self.persist_path)
+        return texts
+
+    def clear(self) -> None:
+        """Elimina el sidecar."""
+        if self.persist_path.exists():
+            self.persist_path.unlink()
+
+
+class KeywordIndex:
+    """
+    Índice invertido posicional término -> posting list, persistido en JSON.
+
+    Cada chunk recibe un número interno compacto; las posting lists guardan
+    pares (doc_no, posiciones). Se indexan todas las palabras del texto
+    normalizado con su posición, de modo que frases y la query exacta se
+    resuelven intersectando posiciones consecutivas, sin leer el texto.
+
+    Un token de la query coincide con todos los términos indexados que
+    empiezan por él (equivalente a la búsqueda por substring anterior para
+    palabras completas y sufijos flexivos).
+
+    También mantiene las estadísticas de corpus para BM25 (longitud de cada
+    chunk y longitud total), actualizadas de forma incremental en cada add, y
+    la metadata filtrable de cada chunk (source, source_type, page) para que
+    los filtros restrinjan las posting lists recorridas.
+
+    Se persiste como un snapshot JSON más un log JSONL con los cambios
+    posteriores (chunks añadidos y tombstones): save() solo añade al log lo
+    pendiente y reescribe el snapshot cuando el log supera al índice, así
+    que borrar o reingestar un documento cuesta proporcional a sus chunks.
+    """
+
+    INDEX_VERSION = 4
+
+    def __init__(self, persist_path: str | Path):
+        self.persist_path = Path(persist_path)
+        self.log_path = self.persist_path.with_suffix(".log.jsonl")
+        self._docs: list[str | None] = []
+        self._doc_lookup: dict[str, int] = {}
+        self._doc_lengths: list[int] = []
+        self._doc_meta: list[list] = []
+        self._source_docs: dict[str, set[int]] = {}
+        self._total_length = 0
+        self._postings: dict[str, dict[int, list[int]]] = {}
+        self._vocabulary: list[str] | None = None
+        self._filter_cache: tuple[tuple, set[int]] | None = None
+        # Términos de cada documento, para borrar sin recorrer el vocabulario
+        self._doc_terms: list[list[str] | None] = []
+        # Cambios aún no escritos al log y registros que ya tiene el log
+        self._pending: list[dict] = []
+        self._log_records = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._doc_lookup)
+
+    def __contains__(self, chunk_id: str) -> bool:
+        return chunk_id in self._doc_lookup
+
+    def add(self, chunk_id: str, text: str, metadata: dict | None = None) -> None:
+        """Indexa (o reindexa) el texto de un chunk."""
+        self.add_normalized(chunk_id, normalize_text(text), metadata)
+
+    def add_normalized(
+        self, chunk_id: str, normalized_text: str, metadata: dict | None = None
+    ) -> None:
+        """Indexa un chunk cuyo texto ya pasó por normalize_text."""
+        metadata = metadata or {}
+        meta = [
+            metadata.get("source"),
+            metadata.get("source_type"),
+            metadata.get("page"),
+        ]
+        self._index(chunk_id, normalized_text, meta)
+        self._pending.append({"id": chunk_id, "text": normalized_text, "meta": meta})
+
+    def _index(self, chunk_id: str, normalized_text: str, meta: list) -> None:
+        """Añade un documento a las posting lists (sin registrarlo en el log)."""
+        if chunk_id in self._doc_lookup:
+            self._unindex([chunk_id])
+
+        words = normalized_text.split()
+        length = len(tokenize(" ".join(words)))
+        doc_no = len(self._docs)
+        self._docs.append(chunk_id)
+        self._doc_lookup[chunk_id] = doc_no
+        self._doc_lengths.append(length)
+        self._doc_meta.append(meta)
+        self._source_docs.setdefault(meta[0], set()).add(doc_no)
+        self._total_length += length
+        self._filter_cache = None
+
+        positions: dict[str, list[int]] = {}
+        for position, word in enumerate(words):
+            positions.setdefault(word, []).append(position)
+        for word, word_positions in positions.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                self._vocabulary = None
+            postings[doc_no] = word_positions
+        self._doc_terms.append(list(positions))
+
+    def remove(self, chunk_ids: list[str]) -> None:
+        """Elimina chunks del índice."""
+        for chunk_id in self._unindex(chunk_ids):
+            self._pending.append({"id": chunk_id, "deleted": True})
+
+    def _unindex(self, chunk_ids: list[str]) -> list[str]:
+        """
+        Quita documentos de las posting lists de sus propios términos.
+        Retorna los chunk IDs que estaban indexados.
+        """
+        removed = []
+        for chunk_id in chunk_ids:
+            doc_no = self._doc_lookup.pop(chunk_id, None)
+            if doc_no is None:
+                continue
+            removed.append(chunk_id)
+            self._docs[doc_no] = None
+            self._total_length -= self._doc_lengths[doc_no]
+            self._doc_lengths[doc_no] = 0
+            source_docs = self._source_docs.get(self._doc_meta[doc_no][0])
+            if source_docs is not None:
+                source_docs.discard(doc_no)
+                if not source_docs:
+                    del self._source_docs[self._doc_meta[doc_no][0]]
+            for term in self._doc_terms[doc_no]:
+                postings = self._postings[term]
+                del postings[doc_no]
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary = None
+            self._doc_terms[doc_no] = None
+        if removed:
+            self._filter_cache = None
+        return removed
+
+    def expand(self, token: str) -> list[str]:
+        """Términos indexados que empiezan por el token."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        terms = []
+        pos = bisect_left(self._vocabulary, token)
+        while pos < len(self._vocabulary) and self._vocabulary[pos].startswith(token):
+            terms.append(self._vocabulary[pos])
+            pos += 1
+        return terms
+
+    def _allowed_docs(self, filters: dict | None) -> set[int] | None:
+        """
+        Documentos que cumplen los filtros (None = sin filtros).
+
+        Filtros soportados: source, source_type, page_from, page_to.
+        """
+        filters = {k: v for k, v in (filters or {}).items() if v is not None}
+        if not filters:
+            return None
+
+        key = tuple(sorted(filters.items()))
+        if self._filter_cache is not None and self._filter_cache[0] == key:
+            return self._filter_cache[1]
+
+        if "source" in filters:
+            docs = self._source_docs.get(filters["source"], set())
+        else:
+            docs = self._doc_lookup.values()
+
+        source_type = filters.get("source_type")
+        page_from = filters.get("page_from")
+        page_to = filters.get("page_to")
+        allowed = set()
+        for doc_no in docs:
+            _, doc_type, page = self._doc_meta[doc_no]
+            if source_type is not None and doc_type != source_type:
+                continue
+            if page_from is not None and (page is None or page < page_from):
+                continue
+            if page_to is not None and (page is None or page > page_to):
+                continue
+            allowed.add(doc_no)
+
+        self._filter_cache = (key, allowed)
+        return allowed
+
+    @staticmethod
+    def _restrict(postings: dict, allowed: set[int] | None) -> dict:
+        """Limita una posting list a los documentos permitidos."""
+        if allowed is None:
+            return postings
+        if len(allowed) < len(postings):
+            return {d: postings[d] for d in allowed if d in postings}
+        return {d: p for d, p in postings.items() if d in allowed}
+
+    def match(
+        self, tokens: list[str], filters: dict | None = None
+    ) -> dict[str, dict[str, int]]:
+        """
+        Busca los chunks que contienen al menos un token de la query.
+
+        Returns:
+            dict chunk_id -> {token: ocurrencias}
+        """
+        allowed = self._allowed_docs(filters)
+        matches: dict[int, dict[str, int]] = {}
+        for token in dict.fromkeys(tokens):
+            for term in self.expand(token):
+                postings = self._restrict(self._postings[term], allowed)
+                for doc_no, positions in postings.items():
+                    hits = matches.setdefault(doc_no, {})
+                    hits[token] = hits.get(token, 0) + len(positions)
+        return {self._docs[doc_no]: hits for doc_no, hits in matches.items()}
+
+    def _terms(self, word: str, prefix: bool) -> list[str]:
+        """Términos indexados de una palabra (o sus expansiones por prefijo)."""
+        if prefix:
+            return self.expand(word)
+        return [word] if word in self._postings else []
+
+    def _find_sequence(
+        self, words: list[str], prefix_all: bool, allowed: set[int] | None
+    ) -> set[int]:
+        """
+        Documentos donde las palabras aparecen en posiciones consecutivas.
+
+        Con prefix_all=False solo la última palabra se compara por prefijo
+        (equivale a buscar la cadena completa como substring).
+
+        Parte de la palabra con la posting list más corta (en texto legal la
+        primera suele ser "de", "la", "el") y verifica las demás solo en
+        esos documentos, por acceso directo a su posting list.
+        """
+        if not words:
+            return set()
+        last = len(words) - 1
+        terms = [
+            self._terms(word, prefix_all or offset == last)
+            for offset, word in enumerate(words)
+        ]
+        sizes = [
+            sum(len(self._postings[t]) for t in word_terms) for word_terms in terms
+        ]
+        order = sorted(range(len(words)), key=sizes.__getitem__)
+
+        # Inicios candidatos de la secuencia según la palabra más rara
+        anchor = order[0]
+        starts: dict[int, set[int]] = {}
+        for term in terms[anchor]:
+            postings = self._restrict(self._postings[term], allowed)
+            for doc_no, positions in postings.items():
+                starts.setdefault(doc_no, set()).update(p - anchor for p in positions)
+
+        for offset in order[1:]:
+            if not starts:
+                break
+            positions = self._positions_in(terms[offset], sizes[offset], starts)
+            remaining = {}
+            for doc_no, doc_starts in starts.items():
+                doc_positions = positions.get(doc_no)
+                if not doc_positions:
+                    continue
+                matched = {p for p in doc_starts if p + offset in doc_positions}
+                if matched:
+                    remaining[doc_no] = matched
+            starts = remaining
+        return set(starts)
+
+    def _positions_in(
+        self, terms: list[str], size: int, docs: dict[int, set[int]]
+    ) -> dict[int, set[int]]:
+        """
+        Posiciones de los términos, solo en `docs`.
+
+        Consulta cada documento en las posting lists, salvo que recorrerlas
+        enteras sea más barato (muchas expansiones de un prefijo corto).
+        """
+        positions: dict[int, set[int]] = {}
+        if size < len(docs) * len(terms):
+            for term in terms:
+                for doc_no, term_positions in self._postings[term].items():
+                    if doc_no in docs:
+                        positions.setdefault(doc_no, set()).update(term_positions)
+            return positions
+        for doc_no in docs:
+            for term in terms:
+                term_positions = self._postings[term].get(doc_no)
+                if term_positions:
+                    positions.setdefault(doc_no, set()).update(term_positions)
+        return positions
+
+    def phrase_matches(
+        self, phrases: list[str], filters: dict | None = None
+    ) -> dict[str, int]:
+        """Cuenta, por chunk, cuántas frases (bigramas/trigramas) contiene."""
+        allowed = self._allowed_docs(filters)
+        counts: dict[int, int] = {}
+        for phrase in phrases:
+            for doc_no in self._find_sequence(phrase.split(), True, allowed):
+                counts[doc_no] = counts.get(doc_no, 0) + 1
+        return {self._docs[doc_no]: count for doc_no, count in counts.items()}
+
+    def exact_matches(
+        self, normalized_query: str, filters: dict | None = None
+    ) -> set[str]:
+        """Chunks que contienen la query normalizada completa."""
+        allowed = self._allowed_docs(filters)
+        doc_nos = self._find_sequence(normalized_query.split(), False, allowed)
+        return {self._docs[doc_no] for doc_no in doc_nos}
+
+    def bm25(
+        self,
+        tokens: list[str],
+        k1: float = 1.2,
+        b: float = 0.75,
+        filters: dict | None = None,
+    ) -> dict[str, float]:
+        """
+        Calcula el score BM25 de los chunks que contienen algún token.
+
+        Usa las frecuencias de documento y longitudes precalculadas, por lo
+        que no recorre el texto de ningún chunk.
+        """
+        total_docs = len(self._doc_lookup)
+        if not total_docs:
+            return {}
+        avg_length = self._total_length / total_docs or 1.0
+        allowed = self._allowed_docs(filters)
+
+        scores: dict[int, float] = {}
+        for token in dict.fromkeys(tokens):
+            for term in self.expand(token):
+                postings = self._postings[term]
+                df = len(postings)
+                idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+                for doc_no, positions in self._restrict(postings, allowed).items():
+                    freq = len(positions)
+                    norm = k1 * (1 - b + b * self._doc_lengths[doc_no] / avg_length)
+                    scores[doc_no] = scores.get(doc_no, 0.0) + idf * (
+                        freq * (k1 + 1) / (freq + norm)
+                    )
+        return {self._docs[doc_no]: score for doc_no, score in scores.items()}
+
+    def clear(self) -> None:
+        """Vacía el índice y elimina los archivos persistidos."""
+        self._reset()
+        for path in (self.persist_path, self.log_path):
+            if path.exists():
+                path.unlink()
+
+    def _reset(self) -> None:
+        """Deja el índice vacío en memoria."""
+        self._docs = []
+        self._doc_lookup = {}
+        self._doc_lengths = []
+        self._doc_meta = []
+        self._source_docs = {}
+        self._total_length = 0
+        self._postings = {}
+        self._doc_terms = []
+        self._vocabulary = None
+        self._filter_cache = None
+        self._pending = []
+        self._log_records = 0
+
+    def load(self) -> None:
+        """Carga el snapshot y aplica el log de cambios, si son compatibles."""
+        if self.persist_path.exists():
+            try:
+                with open(self.persist_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") != self.INDEX_VERSION:
+                    print("⚠️ Índice de keywords con versión distinta, se reconstruirá")
+                    return
+                self._load_snapshot(data)
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                print(f"⚠️ Error cargando índice de keywords: {e}")
+                self._reset()
+                return
+
+        for record in read_jsonl(self.log_path):
+            try:
+                if record.get("deleted"):
+                    self._unindex([record["id"]])
+                else:
+                    self._index(record["id"], record["text"], record["meta"])
+            except (KeyError, TypeError, IndexError) as e:
+                print(f"⚠️ Registro inválido en el log de keywords: {e}")
+                continue
+            self._log_records += 1
+
+    def _load_snapshot(self, data: dict) -> None:
+        """Carga el estado guardado por _write_snapshot()."""
+        self._docs = data["docs"]
+        self._doc_lengths = data["doc_lengths"]
+        self._doc_meta = data["doc_meta"]
+        self._total_length = sum(self._doc_lengths)
+        self._doc_lookup = {
+            chunk_id: doc_no
+            for doc_no, chunk_id in enumerate(self._docs)
+            if chunk_id is not None
+        }
+        self._rebuild_source_docs()
+        self._postings = {
+            term: {doc_no: positions for doc_no, positions in postings}
+            for term, postings in data["postings"].items()
+        }
+        self._rebuild_doc_terms()
+
+    def _rebuild_source_docs(self) -> None:
+        """Recalcula el mapa source -> documentos vivos."""
+        self._source_docs = {}
+        for doc_no in self._doc_lookup.values():
+            source = self._doc_meta[doc_no][0]
+            self._source_docs.setdefault(source, set()).add(doc_no)
+        self._filter_cache = None
+
+    def _rebuild_doc_terms(self) -> None:
+        """Recalcula los términos de cada documento desde las posting lists."""
+        self._doc_terms = [
+            [] if chunk_id is not None else None for chunk_id in self._docs
+        ]
+        for term, postings in self._postings.items():
+            for doc_no in postings:
+                self._doc_terms[doc_no].append(term)
+
+    def _compact(self) -> None:
+        """Renumera los documentos eliminando huecos de chunks borrados."""
+        remap = {}
+        docs = []
+        lengths = []
+        meta = []
+        terms = []
+        for doc_no, chunk_id in enumerate(self._docs):
+            if chunk_id is not None:
+                remap[doc_no] = len(docs)
+                docs.append(chunk_id)
+                lengths.append(self._doc_lengths[doc_no])
+                meta.append(self._doc_meta[doc_no])
+                terms.append(self._doc_terms[doc_no])
+        self._docs = docs
+        self._doc_lengths = lengths
+        self._doc_meta = meta
+        self._doc_terms = terms
+        self._doc_lookup = {chunk_id: doc_no for doc_no, chunk_id in enumerate(docs)}
+        self._postings = {
+            term: {remap[doc_no]: positions for doc_no, positions in postings.items()}
+            for term, postings in self._postings.items()
+        }
+        self._rebuild_source_docs()
+
+    def save(self) -> None:
+        """
+        Persiste los cambios pendientes.
+
+        Los añade al log; si aún no hay snapshot o el log ya tiene más
+        registros que chunks vivos el índice, reescribe el snapshot.
+        """
+        if not self._pending and self.persist_path.exists():
+            return
+        if not self.persist_path.exists() or self._log_records + len(
+            self._pending
+        ) > len(self._doc_lookup):
+            self.compact()
+            return
+        append_jsonl(self.log_path, self._pending)
+        self._log_records += len(self._pending)
+        self._pending = []
+
+    def compact(self) -> None:
+        """Reescribe el snapshot completo (atómico) y vacía el log."""
+        if len(self._docs) > 2 * len(self._doc_lookup):
+            self._compact()
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": self.INDEX_VERSION,
+            "docs": self._docs,
+            "doc_lengths": self._doc_lengths,
+            "doc_meta": self._doc_meta,
+            "postings": {
+                term: [[doc_no, positions] for doc_no, positions in postings.items()]
+                for term, postings in self._postings.items()
+            },
+        }
+        tmp_path = self.persist_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.persist_path)
+        # Reaplicar un log ya incluido en el snapshot deja el mismo estado,
+        # así que una caída entre ambos pasos no corrompe el índice
+        if self.log_path.exists():
+            self.log_path.unlink()
+        self._pending = []
+        self._log_records = 0
@@ -3,8 +3,13 @@ Document Loaders - Carga y extracción de texto de PDFs y HTML
 """
 
 import hashlib
+import multiprocessing
 import re
-from dataclasses import dataclass
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from urllib.parse import urlparse
 
@@ -12,6 +17,8 @@ import pdfplumber
 import requests
 from bs4 import BeautifulSoup
 
+from .extraction_cache import get_extraction_cache
+
 
 @dataclass
 class Document:
@@ -27,6 +34,29 @@ class Document:
         ).hexdigest()[:16]
 
 
+def _clean_pdf_text(text: str) -> str:
+    """Limpieza básica del texto extraído de un PDF"""
+    # Normalizar espacios múltiples
+    text = re.sub(r"\s+", " ", text)
+    # Eliminar caracteres de control
+    text = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", text)
+    return text.strip()
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> list[tuple[int, str]]:
+    """
+    Extrae y limpia las páginas [start, end) de un PDF (índices base 0).
+
+    Se ejecuta en los workers del pool; retorna (número de página, texto).
+    """
+    pages = []
+    with pdfplumber.open(file_path) as pdf:
+        for index in range(start, min(end, len(pdf.pages))):
+            text = pdf.pages[index].extract_text() or ""
+            pages.append((index + 1, _clean_pdf_text(text)))
+    return pages
+
+
 class PDFLoader:
     """Carga documentos PDF y extrae texto por página"""
 
@@ -40,40 +70,72 @@ class PDFLoader:
     def load(self) -> list[Document]:
         """
         Carga el PDF y retorna una lista de Documents (uno por página)
+
+        Si el archivo no cambió desde la última extracción, el texto se lee
+        del caché de extracción sin abrir el PDF.
         """
-        documents = []
+        cached = self.cached_pages()
+        if cached is not None:
+            total_pages, pages = cached
+            return self.build_documents(pages, total_pages)
 
         with pdfplumber.open(self.file_path) as pdf:
             total_pages = len(pdf.pages)
 
-            for page_num, page in enumerate(pdf.pages, start=1):
-                text = page.extract_text() or ""
-
-                # Limpiar texto básico
-                text = self._clean_text(text)
-
-                if text.strip():  # Solo agregar si hay contenido
-                    doc = Document(
-                        content=text,
-                        metadata={
-                            "source": self.file_path.name,
-                            "source_path": str(self.file_path),
-                            "source_type": "pdf",
-                            "page": page_num,
-                            "total_pages": total_pages,
-                        },
-                    )
-                    documents.append(doc)
+        pages = _extract_page_range(str(self.file_path), 0, total_pages)
+        self.cache_pages(pages, total_pages)
+        return self.build_documents(pages, total_pages)
+
+    def cached_pages(self) -> tuple[int, list[tuple[int, str]]] | None:
+        """(total de páginas, páginas) desde el caché de extracción, o None"""
+        cache = get_extraction_cache()
+        if cache is None:
+            return None
+        cached = cache.get(cache.fingerprint(self.file_path))
+        if cached is None:
+            return None
+        total_pages, rows = cached
+        return total_pages, [(page, text) for page, text, _ in rows]
+
+    def cache_pages(self, pages: list[tuple[int, str]], total_pages: int) -> None:
+        """Guarda las páginas extraídas en el caché de extracción"""
+        cache = get_extraction_cache()
+        if cache is not None:
+            cache.put(
+                cache.fingerprint(self.file_path),
+                "pdf",
+                total_pages,
+                [(page, text, None) for page, text in pages],
+            )
+
+    def page_count(self) -> int:
+        """Número de páginas del PDF"""
+        with pdfplumber.open(self.file_path) as pdf:
+            return len(pdf.pages)
 
+    def build_documents(
+        self, pages: list[tuple[int, str]], total_pages: int
+    ) -> list[Document]:
+        """Crea un Document por página con contenido, en orden de página"""
+        documents = []
+        for page_num, text in sorted(pages):
+            if text.strip():  # Solo agregar si hay contenido
+                doc = Document(
+                    content=text,
+                    metadata={
+                        "source": self.file_path.name,
+                        "source_path": str(self.file_path),
+                        "source_type": "pdf",
+                        "page": page_num,
+                        "total_pages": total_pages,
+                    },
+                )
+                documents.append(doc)
         return documents
 
     def _clean_text(self, text: str) -> str:
         """Limpieza básica del texto extraído"""
-        # Normalizar espacios múltiples
-        text = re.sub(r"\s+", " ", text)
-        # Eliminar caracteres de control
-        text = re.sub(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]", "", text)
-        return text.strip()
+        return _clean_pdf_text(text)
 
 
 class HTMLLoader:
@@ -135,6 +197,53 @@ class HTMLLoader:
         Carga el HTML y retorna una lista de Documents.
         Para HTML, retorna un solo documento con todo el contenido.
         """
+        # Archivos locales sin cambios: leer del caché de extracción
+        cache = None
+        if not self.is_url and Path(self.source).exists():
+            cache = get_extraction_cache()
+        digest = cache.fingerprint(self.source) if cache else None
+        if cache:
+            cached = cache.get(digest)
+            if cached is not None:
+                return self._documents_from_cache(cached[1])
+
+        documents = self._load_uncached()
+        if cache:
+            cache.put(
+                digest,
+                "html",
+                len(documents),
+                [
+                    (
+                        index,
+                        doc.content,
+                        {
+                            k: v
+                            for k, v in doc.metadata.items()
+                            if k not in ("source", "source_path", "content_hash")
+                        },
+                    )
+                    for index, doc in enumerate(documents)
+                ],
+            )
+        return documents
+
+    def _documents_from_cache(self, rows: list) -> list[Document]:
+        """Reconstruye los Documents guardados en el caché de extracción"""
+        return [
+            Document(
+                content=text,
+                metadata={
+                    "source": self._get_source_name(),
+                    "source_path": self.source,
+                    **(meta or {}),
+                },
+            )
+            for _, text, meta in rows
+        ]
+
+    def _load_uncached(self) -> list[Document]:
+        """Descarga o lee el HTML y lo divide en Documents"""
         # Obtener contenido HTML
         if self.is_url:
             html_content = self._fetch_url()
@@ -296,37 +405,211 @@ class HTMLLoader:
             return Path(self.source).name
 
 
-def load_documents_from_directory(directory: str | Path) -> list[Document]:
+PDF_PATTERNS = ("*.pdf", "*.PDF")
+HTML_PATTERNS = ("*.html", "*.htm")
+
+
+def list_document_files(directory: str | Path) -> list[Path]:
     """
-    Carga todos los PDFs y HTMLs de un directorio
+    Lista los PDFs y HTMLs de un directorio (PDFs primero)
     """
     directory = Path(directory)
     if not directory.exists():
         raise FileNotFoundError(f"Directorio no encontrado: {directory}")
 
-    documents = []
+    files = []
+    for patterns in (PDF_PATTERNS, HTML_PATTERNS):
+        for pattern in patterns:
+            files.extend(directory.glob(pattern))
+    return files
 
-    # Cargar PDFs (minúsculas y mayúsculas)
-    pdf_files = list(directory.glob("*.pdf")) + list(directory.glob("*.PDF"))
-    for pdf_path in pdf_files:
-        try:
-            loader = PDFLoader(pdf_path)
-            docs = loader.load()
-            documents.extend(docs)
-            print(f"✓ Cargado: {pdf_path.name} ({len(docs)} páginas)")
-        except Exception as e:
-            print(f"✗ Error cargando {pdf_path.name}: {e}")
 
-    # Cargar HTMLs
-    html_files = list(directory.glob("*.html")) + list(directory.glob("*.htm"))
-    for html_path in html_files:
+def load_document_file(path: str | Path) -> list[Document]:
+    """
+    Carga un archivo PDF o HTML según su extensión
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".pdf":
+        return PDFLoader(path).load()
+    return HTMLLoader(str(path)).load()
+
+
+def _timed_extract(file_path: str, start: int, end: int):
+    """Como _extract_page_range, pero retorna también los segundos usados."""
+    started = time.perf_counter()
+    pages = _extract_page_range(file_path, start, end)
+    return pages, time.perf_counter() - started
+
+
+@dataclass
+class _PDFTasks:
+    """Estado de un PDF en iter_pdfs_parallel"""
+
+    path: Path
+    loader: PDFLoader | None = None
+    total: int = 0
+    starts: list[int] = field(default_factory=list)  # rangos sin enviar
+    tasks: deque = field(default_factory=deque)  # rangos enviados
+    cached: tuple | None = None
+    error: Exception | None = None
+
+
+def _prepare_pdf(path: Path, pages_per_task: int) -> _PDFTasks:
+    """Consulta el caché de extracción y divide el PDF en rangos de páginas."""
+    entry = _PDFTasks(path)
+    try:
+        entry.loader = PDFLoader(path)
+        started = time.perf_counter()
+        hit = entry.loader.cached_pages()
+        if hit is not None:
+            entry.cached = hit, time.perf_counter() - started
+            return entry
+        entry.total = entry.loader.page_count()
+    except Exception as e:
+        entry.error = e
+        return entry
+    entry.starts = list(range(0, entry.total, pages_per_task))
+    return entry
+
+
+def iter_pdfs_parallel(
+    paths: list[Path],
+    workers: int,
+    pages_per_task: int = 25,
+    max_in_flight: int | None = None,
+) -> Iterator[tuple[Path, list[Document] | Exception, float]]:
+    """
+    Extrae varios PDFs en paralelo, dividiendo los grandes en rangos de páginas.
+
+    Produce (path, documentos o excepción, segundos de extracción) por
+    archivo, en el orden de `paths`; las páginas se reensamblan en orden.
+    Los PDFs presentes en el caché de extracción no se envían al pool.
+
+    Los rangos se envían en orden y a lo sumo `max_in_flight` (por defecto
+    2 × workers) esperan en el pool o sin consumir: si el llamador consume
+    despacio, la extracción se detiene en vez de acumular el corpus en
+    memoria.
+    """
+    max_in_flight = max_in_flight or 2 * workers
+    remaining = iter(paths)
+    # Archivos preparados, en orden de `paths`; solo el último puede tener
+    # rangos sin enviar
+    queue: deque[_PDFTasks] = deque()
+    in_flight = 0
+
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+
+        def fill() -> None:
+            """Envía rangos (y prepara archivos) hasta llenar el tope."""
+            nonlocal in_flight
+            while in_flight < max_in_flight:
+                if not queue or not queue[-1].starts:
+                    path = next(remaining, None)
+                    if path is None or len(queue) >= max_in_flight:
+                        return
+                    queue.append(_prepare_pdf(path, pages_per_task))
+                    continue
+                entry = queue[-1]
+                start = entry.starts.pop(0)
+                entry.tasks.append(
+                    executor.submit(
+                        _timed_extract, str(entry.path), start, start + pages_per_task
+                    )
+                )
+                in_flight += 1
+
+        fill()
+        while queue:
+            entry = queue[0]
+            if entry.cached is not None:
+                queue.popleft()
+                fill()
+                (total_pages, pages), elapsed = entry.cached
+                yield (
+                    entry.path,
+                    entry.loader.build_documents(pages, total_pages),
+                    elapsed,
+                )
+                continue
+            if entry.error is not None:
+                queue.popleft()
+                fill()
+                yield entry.path, entry.error, 0.0
+                continue
+
+            results = []
+            try:
+                while entry.tasks or entry.starts:
+                    if not entry.tasks:
+                        fill()
+                    task = entry.tasks.popleft()
+                    in_flight -= 1
+                    results.append(task.result())
+                    fill()
+            except Exception as e:
+                for task in entry.tasks:
+                    task.cancel()
+                in_flight -= len(entry.tasks)
+                entry.tasks.clear()
+                entry.starts = []
+                queue.popleft()
+                fill()
+                yield entry.path, e, 0.0
+                continue
+
+            queue.popleft()
+            fill()
+            pages = [page for chunk, _ in results for page in chunk]
+            elapsed = sum(seconds for _, seconds in results)
+            entry.loader.cache_pages(pages, entry.total)
+            yield entry.path, entry.loader.build_documents(pages, entry.total), elapsed
+
+
+def iter_document_files(
+    paths: list[Path], workers: int = 0, pages_per_task: int = 25
+) -> Iterator[tuple[Path, list[Document] | Exception, float]]:
+    """
+    Carga archivos PDF/HTML y produce (path, documentos o excepción, segundos).
+
+    Con `workers` > 1 los PDFs se extraen en un pool de procesos (primero);
+    el resto se carga en el proceso actual.
+    """
+    pdfs = [p for p in paths if p.suffix.lower() == ".pdf"] if workers > 1 else []
+    if pdfs:
+        yield from iter_pdfs_parallel(pdfs, workers, pages_per_task)
+
+    for path in paths:
+        if path in pdfs:
+            continue
+        started = time.perf_counter()
         try:
-            loader = HTMLLoader(str(html_path))
-            docs = loader.load()
-            documents.extend(docs)
-            print(f"✓ Cargado: {html_path.name} ({len(docs)} secciones)")
+            docs = load_document_file(path)
         except Exception as e:
-            print(f"✗ Error cargando {html_path.name}: {e}")
+            yield path, e, 0.0
+            continue
+        yield path, docs, time.perf_counter() - started
+
+
+def load_documents_from_directory(
+    directory: str | Path, workers: int = 0, pages_per_task: int = 25
+) -> list[Document]:
+    """
+    Carga todos los PDFs y HTMLs de un directorio.
+
+    Con `workers` > 1 los PDFs se extraen en un pool de procesos.
+    """
+    documents = []
+    files = list_document_files(directory)
+
+    for path, docs, elapsed in iter_document_files(files, workers, pages_per_task):
+        if isinstance(docs, Exception):
+            print(f"✗ Error cargando {path.name}: {docs}")
+            continue
+        unit = "páginas" if path.suffix.lower() == ".pdf" else "secciones"
+        documents.extend(docs)
+        print(f"✓ Cargado: {path.name} ({len(docs)} {unit}, {elapsed:.1f}s)")
 
     return documents
 
@@ -0,0 +1,137 @@
+"""
+Manifest de ingesta - Estado por archivo para ingestas incrementales
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+
+def file_sha256(path: str | Path, block_size: int = 1 << 20) -> str:
+    """Hash sha256 del contenido de un archivo (leído por bloques)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileEntry:
+    """Estado de un archivo ingestado"""
+
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """Resultado de comparar un directorio contra el manifest"""
+
+    added: list[Path] = field(default_factory=list)
+    changed: list[Path] = field(default_factory=list)
+    unchanged: list[Path] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+
+class IngestManifest:
+    """
+    Manifest JSON de archivos ingestados: path -> (size, mtime, sha256, chunks).
+
+    Un archivo con el mismo size y mtime se considera sin cambios sin leerlo;
+    si difieren, se compara el hash del contenido.
+    """
+
+    VERSION = 1
+
+    def __init__(self, persist_path: str | Path):
+        self.persist_path = Path(persist_path)
+        self.files: dict[str, FileEntry] = {}
+        self.load()
+
+    @staticmethod
+    def key(path: str | Path) -> str:
+        return str(Path(path).resolve())
+
+    def load(self) -> None:
+        """Carga el manifest desde disco"""
+        if not self.persist_path.exists():
+            return
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = {
+                path: FileEntry(**entry) for path, entry in data["files"].items()
+            }
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            print(f"⚠️ Error cargando manifest de ingesta: {e}")
+            self.files = {}
+
+    def save(self) -> None:
+        """Guarda el manifest de forma atómica"""
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": self.VERSION,
+                    "files": {
+                        path: asdict(entry) for path, entry in self.files.items()
+                    },
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, self.persist_path)
+
+    def diff(self, paths: list[Path]) -> ManifestDiff:
+        """Clasifica los archivos en nuevos, modificados, sin cambios y borrados."""
+        result = ManifestDiff()
+        seen = set()
+        for path in paths:
+            key = self.key(path)
+            seen.add(key)
+            entry = self.files.get(key)
+            if entry is None:
+                result.added.append(path)
+                continue
+
+            stat = path.stat()
+            if stat.st_size == entry.size and stat.st_mtime == entry.mtime:
+                result.unchanged.append(path)
+            elif file_sha256(path) == entry.sha256:
+                # Solo cambió el mtime (p.ej. copia o touch)
+                entry.mtime = stat.st_mtime
+                result.unchanged.append(path)
+            else:
+                result.changed.append(path)
+
+        result.removed = [key for key in self.files if key not in seen]
+        return result
+
+    def record(self, path: Path, chunk_ids: list[str]) -> None:
+        """Registra el estado actual de un archivo ingestado."""
+        stat = path.stat()
+        self.files[self.key(path)] = FileEntry(
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=file_sha256(path),
+            chunk_ids=chunk_ids,
+        )
+
+    def chunk_ids(self, path: str | Path) -> list[str]:
+        entry = self.files.get(self.key(path))
+        return entry.chunk_ids if entry else []
+
+    def forget(self, key: str) -> None:
+        self.files.pop(key, None)
+
+    def clear(self) -> None:
+        """Elimina el manifest"""
+        self.files = {}
+        if self.persist_path.exists():
+            self.persist_path.unlink()
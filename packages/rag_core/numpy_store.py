@@ -0,0 +1,651 @@
+"""
+NumPy Store - Búsqueda vectorial exacta sobre una matriz memory-mapped
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Filas por bloque al escanear códigos cuantizados
+_SCAN_BLOCK = 8192
+
+# Número de bits en 1 para cada byte (popcount por tabla)
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def quantize_int8(vectors: np.ndarray) -> np.ndarray:
+    """
+    Cuantización escalar a int8 de vectores normalizados.
+
+    Como cada componente está en [-1, 1], basta una escala fija de 127.
+    """
+    return np.clip(np.rint(vectors * 127.0), -127, 127).astype(np.int8)
+
+
+def quantize_binary(vectors: np.ndarray) -> np.ndarray:
+    """Códigos de 1 bit por dimensión (signo), empaquetados en bytes."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+def hamming_distances(query_code: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Distancia de Hamming entre un código binario y una matriz de códigos."""
+    return _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """
+    Evalúa una cláusula `where` estilo ChromaDB sobre la metadata de un chunk.
+
+    Soporta $and, $or y los operadores $eq, $ne, $gt, $gte, $lt, $lte,
+    $in y $nin (o un valor literal como igualdad).
+    """
+    if not where:
+        return True
+
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, sub) for sub in condition):
+                return False
+            continue
+
+        value = metadata.get(key)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, expected in condition.items():
+            if op == "$eq" and value != expected:
+                return False
+            if op == "$ne" and value == expected:
+                return False
+            if op == "$in" and value not in expected:
+                return False
+            if op == "$nin" and value in expected:
+                return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > expected:
+                    return False
+                if op == "$gte" and not value >= expected:
+                    return False
+                if op == "$lt" and not value < expected:
+                    return False
+                if op == "$lte" and not value <= expected:
+                    return False
+    return True
+
+
+class NumpyCollection:
+    """
+    Colección vectorial en proceso con búsqueda exacta por coseno.
+
+    - Embeddings normalizados en un archivo float32 crudo, abierto con
+      memory-map; las escrituras solo añaden filas al final
+    - ids, documentos y metadata en un log JSONL append-only al lado (una
+      línea por fila; los borrados se añaden como tombstones)
+    - Búsqueda: un producto matriz-vector + argpartition
+
+    Reemplazar o borrar un chunk no reescribe nada: su fila queda muerta
+    hasta que `compact()` reescribe matriz y log solo con las filas vivas.
+
+    Expone el subconjunto de la API de `chromadb.Collection` que usa
+    VectorStore (add, query, get, count, delete), con el mismo formato de
+    respuesta, para poder intercambiarse con Chroma.
+
+    Con `quantization` en "int8" o "binary" la primera etapa escanea códigos
+    cuantizados en RAM (4x / 32x menos memoria que float32) para elegir
+    `rescore_pool` candidatos, y solo esos se re-puntúan con los embeddings
+    float del memory-map.
+    """
+
+    def __init__(
+        self,
+        persist_dir: str | Path,
+        quantization: str = "none",
+        rescore_pool: int = 100,
+    ):
+        if quantization not in QUANTIZATION_MODES:
+            raise ValueError(
+                f"Cuantización desconocida: {quantization}. "
+                f"Opciones: {', '.join(QUANTIZATION_MODES)}"
+            )
+        self.persist_dir = Path(persist_dir)
+        self.persist_dir.mkdir(parents=True, exist_ok=True)
+        self.matrix_path = self.persist_dir / "embeddings.f32"
+        self.records_path = self.persist_dir / "records.jsonl"
+        self.quantization = quantization
+        self.rescore_pool = rescore_pool
+        self.codes_path = self.persist_dir / f"codes_{quantization}.bin"
+        # Bloques de códigos añadidos; se concatenan recién al buscar
+        self._code_blocks: list[np.ndarray] = []
+
+        # Listas por fila física; las filas muertas quedan en None
+        self._ids: list[str | None] = []
+        self._documents: list[str | None] = []
+        self._metadatas: list[dict | None] = []
+        self._id_lookup: dict[str, int] = {}
+        self._live: np.ndarray | None = None
+        self._dead_mask: np.ndarray | None = None
+        self._dim: int | None = None
+        self._matrix: np.ndarray | None = None
+        self._migrate_legacy()
+        self._load()
+
+    def _migrate_legacy(self) -> None:
+        """Convierte el formato anterior (embeddings.npy + records.json)."""
+        legacy_matrix = self.persist_dir / "embeddings.npy"
+        legacy_records = self.persist_dir / "records.json"
+        if self.records_path.exists() or not legacy_records.exists():
+            return
+        if legacy_matrix.exists():
+            with open(legacy_records, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            matrix = np.load(legacy_matrix, mmap_mode="r")
+            for start in range(0, len(matrix), 4096):
+                end = start + 4096
+                self.add(
+                    ids=records["ids"][start:end],
+                    embeddings=np.asarray(matrix[start:end]),
+                    documents=records["documents"][start:end],
+                    metadatas=records["metadatas"][start:end],
+                )
+            del matrix
+            print(f"✓ Colección NumPy migrada a formato append-only ({self.count()})")
+        for path in self.persist_dir.glob("codes_*.npy"):
+            path.unlink()
+        for path in (legacy_matrix, legacy_records):
+            if path.exists():
+                path.unlink()
+        self._reset()
+
+    def _load(self) -> None:
+        """Reproduce el log de registros y abre la matriz en modo memory-map."""
+        if not self.records_path.exists() or not self.matrix_path.exists():
+            return
+        entries = []
+        with open(self.records_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # Línea truncada por una escritura interrumpida
+                    continue
+        if not entries or "dim" not in entries[0]:
+            return
+        self._dim = entries[0]["dim"]
+
+        # Descartar una fila escrita a medias al final de la matriz
+        row_bytes = self._dim * 4
+        rows = self.matrix_path.stat().st_size // row_bytes
+        if self.matrix_path.stat().st_size != rows * row_bytes:
+            os.truncate(self.matrix_path, rows * row_bytes)
+
+        self._ids = [None] * rows
+        self._documents = [None] * rows
+        self._metadatas = [None] * rows
+        for entry in entries[1:]:
+            chunk_id = entry.get("id")
+            previous = self._id_lookup.pop(chunk_id, None)
+            if previous is not None:
+                self._kill_row(previous)
+            if entry.get("deleted") or entry.get("row", rows) >= rows:
+                continue
+            row = entry["row"]
+            self._id_lookup[chunk_id] = row
+            self._ids[row] = chunk_id
+            self._documents[row] = entry["document"]
+            self._metadatas[row] = entry["metadata"]
+        self._open_matrix()
+        self._load_codes()
+
+    def _open_matrix(self) -> None:
+        """(Re)abre el memory-map con el número de filas actual."""
+        self._live = None
+        self._dead_mask = None
+        if not self._ids:
+            self._matrix = None
+            return
+        self._matrix = np.memmap(
+            self.matrix_path,
+            dtype=np.float32,
+            mode="r",
+            shape=(len(self._ids), self._dim),
+        )
+
+    def _kill_row(self, row: int) -> None:
+        """Marca una fila como muerta (su espacio se libera en compact)."""
+        self._ids[row] = None
+        self._documents[row] = None
+        self._metadatas[row] = None
+        self._live = None
+        self._dead_mask = None
+
+    def _live_rows(self) -> np.ndarray:
+        """Filas vivas en orden de inserción."""
+        if self._live is None:
+            self._live = np.fromiter(
+                sorted(self._id_lookup.values()),
+                dtype=np.int64,
+                count=len(self._id_lookup),
+            )
+        return self._live
+
+    def _dead_rows_mask(self) -> np.ndarray | None:
+        """Máscara de filas muertas (None si no hay ninguna)."""
+        if not self.dead_rows:
+            return None
+        if self._dead_mask is None:
+            self._dead_mask = np.ones(len(self._ids), dtype=bool)
+            self._dead_mask[self._live_rows()] = False
+        return self._dead_mask
+
+    @property
+    def dead_rows(self) -> int:
+        """Filas reemplazadas o borradas pendientes de compactar."""
+        return len(self._ids) - len(self._id_lookup)
+
+    def _code_dtype(self) -> type:
+        return np.int8 if self.quantization == "int8" else np.uint8
+
+    def _load_codes(self) -> None:
+        """Carga los códigos cuantizados, regenerándolos si no coinciden."""
+        self._code_blocks = []
+        if self.quantization == "none" or self._matrix is None:
+            return
+        if self.codes_path.exists():
+            codes = np.fromfile(self.codes_path, dtype=self._code_dtype())
+            width = self._quantize(np.zeros((1, self._dim), np.float32)).shape[1]
+            if len(codes) == len(self._matrix) * width:
+                self._code_blocks = [codes.reshape(-1, width)]
+                return
+        codes = self._quantize_blocks(self._matrix)
+        codes.tofile(self.codes_path)
+        self._code_blocks = [codes]
+
+    def _codes(self) -> np.ndarray | None:
+        """Códigos de todas las filas (vivas y muertas), o None sin cuantización."""
+        if not self._code_blocks:
+            return None
+        if len(self._code_blocks) > 1:
+            self._code_blocks = [np.concatenate(self._code_blocks)]
+        return self._code_blocks[0]
+
+    def _quantize(self, vectors: np.ndarray) -> np.ndarray:
+        if self.quantization == "int8":
+            return quantize_int8(vectors)
+        return quantize_binary(vectors)
+
+    def _quantize_blocks(self, matrix: np.ndarray) -> np.ndarray:
+        """Cuantiza la matriz por bloques para no materializarla en RAM."""
+        blocks = [
+            self._quantize(np.asarray(matrix[start : start + _SCAN_BLOCK]))
+            for start in range(0, len(matrix), _SCAN_BLOCK)
+        ]
+        return np.concatenate(blocks)
+
+    def _append_records(self, records: list[dict]) -> None:
+        """Añade registros JSON al final del log."""
+        with open(self.records_path, "a+b") as f:
+            # Cerrar una posible línea truncada para no corromper la siguiente
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+        with open(self.records_path, "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                )
+
+    @staticmethod
+    def _normalize_rows(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors[None, :]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def count(self) -> int:
+        return len(self._id_lookup)
+
+    def add(
+        self,
+        ids: list[str],
+        embeddings,
+        documents: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        """
+        Añade chunks al final de la matriz y del log (los ids existentes se
+        reemplazan: su fila anterior queda muerta).
+        """
+        if not ids:
+            return
+        new_rows = self._normalize_rows(embeddings)
+        if self._dim is None:
+            self._dim = new_rows.shape[1]
+            self._append_records([{"dim": self._dim}])
+        elif new_rows.shape[1] != self._dim:
+            raise ValueError(
+                f"Dimensión {new_rows.shape[1]} distinta a la de la colección "
+                f"({self._dim})"
+            )
+
+        # Primero las filas: un registro nunca apunta a una fila sin escribir
+        start = len(self._ids)
+        with open(self.matrix_path, "ab") as f:
+            f.write(np.ascontiguousarray(new_rows).tobytes())
+        if self.quantization != "none":
+            codes = self._quantize(new_rows)
+            with open(self.codes_path, "ab") as f:
+                f.write(codes.tobytes())
+            self._code_blocks.append(codes)
+
+        records = []
+        for row, (chunk_id, document, metadata) in enumerate(
+            zip(ids, documents, metadatas), start
+        ):
+            previous = self._id_lookup.get(chunk_id)
+            if previous is not None:
+                self._kill_row(previous)
+            self._id_lookup[chunk_id] = row
+            self._ids.append(chunk_id)
+            self._documents.append(document)
+            self._metadatas.append(metadata)
+            records.append(
+                {"id": chunk_id, "row": row, "document": document, "metadata": metadata}
+            )
+        self._append_records(records)
+        self._open_matrix()
+
+    def upsert(self, ids, embeddings, documents, metadatas) -> None:
+        self.add(
+            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+        )
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        """
+        Elimina chunks por id o por filtro de metadata.
+
+        Solo añade tombstones al log; las filas se liberan con compact().
+        """
+        remove = set()
+        if ids:
+            remove.update(c for c in ids if c in self._id_lookup)
+        if where:
+            remove.update(
+                self._ids[i]
+                for i in self._live_rows()
+                if matches_where(self._metadatas[i], where)
+            )
+        if not remove:
+            return
+        if len(remove) == len(self._id_lookup):
+            self.clear()
+            return
+
+        for chunk_id in remove:
+            self._kill_row(self._id_lookup.pop(chunk_id))
+        self._append_records([{"id": chunk_id, "deleted": True} for chunk_id in remove])
+
+    def compact(self) -> int:
+        """
+        Reescribe matriz, log y códigos solo con las filas vivas.
+
+        Returns:
+            Número de filas liberadas
+        """
+        freed = self.dead_rows
+        if not freed:
+            return 0
+        if not self._id_lookup:
+            self.clear()
+            return freed
+
+        live = self._live_rows()
+        tmp_matrix = self.matrix_path.with_suffix(".tmp")
+        with open(tmp_matrix, "wb") as f:
+            for start in range(0, len(live), 4096):
+                block = self._matrix[live[start : start + 4096]]
+                f.write(np.ascontiguousarray(block).tobytes())
+
+        self._ids = [self._ids[i] for i in live]
+        self._documents = [self._documents[i] for i in live]
+        self._metadatas = [self._metadatas[i] for i in live]
+        self._id_lookup = {chunk_id: i for i, chunk_id in enumerate(self._ids)}
+        tmp_records = self.records_path.with_suffix(".tmp")
+        with open(tmp_records, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"dim": self._dim}) + "\n")
+            for row, (chunk_id, document, metadata) in enumerate(
+                zip(self._ids, self._documents, self._metadatas)
+            ):
+                record = {
+                    "id": chunk_id,
+                    "row": row,
+                    "document": document,
+                    "metadata": metadata,
+                }
+                f.write(
+                    json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                )
+
+        codes = self._codes()
+        # Soltar el memory-map anterior antes de reemplazar el archivo
+        self._matrix = None
+        os.replace(tmp_matrix, self.matrix_path)
+        os.replace(tmp_records, self.records_path)
+        self._open_matrix()
+        if codes is not None:
+            codes = codes[live]
+            codes.tofile(self.codes_path)
+            self._code_blocks = [codes]
+        print(f"✓ Colección NumPy compactada ({freed} filas liberadas)")
+        return freed
+
+    def _reset(self) -> None:
+        """Olvida el estado en memoria (sin tocar los archivos)."""
+        self._matrix = None
+        self._code_blocks = []
+        self._ids = []
+        self._documents = []
+        self._metadatas = []
+        self._id_lookup = {}
+        self._live = None
+        self._dead_mask = None
+        self._dim = None
+
+    def clear(self) -> None:
+        """Elimina todos los datos persistidos."""
+        self._reset()
+        for path in (self.matrix_path, self.records_path, self.codes_path):
+            if path.exists():
+                path.unlink()
+
+    def _row_indices(self, where: dict | None) -> np.ndarray | None:
+        """
+        Filas vivas que cumplen el filtro (None = todas las filas vivas).
+
+        Sin filtro no se seleccionan filas: copiar la matriz viva en cada
+        query costaría más que puntuarla entera y descartar las muertas.
+        """
+        if not where:
+            return None
+        return np.fromiter(
+            (i for i in self._live_rows() if matches_where(self._metadatas[i], where)),
+            dtype=np.int64,
+        )
+
+    def _candidate_pool(
+        self, query: np.ndarray, rows: np.ndarray | None, pool: int
+    ) -> np.ndarray:
+        """
+        Primera etapa: posiciones (relativas a `rows`) de los `pool` mejores
+        candidatos según los códigos cuantizados.
+        """
+        codes = self._codes() if rows is None else self._codes()[rows]
+        dead = self._dead_rows_mask() if rows is None else None
+        if self.quantization == "int8":
+            # Producto interno aproximado, por bloques para acotar memoria
+            q = query.astype(np.float32)
+            scores = np.concatenate(
+                [
+                    codes[start : start + _SCAN_BLOCK].astype(np.float32) @ q
+                    for start in range(0, len(codes), _SCAN_BLOCK)
+                ]
+            )
+        else:
+            q_code = quantize_binary(query[None, :])[0]
+            scores = -np.concatenate(
+                [
+                    hamming_distances(q_code, codes[start : start + _SCAN_BLOCK])
+                    for start in range(0, len(codes), _SCAN_BLOCK)
+                ]
+            )
+        if dead is not None:
+            scores = scores.astype(np.float32)
+            scores[dead] = -np.inf
+        live = len(scores) if dead is None else len(self._id_lookup)
+        if pool >= live:
+            return np.arange(len(scores)) if dead is None else self._live_rows()
+        return np.argpartition(-scores, pool - 1)[:pool]
+
+    def _search(
+        self,
+        queries: np.ndarray,
+        n_results: int,
+        rows: np.ndarray | None,
+        exact: bool = False,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        """
+        Top-n por query como (filas de la colección, similitud coseno).
+
+        Sin cuantización (o con `exact=True`) puntúa todas las filas con un
+        solo producto matricial; con cuantización re-puntúa solo el pool.
+        """
+        total = len(self._id_lookup) if rows is None else len(rows)
+        n = min(n_results, total)
+        if self._matrix is None or n == 0:
+            empty = np.empty(0, dtype=np.int64)
+            return [(empty, np.empty(0, dtype=np.float32)) for _ in queries]
+
+        output = []
+        if exact or not self._code_blocks:
+            candidates = self._matrix if rows is None else self._matrix[rows]
+            # Una sola multiplicación para todo el batch de queries
+            scores = queries @ candidates.T
+            dead = self._dead_rows_mask() if rows is None else None
+            if dead is not None:
+                scores[:, dead] = -np.inf
+            for q_scores in scores:
+                top = np.argpartition(-q_scores, n - 1)[:n]
+                top = top[np.argsort(-q_scores[top])]
+                positions = rows[top] if rows is not None else top
+                output.append((positions, q_scores[top]))
+            return output
+
+        pool = max(self.rescore_pool, n)
+        for query in queries:
+            local = self._candidate_pool(query, rows, pool)
+            positions = rows[local] if rows is not None else local
+            # Segunda etapa: re-score exacto leyendo solo las filas del pool
+            positions = np.sort(positions)
+            q_scores = self._matrix[positions] @ query
+            top = np.argsort(-q_scores)[:n]
+            output.append((positions[top], q_scores[top]))
+        return output
+
+    def query(
+        self,
+        query_embeddings,
+        n_results: int = 10,
+        where: dict | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        """Top-n por similitud coseno para una o varias queries."""
+        include = include or ["documents", "metadatas", "distances"]
+        queries = self._normalize_rows(query_embeddings)
+        results = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+
+        rows = self._row_indices(where)
+        for positions, scores in self._search(queries, n_results, rows):
+            results["ids"].append([self._ids[i] for i in positions])
+            results["documents"].append([self._documents[i] for i in positions])
+            results["metadatas"].append([self._metadatas[i] for i in positions])
+            results["distances"].append([float(1.0 - score) for score in scores])
+
+        return {k: v for k, v in results.items() if k == "ids" or k in include}
+
+    def measure_recall(
+        self,
+        query_embeddings,
+        k: int = 5,
+        pool_sizes: list[int] | tuple[int, ...] = (20, 50, 100, 200),
+    ) -> dict[int, float]:
+        """
+        Recall@k de la búsqueda cuantizada frente a la búsqueda exacta.
+
+        Sirve para elegir `rescore_pool`: devuelve {pool: recall promedio}.
+        """
+        if not self._code_blocks:
+            raise ValueError("measure_recall requiere una colección cuantizada")
+        queries = self._normalize_rows(query_embeddings)
+        rows = self._row_indices(None)
+        exact = [set(p.tolist()) for p, _ in self._search(queries, k, rows, True)]
+
+        original_pool = self.rescore_pool
+        recalls = {}
+        try:
+            for pool in pool_sizes:
+                self.rescore_pool = pool
+                approx = self._search(queries, k, rows)
+                hits = [
+                    len(truth & set(positions.tolist())) / max(len(truth), 1)
+                    for truth, (positions, _) in zip(exact, approx)
+                ]
+                recalls[pool] = sum(hits) / max(len(hits), 1)
+        finally:
+            self.rescore_pool = original_pool
+        return recalls
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict:
+        """Obtiene chunks por id, filtro o paginación."""
+        include = ["documents", "metadatas"] if include is None else include
+        if ids is not None:
+            positions = [self._id_lookup[c] for c in ids if c in self._id_lookup]
+        else:
+            positions = self._live_rows().tolist()
+        if where:
+            positions = [
+                i for i in positions if matches_where(self._metadatas[i], where)
+            ]
+        start = offset or 0
+        end = start + limit if limit is not None else None
+        positions = list(positions)[start:end]
+
+        data = {"ids": [self._ids[i] for i in positions]}
+        if "documents" in include:
+            data["documents"] = [self._documents[i] for i in positions]
+        if "metadatas" in include:
+            data["metadatas"] = [self._metadatas[i] for i in positions]
+        if "embeddings" in include:
+            data["embeddings"] = (
+                np.asarray(self._matrix[positions])
+                if self._matrix is not None
+                else np.empty((0, 0), dtype=np.float32)
+            )
+        return data
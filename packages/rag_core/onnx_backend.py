@@ -0,0 +1,226 @@
+"""
+Backend ONNX Runtime para embeddings en CPU.
+
+Exporta el modelo de sentence-transformers a ONNX una sola vez (opcionalmente
+con cuantización dinámica int8), lo cachea en disco y después lo ejecuta con
+onnxruntime + tokenizers, sin cargar PyTorch.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+OUTPUT_NAME = "last_hidden_state"
+
+
+def _model_dir(cache_dir: str | Path, model_name: str) -> Path:
+    slug = re.sub(r"[^\w.-]+", "_", model_name)
+    return Path(cache_dir) / slug
+
+
+def _is_mean_pooling(config: dict) -> bool:
+    """Soporta el formato de config de Pooling antiguo y el nuevo."""
+    if "pooling_mode" in config:
+        return config["pooling_mode"] == "mean"
+    return bool(config.get("pooling_mode_mean_tokens"))
+
+
+def export_model(model_name: str, cache_dir: str | Path, quantize: bool = False):
+    """
+    Exporta `model_name` a ONNX en `cache_dir/<modelo>/`.
+
+    Guarda el grafo del transformer (`model.onnx`), el tokenizer
+    (`tokenizer.json`) y la configuración de pooling (`onnx_config.json`).
+    Con `quantize=True` genera además `model.int8.onnx` (requiere `onnx`).
+    """
+    model_dir = _model_dir(cache_dir, model_name)
+    model_dir.mkdir(parents=True, exist_ok=True)
+    onnx_path = model_dir / "model.onnx"
+
+    if not onnx_path.exists():
+        # PyTorch solo hace falta para exportar, no para servir
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        print(f"Exportando {model_name} a ONNX...")
+        st_model = SentenceTransformer(model_name, device="cpu")
+        transformer = st_model[0].auto_model.eval()
+        tokenizer = st_model.tokenizer
+
+        pooling = next((m for m in st_model if type(m).__name__ == "Pooling"), None)
+        if pooling is not None and not _is_mean_pooling(pooling.get_config_dict()):
+            raise ValueError(
+                f"Pooling no soportado para ONNX en {model_name} (solo mean pooling)"
+            )
+
+        sample = tokenizer(["texto de ejemplo"], return_tensors="pt")
+        input_names = [
+            name
+            for name in ("input_ids", "attention_mask", "token_type_ids")
+            if name in sample
+        ]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes[OUTPUT_NAME] = {0: "batch", 1: "sequence"}
+
+        class _Encoder(torch.nn.Module):
+            """Pasa los inputs por nombre: el orden posicional varía por versión"""
+
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                outputs = self.model(**dict(zip(input_names, inputs)))
+                return outputs.last_hidden_state
+
+        with torch.no_grad():
+            torch.onnx.export(
+                _Encoder(transformer),
+                tuple(sample[name] for name in input_names),
+                str(onnx_path),
+                input_names=input_names,
+                output_names=[OUTPUT_NAME],
+                dynamic_axes=dynamic_axes,
+                opset_version=17,
+                dynamo=False,
+            )
+
+        tokenizer.save_pretrained(str(model_dir))
+        config = {
+            "model_name": model_name,
+            "max_seq_length": st_model.max_seq_length,
+            "normalize": any(type(m).__name__ == "Normalize" for m in st_model),
+            "pad_token": tokenizer.pad_token,
+            "pad_token_id": tokenizer.pad_token_id,
+        }
+        with open(model_dir / "onnx_config.json", "w", encoding="utf-8") as f:
+            json.dump(config, f, indent=2)
+        print(f"✓ Modelo ONNX guardado en {onnx_path}")
+
+    if quantize and not (model_dir / "model.int8.onnx").exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("Cuantizando modelo ONNX a int8...")
+        quantize_dynamic(
+            str(onnx_path),
+            str(model_dir / "model.int8.onnx"),
+            weight_type=QuantType.QInt8,
+        )
+        print("✓ Modelo ONNX int8 generado")
+
+    return model_dir
+
+
+class OnnxEncoder:
+    """
+    Encoder con onnxruntime compatible con `SentenceTransformer.encode`.
+
+    - Exporta y cachea el modelo en el primer uso
+    - Mean pooling con la attention mask (+ normalización si el modelo la usa)
+    - `encode(str)` devuelve un vector y `encode(list)` una matriz
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str | Path = "./data/onnx",
+        quantize: bool = False,
+        num_threads: int | None = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_name = model_name
+        self.quantize = quantize
+        model_dir = export_model(model_name, cache_dir, quantize=quantize)
+
+        with open(model_dir / "onnx_config.json", "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"]
+        )
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        model_file = "model.int8.onnx" if quantize else "model.onnx"
+        self.session = ort.InferenceSession(
+            str(model_dir / model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+        hidden = self.session.run([OUTPUT_NAME], feeds)[0]
+
+        # Mean pooling sobre tokens reales
+        mask = attention_mask[..., None].astype(np.float32)
+        summed = (hidden * mask).sum(axis=1)
+        embeddings = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.config["normalize"]:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings.astype(np.float32)
+
+    def encode(
+        self,
+        sentences: str | list[str],
+        batch_size: int = 32,
+        show_progress_bar: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        """Mismo contrato que SentenceTransformer.encode (salida NumPy)."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        batches = [
+            self._encode_batch(texts[start : start + batch_size])
+            for start in range(0, len(texts), batch_size)
+        ]
+        embeddings = np.concatenate(batches)
+        return embeddings[0] if single else embeddings
+
+
+def check_agreement(
+    model_name: str,
+    texts: list[str],
+    cache_dir: str | Path = "./data/onnx",
+    quantize: bool = False,
+) -> dict:
+    """
+    Compara los embeddings ONNX con los de PyTorch para los mismos textos.
+
+    Returns:
+        dict con similitud coseno mínima y promedio entre ambos backends
+    """
+    from sentence_transformers import SentenceTransformer
+
+    reference = SentenceTransformer(model_name, device="cpu").encode(texts)
+    onnx = OnnxEncoder(model_name, cache_dir=cache_dir, quantize=quantize).encode(texts)
+
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    onnx = onnx / np.linalg.norm(onnx, axis=1, keepdims=True)
+    cosine = (reference * onnx).sum(axis=1)
+    return {
+        "texts": len(texts),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+    }
@@ -5,14 +5,24 @@ RAG Pipeline - Orquesta todo el flujo de ingesta y consulta con guardrails
 import re
 import time
 import unicodedata
+from collections.abc import Callable
 from pathlib import Path
 
 from .cache import get_cache
-from .chunker import chunk_documents
+from .chunker import TextChunker, create_chunker
 from .config import get_settings
+from .dedup import ChunkDeduplicator
+from .extraction_cache import get_extraction_cache
 from .generator import MultiProviderGenerator
 from .guardrails import GroundingChecker, PIIScrubber, RefusalPolicy
-from .loaders import PDFLoader, load_documents_from_directory
+from .ingest_stream import IngestStream
+from .loaders import list_document_files, load_document_file
+from .manifest import IngestManifest
+from .query_parser import (
+    mentions_part,
+    parse_article_references,
+    resolve_sources,
+)
 from .router import get_router
 from .vectorstore import VectorStore
 
@@ -35,6 +45,15 @@ def normalize_query(text: str) -> str:
     return text
 
 
+def cache_key_for(normalized_question: str, filters: dict | None = None) -> str:
+    """Clave de caché: la pregunta normalizada más los filtros activos."""
+    active = {k: v for k, v in (filters or {}).items() if v is not None}
+    if not active:
+        return normalized_question
+    suffix = " ".join(f"{k}={active[k]}" for k in sorted(active))
+    return f"{normalized_question} [{suffix}]"
+
+
 class RAGPipeline:
     """Pipeline completo de RAG con guardrails"""
 
@@ -46,6 +65,10 @@ class RAGPipeline:
     ):
         self.settings = get_settings()
         self.vector_store = VectorStore()
+        self.manifest = IngestManifest(
+            Path(self.vector_store.persist_dir)
+            / f"{self.vector_store.collection_name}_manifest.json"
+        )
         self.generator = MultiProviderGenerator()
 
         # Cache para respuestas
@@ -63,74 +86,356 @@ class RAGPipeline:
             self.refusal_policy = RefusalPolicy()
             self.pii_scrubber = PIIScrubber()
 
-    def ingest_directory(self, directory: str | Path) -> dict:
+    def ingest_directory(
+        self,
+        directory: str | Path,
+        workers: int | None = None,
+        worker_threads: int | None = None,
+        incremental: bool = False,
+        pdf_workers: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> dict:
         """
         Ingesta todos los PDFs de un directorio.
 
+        Las etapas (carga, chunking, embeddings y escritura) corren en
+        streaming con colas acotadas, ver IngestStream.
+
+        Args:
+            directory: Directorio con los documentos
+            workers: Procesos para generar embeddings (default: settings)
+            worker_threads: Threads de torch por worker (default: settings)
+            incremental: Solo procesar archivos nuevos o modificados según el
+                manifest, y eliminar los chunks de archivos borrados
+            pdf_workers: Procesos para extraer PDFs por rangos de páginas
+                (default: settings)
+            progress: Callback (chunks escritos, chunks generados) tras cada
+                escritura al vector store. Si la ingesta falla, re-ejecutarla
+                en modo incremental retoma desde los chunks ya escritos.
+
         Returns:
             dict con estadísticas de la ingesta
         """
         print(f"=== Iniciando ingesta desde: {directory} ===")
+        files = list_document_files(directory)
+
+        removed = []
+        skipped = 0
+        if incremental:
+            diff = self.manifest.diff(files)
+            files = diff.added + diff.changed
+            removed = diff.removed
+            skipped = len(diff.unchanged)
+            print(
+                f"   Incremental: {len(diff.added)} nuevos, {len(diff.changed)} "
+                f"modificados, {skipped} sin cambios, {len(removed)} eliminados"
+            )
 
-        # 1. Cargar documentos
-        print("\n1. Cargando documentos...")
-        documents = load_documents_from_directory(directory)
-        print(f"   Total páginas cargadas: {len(documents)}")
+        # Chunks ya indexados por archivo (para limpiar obsoletos)
+        previous = self._previous_chunk_ids(files)
+        stream = IngestStream(
+            self.vector_store,
+            self._create_chunker(),
+            deduplicator=self._create_deduplicator(),
+            batch_size=self.settings.ingest_batch_size,
+            flush_size=self.settings.ingest_flush_size,
+            queue_size=self.settings.ingest_queue_size,
+            skip_ids=set().union(*previous.values()) if incremental else None,
+            progress=progress,
+        )
 
-        if not documents:
+        # 1-3. Cargar → chunking → embeddings → vector store, en streaming
+        print("\n1. Cargando, dividiendo y generando embeddings (streaming)...")
+        if pdf_workers is None:
+            pdf_workers = self.settings.pdf_workers
+        embedding_model = self.vector_store.embedding_model
+        with embedding_model.worker_pool(workers, worker_threads):
+            stats = stream.run(files, pdf_workers, self.settings.pdf_pages_per_task)
+        print(f"   Total páginas cargadas: {stats.pages}")
+        print(f"   Total chunks generados: {stats.chunks}")
+        if stats.duplicates:
+            print(f"   Chunks casi duplicados fusionados: {stats.duplicates}")
+
+        if not stats.pages and not incremental:
             return {"status": "error", "message": "No se encontraron documentos"}
 
-        # 2. Dividir en chunks
-        print("\n2. Dividiendo en chunks...")
-        chunks = chunk_documents(
-            documents,
-            chunk_size=self.settings.chunk_size,
-            chunk_overlap=self.settings.chunk_overlap,
+        deleted = self._apply_manifest(
+            stats.loaded_files, stats.chunk_ids_by_file, previous, removed
         )
-        print(f"   Total chunks generados: {len(chunks)}")
-
-        # 3. Añadir al vector store
-        print("\n3. Generando embeddings y almacenando...")
-        added = self.vector_store.add_chunks(chunks)
+        self._invalidate_cache(
+            [path.name for path in stats.loaded_files]
+            + [Path(key).name for key in removed]
+        )
+        # Las filas reemplazadas por la reingesta también cuentan como muertas
+        self.vector_store.compact_if_needed()
+        added = stats.added
 
         print("\n=== Ingesta completada ===")
-        print(
-            f"   Documentos procesados: {len(set(d.metadata['source'] for d in documents))}"
-        )
-        print(f"   Páginas procesadas: {len(documents)}")
+        print(f"   Documentos procesados: {len(stats.sources)}")
+        print(f"   Páginas procesadas: {stats.pages}")
         print(f"   Chunks indexados: {added}")
+        if incremental:
+            print(f"   Archivos sin cambios: {skipped}")
+        print(f"   Chunks eliminados: {deleted}")
         print(f"   Total en vector store: {self.vector_store.count()}")
 
         return {
             "status": "success",
-            "documents": len(set(d.metadata["source"] for d in documents)),
-            "pages": len(documents),
+            "documents": len(stats.sources),
+            "pages": stats.pages,
             "chunks": added,
+            "duplicate_chunks": stats.duplicates,
+            "skipped_files": skipped,
+            "deleted_chunks": deleted,
+            "file_timings": stats.timings,
             "total_indexed": self.vector_store.count(),
         }
 
+    def _create_chunker(self) -> TextChunker:
+        """Chunker de la estrategia configurada (`chunking_strategy`)."""
+        strategy = self.settings.chunking_strategy
+        if strategy != "tokens":
+            return create_chunker(
+                strategy,
+                chunk_size=self.settings.chunk_size,
+                chunk_overlap=self.settings.chunk_overlap,
+                max_chunk_size=self.settings.legal_max_chunk_size,
+            )
+        # Ventanas de tokens del mismo modelo que genera los embeddings
+        embedding_model = self.vector_store.embedding_model
+        return create_chunker(
+            strategy,
+            chunk_size=self.settings.token_chunk_size,
+            chunk_overlap=self.settings.token_chunk_overlap,
+            tokenizer=embedding_model.create_tokenizer(),
+            max_seq_length=embedding_model.max_seq_length,
+        )
+
+    def _create_deduplicator(self) -> ChunkDeduplicator | None:
+        """Deduplicador de chunks por documento (None si está desactivado)."""
+        if not self.settings.dedup_chunks:
+            return None
+        return ChunkDeduplicator(threshold=self.settings.dedup_threshold)
+
+    def _article_lookup(
+        self, question: str, top_k: int, filters: dict | None = None
+    ) -> list[dict] | None:
+        """
+        Resuelve referencias a artículos ("artículo 132 del Código
+        Tributario", "inciso b del art. 43") con el índice de artículos.
+
+        Cada referencia es una consulta O(1) al índice más una lectura por
+        ID; los chunks que contienen el inciso o numeral citado van
+        primero. Retorna None si la pregunta no cita artículos o el índice
+        no los tiene (usar la búsqueda híbrida).
+        """
+        references = parse_article_references(question)
+        if not references:
+            return None
+
+        index = self.vector_store.article_index
+        source = (filters or {}).get("source")
+        sources = [source] if source else resolve_sources(question, index.sources())
+        ranked = []
+        for reference in references:
+            chunk_ids = [
+                chunk_id
+                for name in sources
+                for chunk_id in index.lookup(reference.article, name)
+            ]
+            chunks = self.vector_store.get_chunks(chunk_ids, filters)
+            chunks.sort(key=lambda c: not mentions_part(c["content"], reference))
+            if chunks:
+                ranked.append(chunks)
+        if not ranked:
+            return None
+
+        # Intercalar referencias para que todas entren en el top_k
+        results = [
+            chunks[i]
+            for i in range(max(len(chunks) for chunks in ranked))
+            for chunks in ranked
+            if i < len(chunks)
+        ][:top_k]
+        print(
+            f"   ⚡ Índice de artículos: {[r.article for r in references]} -> "
+            f"{len(results)} chunks (sin búsqueda vectorial)"
+        )
+        return results
+
     def ingest_file(self, file_path: str | Path) -> dict:
-        """Ingesta un solo archivo PDF"""
-        loader = PDFLoader(file_path)
-        documents = loader.load()
-
-        chunks = chunk_documents(
-            documents,
-            chunk_size=self.settings.chunk_size,
-            chunk_overlap=self.settings.chunk_overlap,
+        """Ingesta un solo archivo PDF o HTML (si ya existía, lo reemplaza)"""
+        return self.replace_source(file_path)
+
+    def replace_source(self, file_path: str | Path) -> dict:
+        """
+        Reemplaza un documento en el índice sin tocar el resto.
+
+        Solo se escriben los chunks nuevos o modificados; los que el
+        documento ya no produce se eliminan del vector store, el índice de
+        keywords y el sidecar, y se invalidan las respuestas cacheadas que
+        lo citan. El costo es proporcional a este archivo.
+
+        Args:
+            file_path: Ruta al PDF/HTML con la nueva versión del documento
+
+        Returns:
+            dict con estadísticas del reemplazo
+        """
+        file_path = Path(file_path)
+        if not file_path.exists():
+            raise FileNotFoundError(f"Archivo no encontrado: {file_path}")
+
+        documents = load_document_file(file_path)
+        chunks = self._create_chunker().split_documents(documents)
+        generated = len(chunks)
+        deduplicator = self._create_deduplicator()
+        if deduplicator:
+            chunks = deduplicator.deduplicate(chunks)
+
+        # Chunks de esta misma ruta que no cambiaron: no hace falta reescribirlos
+        previous = self._previous_chunk_ids([file_path])
+        unchanged = previous[file_path]
+        added = self.vector_store.add_chunks(
+            [c for c in chunks if c.chunk_id not in unchanged]
         )
 
-        added = self.vector_store.add_chunks(chunks)
+        # El mismo documento indexado desde otra ruta también se reemplaza
+        previous[file_path] |= set(
+            self.vector_store.chunk_ids({"source": file_path.name})
+        )
+        own_key = self.manifest.key(file_path)
+        for key in self._manifest_keys_for(file_path.name):
+            if key != own_key:
+                self.manifest.forget(key)
+        deleted = self._apply_manifest(
+            [file_path], {file_path: [c.chunk_id for c in chunks]}, previous
+        )
+        invalidated = self._invalidate_cache([file_path.name])
 
         return {
             "status": "success",
             "file": str(file_path),
+            "documents": 1,
             "pages": len(documents),
             "chunks": added,
+            "duplicate_chunks": generated - len(chunks),
+            "deleted_chunks": deleted,
+            "invalidated_cache_entries": invalidated,
+            "total_indexed": self.vector_store.count(),
+        }
+
+    def delete_source(self, source: str) -> dict:
+        """
+        Elimina un documento (por nombre, ej. "Codigo-Tributario.pdf") del
+        vector store, el índice de keywords, el manifest y el caché.
+
+        Returns:
+            dict con el número de chunks y respuestas cacheadas eliminadas
+        """
+        deleted = self.vector_store.delete_source(source)
+        keys = self._manifest_keys_for(source)
+        for key in keys:
+            self.manifest.forget(key)
+        if keys:
+            self.manifest.save()
+        invalidated = self._invalidate_cache([source])
+
+        return {
+            "status": "success" if deleted or keys else "not_found",
+            "source": source,
+            "deleted_chunks": deleted,
+            "invalidated_cache_entries": invalidated,
+            "total_indexed": self.vector_store.count(),
         }
 
+    def _manifest_keys_for(self, source: str) -> list[str]:
+        """Entradas del manifest cuyo archivo se llama `source`."""
+        return [key for key in self.manifest.files if Path(key).name == source]
+
+    def _invalidate_cache(self, sources: list[str]) -> int:
+        """Invalida las respuestas cacheadas que citan estos documentos."""
+        if not self.enable_cache:
+            return 0
+        return sum(self.cache.invalidate_source(source) for source in sources)
+
+    def _previous_chunk_ids(self, files: list[Path]) -> dict[Path, set[str]]:
+        """IDs indexados hoy para cada archivo (según manifest o source_path)."""
+        previous = {}
+        for path in files:
+            if self.manifest.key(path) in self.manifest.files:
+                previous[path] = set(self.manifest.chunk_ids(path))
+            else:
+                # Sin manifest (colección previa): buscar por source_path
+                previous[path] = set(
+                    self.vector_store.chunk_ids({"source_path": str(path)})
+                )
+        return previous
+
+    def _apply_manifest(
+        self,
+        files: list[Path],
+        chunk_ids_by_file: dict[Path, list[str]],
+        previous: dict[Path, set[str]],
+        removed: list[str] | None = None,
+    ) -> int:
+        """
+        Elimina los chunks que ya no existen (en `files` o en archivos
+        borrados) y registra el estado de `files` en el manifest.
+        Retorna el número de chunks eliminados.
+        """
+        stale: set[str] = set()
+        for path in files:
+            stale.update(previous.get(path, set()) - set(chunk_ids_by_file[path]))
+        for key in removed or []:
+            stale.update(self.manifest.chunk_ids(key))
+            self.manifest.forget(key)
+
+        deleted = self.vector_store.delete_chunks(sorted(stale))
+        for path in files:
+            self.manifest.record(path, chunk_ids_by_file[path])
+        self.manifest.save()
+        return deleted
+
+    def retrieve_many(
+        self,
+        questions: list[str],
+        top_k: int | None = None,
+        filters: dict | None = None,
+    ) -> list[list[dict]]:
+        """
+        Recupera los chunks de varias preguntas en un solo batch.
+
+        Igual que query(): las preguntas que citan artículos se resuelven
+        con el índice de artículos y el resto va a la búsqueda híbrida en
+        batch.
+
+        Returns:
+            Lista de chunks relevantes por pregunta, en el mismo orden
+        """
+        top_k = top_k or self.settings.top_k_results
+        results: list[list[dict] | None] = [None] * len(questions)
+        if self.settings.article_fast_path:
+            for i, question in enumerate(questions):
+                results[i] = self._article_lookup(question, top_k, filters)
+
+        pending = [i for i, chunks in enumerate(results) if chunks is None]
+        searched = self.vector_store.search_many(
+            [normalize_query(questions[i]) for i in pending],
+            top_k=top_k,
+            filters=filters,
+        )
+        for i, chunks in zip(pending, searched):
+            results[i] = chunks
+        return results
+
     def query(
-        self, question: str, top_k: int | None = None, skip_cache: bool = False
+        self,
+        question: str,
+        top_k: int | None = None,
+        skip_cache: bool = False,
+        relevant_chunks: list[dict] | None = None,
+        filters: dict | None = None,
     ) -> dict:
         """
         Responde una pregunta usando RAG con guardrails.
@@ -139,6 +444,10 @@ class RAGPipeline:
             question: Pregunta del usuario
             top_k: Número de chunks a recuperar
             skip_cache: Si es True, ignora el caché y fuerza nueva generación
+            relevant_chunks: Chunks ya recuperados (ej. con retrieve_many);
+                si se pasan, se omite la búsqueda
+            filters: Restringe la búsqueda (source, source_type, page_from,
+                page_to)
 
         Returns:
             dict con answer, citations, confidence, refusal, etc.
@@ -150,9 +459,10 @@ class RAGPipeline:
         normalized_question = normalize_query(question)
         print(f"   Query normalizada: {normalized_question}")
 
-        # 0.1 Verificar caché
+        # 0.1 Verificar caché (la clave incluye los filtros)
+        cache_key = cache_key_for(normalized_question, filters)
         if self.enable_cache and not skip_cache:
-            cached_response = self.cache.get(normalized_question)
+            cached_response = self.cache.get(cache_key)
             if cached_response:
                 cached_response["from_cache"] = True
                 cached_response["latency_ms"] = int((time.time() - start_time) * 1000)
@@ -164,8 +474,14 @@ class RAGPipeline:
             if pii_found:
                 print(f"⚠ PII detectado en query: {len(pii_found)} elementos")
 
-        # 2. Buscar chunks relevantes (usando query normalizada)
-        relevant_chunks = self.vector_store.search(normalized_question, top_k=top_k)
+        # 2. Buscar chunks relevantes: referencias a artículos por el índice
+        # de artículos y, si no hay, búsqueda híbrida (query normalizada)
+        if relevant_chunks is None and self.settings.article_fast_path:
+            relevant_chunks = self._article_lookup(question, top_k, filters)
+        if relevant_chunks is None:
+            relevant_chunks = self.vector_store.search(
+                normalized_question, top_k=top_k, filters=filters
+            )
 
         # Debug: mostrar scores de chunks
         if relevant_chunks:
@@ -306,7 +622,7 @@ class RAGPipeline:
 
         # Guardar en caché (solo respuestas exitosas)
         if self.enable_cache and not response.get("refusal"):
-            self.cache.set(normalized_question, response)
+            self.cache.set(cache_key, response)
 
         response["from_cache"] = False
         return response
@@ -326,6 +642,8 @@ class RAGPipeline:
             "llm_model": llm_model,
             "llm_provider": self.settings.llm_provider,
             "chunk_size": self.settings.chunk_size,
+            "chunking_strategy": self.settings.chunking_strategy,
+            "indexed_articles": len(self.vector_store.article_index),
             "top_k": self.settings.top_k_results,
             "guardrails_enabled": self.enable_guardrails,
             "cache_enabled": self.enable_cache,
@@ -335,6 +653,13 @@ class RAGPipeline:
         if self.enable_cache:
             stats["cache_stats"] = self.cache.get_stats()
 
+        stats["query_embedding_cache"] = (
+            self.vector_store.embedding_model.query_cache.get_stats()
+        )
+        extraction_cache = get_extraction_cache()
+        if extraction_cache is not None:
+            stats["extraction_cache"] = extraction_cache.get_stats()
+
         if self.enable_routing:
             stats["available_providers"] = get_available_providers()
             stats["available_models"] = {
@@ -345,5 +670,6 @@ class RAGPipeline:
         return stats
 
     def clear(self):
-        """Limpia el vector store"""
+        """Limpia el vector store y el manifest de ingesta"""
         self.vector_store.clear()
+        self.manifest.clear()
@@ -0,0 +1,123 @@
+"""
+Query Parser - Referencias directas a artículos en la pregunta
+
+Detecta "artículo 132", "arts. 43 y 44", "Norma IV", "inciso b", "numeral 2"
+para resolverlas con el índice de artículos sin pasar por la búsqueda
+vectorial ni keyword.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Se aplica sobre texto en minúsculas y sin acentos
+_ARTICLES = re.compile(
+    r"\bart(?:iculo|\.)?s?\s*(?:n[°º.]?\s*)?"
+    r"((?:\d+\s*[°º]?(?:\s*-\s*[a-z]\b)?(?:\s*(?:,|y|e)\s*)?)+)"
+)
+_ARTICLE_NUMBER = re.compile(r"(\d+)\s*[°º]?(?:\s*-\s*([a-z])\b)?")
+_NORMA = re.compile(r"\bnorma\s+([ivxlc]+)\b")
+_INCISO = re.compile(r"\b(?:inciso|inc\.|literal|lit\.)\s*([a-z]|\d+)\b")
+_NUMERAL = re.compile(r"\b(?:numeral|num\.)\s*(\d+(?:\.\d+)*)")
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Palabras que no sirven para reconocer el documento citado
+_STOPWORDS = {
+    "que",
+    "dice",
+    "del",
+    "los",
+    "las",
+    "una",
+    "por",
+    "para",
+    "con",
+    "sobre",
+    "segun",
+    "establece",
+    "articulo",
+    "articulos",
+    "inciso",
+    "numeral",
+    "literal",
+    "norma",
+    "pdf",
+    "html",
+}
+
+
+@dataclass
+class ArticleReference:
+    """Artículo citado en la pregunta (clave de ArticleIndex)"""
+
+    article: str
+    inciso: str | None = None
+    numeral: str | None = None
+
+
+def _plain(text: str) -> str:
+    """Minúsculas y sin acentos (conserva °/º)."""
+    text = unicodedata.normalize("NFD", text.lower())
+    return "".join(c for c in text if unicodedata.category(c) != "Mn")
+
+
+def parse_article_references(question: str) -> list[ArticleReference]:
+    """
+    Referencias a artículos de la pregunta, en orden de aparición.
+
+    "¿Qué dice el inciso b del artículo 43?" -> [ArticleReference("43", "b")]
+    "Compara los artículos 43 y 44" -> ["43", "44"]
+    "Norma IV del Título Preliminar" -> ["NORMA IV"]
+
+    El inciso y el numeral, si los hay, se asocian a todas las referencias.
+    """
+    text = _plain(question)
+    articles = []
+    for match in _ARTICLES.finditer(text):
+        for number, suffix in _ARTICLE_NUMBER.findall(match.group(1)):
+            articles.append(f"{number}-{suffix.upper()}" if suffix else number)
+    articles += [f"NORMA {m.upper()}" for m in _NORMA.findall(text)]
+
+    inciso = _INCISO.search(text)
+    numeral = _NUMERAL.search(text)
+    return [
+        ArticleReference(
+            article,
+            inciso=inciso.group(1) if inciso else None,
+            numeral=numeral.group(1) if numeral else None,
+        )
+        for article in dict.fromkeys(articles)
+    ]
+
+
+def resolve_sources(question: str, sources: list[str]) -> list[str]:
+    """
+    Documentos que la pregunta nombra ("del Código Tributario").
+
+    Cuenta las palabras de la pregunta presentes en el nombre de cada
+    source y se queda con los de mayor coincidencia; si ninguno coincide,
+    retorna todos.
+    """
+    words = {
+        w
+        for w in _WORD.findall(_plain(question))
+        if len(w) >= 3 and w not in _STOPWORDS
+    }
+    matches = {
+        source: len(words & set(_WORD.findall(_plain(source)))) for source in sources
+    }
+    best = max(matches.values(), default=0)
+    if best == 0:
+        return list(sources)
+    return [source for source, count in matches.items() if count == best]
+
+
+def mentions_part(content: str, reference: ArticleReference) -> bool:
+    """Si el texto contiene el inciso o numeral citado ("b)", "2.")."""
+    text = _plain(content)
+    patterns = []
+    if reference.inciso:
+        patterns.append(rf"(?<![\w.]){re.escape(reference.inciso)}\s*\)")
+    if reference.numeral:
+        patterns.append(rf"(?<![\w.]){re.escape(reference.numeral)}\s*[.)]\s")
+    return any(re.search(pattern, text) for pattern in patterns)
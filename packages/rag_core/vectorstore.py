@@ -2,45 +2,229 @@
 Vector Store - Embeddings y ChromaDB
 """
 
-import re
-import unicodedata
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings as ChromaSettings
-from sentence_transformers import SentenceTransformer
 
+from .article_index import ArticleIndex
 from .chunker import Chunk
 from .config import get_settings
+from .embedding_cache import (
+    ChunkEmbeddingCache,
+    embedding_variant,
+    get_query_embedding_cache,
+)
+from .embedding_pool import EmbeddingPool
+from .ingest_stream import threaded
+from .keyword_index import (
+    KeywordIndex,
+    NormalizedTextStore,
+    extract_phrases,
+    normalize_text,
+    tokenize,
+)
+from .numpy_store import NumpyCollection
+
+
+def build_where_clause(filters: dict | None) -> dict | None:
+    """
+    Traduce filtros de búsqueda a una cláusula `where` de ChromaDB.
+
+    Filtros soportados: source, source_type, page_from, page_to.
+    """
+    filters = filters or {}
+    conditions = []
+    if filters.get("source") is not None:
+        conditions.append({"source": {"$eq": filters["source"]}})
+    if filters.get("source_type") is not None:
+        conditions.append({"source_type": {"$eq": filters["source_type"]}})
+    if filters.get("page_from") is not None:
+        conditions.append({"page": {"$gte": filters["page_from"]}})
+    if filters.get("page_to") is not None:
+        conditions.append({"page": {"$lte": filters["page_to"]}})
+
+    if not conditions:
+        return None
+    if len(conditions) == 1:
+        return conditions[0]
+    return {"$and": conditions}
 
 
 class EmbeddingModel:
-    """Wrapper para sentence-transformers"""
+    """
+    Wrapper para sentence-transformers.
+
+    Backend configurable con `embedding_backend`: "torch" (sentence-transformers)
+    u "onnx" (onnxruntime, ver OnnxEncoder). Ambos exponen `encode`.
+    """
 
     def __init__(self, model_name: str | None = None):
         settings = get_settings()
         self.model_name = model_name or settings.embedding_model
+        self.batch_size = settings.embedding_batch_size
+        self.backend = settings.embedding_backend
+        self.quantization = (
+            "int8" if self.backend == "onnx" and settings.onnx_quantize else "fp32"
+        )
+        # Clave de los cachés: el mismo texto da otro vector con otro backend
+        self.variant = embedding_variant(
+            self.model_name, self.backend, self.quantization
+        )
         self._model = None
+        self.query_cache = get_query_embedding_cache()
+        self.pool: EmbeddingPool | None = None
 
     @property
-    def model(self) -> SentenceTransformer:
+    def model(self):
         if self._model is None:
-            print(f"Cargando modelo de embeddings: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            print(f"Cargando modelo de embeddings: {self.model_name} ({self.backend})")
+            settings = get_settings()
+            if self.backend == "onnx":
+                from .onnx_backend import OnnxEncoder
+
+                self._model = OnnxEncoder(
+                    self.model_name,
+                    cache_dir=settings.onnx_cache_dir,
+                    quantize=settings.onnx_quantize,
+                )
+            else:
+                # Import diferido: PyTorch solo se carga si se usa este backend
+                from sentence_transformers import SentenceTransformer
+
+                self._model = SentenceTransformer(self.model_name)
         return self._model
 
+    @property
+    def max_seq_length(self) -> int:
+        """Ventana del modelo en tokens (incluidos los especiales)."""
+        if self.backend == "onnx":
+            return self.model.config["max_seq_length"]
+        return self.model.max_seq_length
+
+    def create_tokenizer(self):
+        """
+        Copia del tokenizer del modelo (`tokenizers.Tokenizer`), sin truncado
+        ni padding, para contar tokens al chunkear.
+
+        Es una copia independiente: el chunker la usa desde otro thread
+        mientras el encoder tokeniza con su propia configuración.
+        """
+        from tokenizers import Tokenizer
+
+        tokenizer = self.model.tokenizer
+        # sentence-transformers expone el tokenizer fast de transformers
+        tokenizer = getattr(tokenizer, "backend_tokenizer", tokenizer)
+        copy = Tokenizer.from_str(tokenizer.to_str())
+        copy.no_truncation()
+        copy.no_padding()
+        return copy
+
     def embed(self, texts: list[str]) -> list[list[float]]:
         """Genera embeddings para una lista de textos"""
         embeddings = self.model.encode(texts, show_progress_bar=True)
         return embeddings.tolist()
 
+    def embed_batches(
+        self, texts: list[str], batch_size: int | None = None
+    ) -> Iterator[tuple[list[int], np.ndarray]]:
+        """
+        Genera embeddings por batches agrupados por longitud.
+
+        Ordena los textos por longitud para que cada batch tenga textos de
+        tamaño parecido (menos padding) y produce (índices originales,
+        matriz float32) sin convertir a listas de Python.
+        """
+        batch_size = batch_size or self.batch_size
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+        index_batches = [
+            order[start : start + batch_size]
+            for start in range(0, len(order), batch_size)
+        ]
+        total_batches = len(index_batches)
+
+        if self.pool is not None:
+            # Los workers procesan los batches en paralelo; map conserva el orden
+            results = self.pool.map_batches(
+                [[texts[i] for i in indices] for indices in index_batches]
+            )
+        else:
+            results = (
+                self.model.encode(
+                    [texts[i] for i in indices],
+                    batch_size=batch_size,
+                    convert_to_numpy=True,
+                )
+                for indices in index_batches
+            )
+
+        for n, (indices, embeddings) in enumerate(zip(index_batches, results), 1):
+            if n % 10 == 0 or n == total_batches:
+                print(f"  Embeddings: batch {n}/{total_batches}")
+            yield indices, embeddings.astype(np.float32, copy=False)
+
+    @contextmanager
+    def worker_pool(self, workers: int | None = None, threads: int | None = None):
+        """
+        Usa un pool de procesos para `embed_batches` dentro del bloque.
+
+        Con 0 o 1 workers los embeddings se generan en el proceso actual.
+        """
+        settings = get_settings()
+        workers = settings.embedding_workers if workers is None else workers
+        threads = threads or settings.embedding_worker_threads
+        if workers <= 1 or self.pool is not None:
+            yield self
+            return
+
+        self.pool = EmbeddingPool(
+            self.model_name,
+            workers=workers,
+            threads_per_worker=threads,
+            backend=self.backend,
+        )
+        try:
+            with self.pool:
+                yield self
+        finally:
+            self.pool = None
+
     def embed_query(self, query: str) -> list[float]:
-        """Genera embedding para una query"""
-        return self.model.encode(query).tolist()
+        """Genera embedding para una query (con caché LRU)"""
+        cached = self.query_cache.get(self.variant, query)
+        if cached is not None:
+            return cached.tolist()
+        embedding = self.model.encode(query)
+        self.query_cache.put(self.variant, query, embedding)
+        return embedding.tolist()
+
+    def embed_queries(self, queries: list[str]) -> list[list[float]]:
+        """
+        Genera embeddings para varias queries en un solo batch.
+
+        Solo las queries que no están en caché pasan por el modelo.
+        """
+        embeddings = [self.query_cache.get(self.variant, q) for q in queries]
+        missing = [i for i, emb in enumerate(embeddings) if emb is None]
+        if missing:
+            encoded = self.model.encode([queries[i] for i in missing])
+            for i, embedding in zip(missing, encoded):
+                self.query_cache.put(self.variant, queries[i], embedding)
+                embeddings[i] = embedding
+        return [np.asarray(emb).tolist() for emb in embeddings]
 
 
 class VectorStore:
-    """ChromaDB vector store con persistencia"""
+    """
+    Vector store con persistencia.
+
+    Backend configurable con `vector_backend`: "chroma" (default) o "numpy"
+    (búsqueda exacta sobre una matriz memory-mapped, ver NumpyCollection).
+    """
 
     def __init__(
         self, collection_name: str = "rag_documents", persist_dir: str | None = None
@@ -48,57 +232,394 @@ class VectorStore:
         settings = get_settings()
         self.persist_dir = persist_dir or settings.chroma_persist_dir
         self.collection_name = collection_name
+        self.backend = settings.vector_backend
+        self.write_batch_size = settings.write_batch_size
+        self.write_retries = settings.write_retries
+        self.compact_dead_ratio = settings.compact_dead_ratio
 
         # Crear directorio si no existe
         Path(self.persist_dir).mkdir(parents=True, exist_ok=True)
 
-        # Inicializar ChromaDB con persistencia
-        self.client = chromadb.PersistentClient(
-            path=self.persist_dir, settings=ChromaSettings(anonymized_telemetry=False)
-        )
+        if self.backend == "numpy":
+            self.client = None
+            self.collection = NumpyCollection(
+                Path(self.persist_dir) / f"{collection_name}_numpy",
+                quantization=settings.vector_quantization,
+                rescore_pool=settings.rescore_pool,
+            )
+        else:
+            # Inicializar ChromaDB con persistencia
+            self.client = chromadb.PersistentClient(
+                path=self.persist_dir,
+                settings=ChromaSettings(anonymized_telemetry=False),
+            )
 
-        # Obtener o crear colección con similitud coseno
-        # Coseno es más apropiado para embeddings de texto
-        self.collection = self.client.get_or_create_collection(
-            name=collection_name,
-            metadata={
-                "description": "RAG Estado Peru documents",
-                "hnsw:space": "cosine",  # Usar similitud coseno
-            },
-        )
+            # Obtener o crear colección con similitud coseno
+            # Coseno es más apropiado para embeddings de texto
+            self.collection = self.client.get_or_create_collection(
+                name=collection_name,
+                metadata={
+                    "description": "RAG Estado Peru documents",
+                    "hnsw:space": "cosine",  # Usar similitud coseno
+                },
+            )
+            # Chroma rechaza escrituras por encima de su tamaño máximo de batch
+            self.write_batch_size = min(
+                self.write_batch_size, self.client.get_max_batch_size()
+            )
 
         # Modelo de embeddings
         self.embedding_model = EmbeddingModel()
+        self.embedding_cache = (
+            ChunkEmbeddingCache(
+                settings.cache_dir,
+                self.embedding_model.model_name,
+                backend=self.embedding_model.backend,
+                quantization=self.embedding_model.quantization,
+            )
+            if settings.chunk_embedding_cache
+            else None
+        )
+
+        # Índice invertido para keyword search (junto a la persistencia de Chroma)
+        self.keyword_index = KeywordIndex(
+            Path(self.persist_dir) / f"{collection_name}_keyword_index.json"
+        )
+        # Texto normalizado en ingesta, para no repetir trabajo Unicode
+        self.normalized_store = NormalizedTextStore(
+            Path(self.persist_dir) / f"{collection_name}_normalized.jsonl"
+        )
+        # Tabla artículo -> chunks (metadata `article` del LegalChunker)
+        self.article_index = ArticleIndex(
+            Path(self.persist_dir) / f"{collection_name}_articles.json"
+        )
+        if len(self.keyword_index) != self.collection.count():
+            self.rebuild_keyword_index()
+        elif not self.article_index.persist_path.exists() and self.collection.count():
+            self.rebuild_article_index()
+
+    def backfill_normalized_text(self) -> int:
+        """
+        Migración: normaliza y guarda en el sidecar los chunks de la
+        colección que aún no tienen texto normalizado.
+
+        Returns:
+            Número de chunks completados
+        """
+        existing = self.normalized_store.load()
+        total = self.collection.count()
+        batch_size = 500
+        backfilled = 0
+
+        for offset in range(0, total, batch_size):
+            data = self.collection.get(include=[], limit=batch_size, offset=offset)
+            missing = [cid for cid in data.get("ids", []) if cid not in existing]
+            if not missing:
+                continue
+            docs = self.collection.get(ids=missing, include=["documents"])
+            self.normalized_store.append(
+                [
+                    (chunk_id, normalize_text(doc or ""))
+                    for chunk_id, doc in zip(docs["ids"], docs["documents"])
+                ]
+            )
+            backfilled += len(missing)
+
+        if backfilled:
+            print(f"✓ Texto normalizado completado para {backfilled} chunks")
+        return backfilled
+
+    def rebuild_keyword_index(self) -> None:
+        """Reconstruye el índice de keywords desde el texto normalizado."""
+        total = self.collection.count()
+        print(f"Reconstruyendo índice de keywords ({total} chunks)...")
+        self.backfill_normalized_text()
+
+        self.keyword_index.clear()
+        self.article_index.clear()
+        normalized = self.normalized_store.compact()
+        for offset in range(0, total, 500):
+            data = self.collection.get(include=["metadatas"], limit=500, offset=offset)
+            for chunk_id, metadata in zip(data.get("ids", []), data["metadatas"]):
+                self.keyword_index.add_normalized(
+                    chunk_id, normalized[chunk_id], metadata
+                )
+                self.article_index.add(chunk_id, metadata)
+        self.save_indexes()
+
+    def rebuild_article_index(self) -> None:
+        """Reconstruye la tabla artículo -> chunks desde la metadata."""
+        self.article_index.clear()
+        total = self.collection.count()
+        for offset in range(0, total, 500):
+            data = self.collection.get(include=["metadatas"], limit=500, offset=offset)
+            for chunk_id, metadata in zip(data.get("ids", []), data["metadatas"]):
+                self.article_index.add(chunk_id, metadata)
+        self.article_index.save()
+
+    def save_indexes(self) -> None:
+        """Persiste los índices auxiliares (keywords y artículos)."""
+        self.keyword_index.save()
+        self.article_index.save()
+
+    def add_chunks(
+        self,
+        chunks: list[Chunk],
+        batch_size: int | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ) -> int:
+        """
+        Añade chunks al vector store (upsert: los IDs existentes se reemplazan).
+
+        Escribe por batches de `batch_size` (default: settings) mientras el
+        siguiente batch se embebe en otro thread. Si la ingesta falla, los
+        batches ya escritos quedan completos y re-ejecutarla es idempotente.
 
-    def add_chunks(self, chunks: list[Chunk]) -> int:
+        Args:
+            chunks: Chunks a añadir
+            batch_size: Chunks por escritura
+            progress: Callback (chunks escritos, total) tras cada batch
+
+        Returns:
+            Número de chunks añadidos
+        """
+        if not chunks:
+            return 0
+
+        batch_size = min(batch_size or self.write_batch_size, self.write_batch_size)
+        batches = (
+            chunks[start : start + batch_size]
+            for start in range(0, len(chunks), batch_size)
+        )
+        embedded = threaded(
+            (
+                (batch, self.embed_documents([c.content for c in batch]))
+                for batch in batches
+            ),
+            maxsize=1,
+        )
+
+        added = 0
+        try:
+            for batch, embeddings in embedded:
+                added += self.add_embedded(batch, embeddings, save_index=False)
+                if progress:
+                    progress(added, len(chunks))
+        finally:
+            # Detener el thread de embeddings si la escritura falló
+            embedded.close()
+            # Lo escrito hasta un fallo también queda en los índices
+            self.save_indexes()
+        return added
+
+    def add_embedded(
+        self, chunks: list[Chunk], embeddings: np.ndarray, save_index: bool = True
+    ) -> int:
         """
-        Añade chunks al vector store.
-        Retorna el número de chunks añadidos.
+        Añade chunks con embeddings ya calculados (upsert).
+
+        Cada escritura a la colección va en bloques de `write_batch_size`;
+        el sidecar y el índice de keywords se actualizan tras cada bloque.
+        Con `save_index=False` los índices de keywords y artículos quedan en
+        memoria y el llamador debe guardarlos con save_indexes() (útil al
+        escribir por bloques).
         """
         if not chunks:
             return 0
 
-        # Preparar datos para ChromaDB
-        ids = [chunk.chunk_id for chunk in chunks]
-        documents = [chunk.content for chunk in chunks]
-        metadatas = [chunk.metadata for chunk in chunks]
+        for start in range(0, len(chunks), self.write_batch_size):
+            block = chunks[start : start + self.write_batch_size]
 
-        # Generar embeddings
-        print(f"Generando embeddings para {len(chunks)} chunks...")
-        embeddings = self.embedding_model.embed(documents)
+            # Preparar datos para ChromaDB
+            ids = [chunk.chunk_id for chunk in block]
+            documents = [chunk.content for chunk in block]
+            metadatas = [chunk.metadata for chunk in block]
 
-        # Añadir a la colección
-        self.collection.add(
-            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
-        )
+            # Añadir a la colección
+            self._upsert_with_retry(
+                ids, embeddings[start : start + len(block)], documents, metadatas
+            )
+
+            # Normalizar una sola vez por chunk: sidecar + índice de keywords
+            normalized = [
+                (cid, normalize_text(doc)) for cid, doc in zip(ids, documents)
+            ]
+            self.normalized_store.append(normalized)
+            for (chunk_id, normalized_text), metadata in zip(normalized, metadatas):
+                self.keyword_index.add_normalized(chunk_id, normalized_text, metadata)
+                self.article_index.add(chunk_id, metadata)
+
+        if save_index:
+            self.save_indexes()
 
         print(f"✓ Añadidos {len(chunks)} chunks al vector store")
         return len(chunks)
 
-    def search(self, query: str, top_k: int | None = None) -> list[dict]:
+    def _upsert_with_retry(
+        self,
+        ids: list[str],
+        embeddings: np.ndarray,
+        documents: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        """Upsert con reintentos y backoff exponencial (es idempotente)."""
+        for attempt in range(self.write_retries + 1):
+            try:
+                self.collection.upsert(
+                    ids=ids,
+                    embeddings=embeddings,
+                    documents=documents,
+                    metadatas=metadatas,
+                )
+                return
+            except Exception as e:
+                if attempt == self.write_retries:
+                    raise
+                delay = 0.5 * 2**attempt
+                print(
+                    f"⚠️ Error escribiendo {len(ids)} chunks ({e}), "
+                    f"reintentando en {delay:.1f}s..."
+                )
+                time.sleep(delay)
+
+    def embed_documents(self, documents: list[str]) -> np.ndarray:
+        """
+        Embeddings float32 de los documentos, en el orden original.
+
+        Usa el caché por contenido (si está activo) y solo pasa por el modelo
+        los textos nuevos, en batches de longitud similar.
+        """
+        cached = {}
+        keys = []
+        if self.embedding_cache is not None:
+            keys, cached = self.embedding_cache.lookup(documents)
+            if cached:
+                print(f"  Caché de embeddings: {len(cached)}/{len(documents)} hits")
+
+        missing = [i for i in range(len(documents)) if i not in cached]
+        dim = next(iter(cached.values())).shape[0] if cached else None
+        embeddings = np.empty((len(documents), dim), dtype=np.float32) if dim else None
+        for i, vector in cached.items():
+            embeddings[i] = vector
+
+        if missing:
+            print(f"Generando embeddings para {len(missing)} chunks...")
+            texts = [documents[i] for i in missing]
+            new = None
+            for indices, batch in self.embedding_model.embed_batches(texts):
+                if new is None:
+                    new = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+                new[indices] = batch
+            if embeddings is None:
+                embeddings = new
+            else:
+                embeddings[missing] = new
+            if self.embedding_cache is not None:
+                self.embedding_cache.add([keys[i] for i in missing], new)
+
+        return embeddings
+
+    def compact(self) -> int:
+        """
+        Libera lo reemplazado o borrado: filas muertas de la colección NumPy,
+        tombstones del sidecar de texto normalizado y los logs de cambios de
+        los índices de keywords y artículos (reescribe sus snapshots).
+
+        Returns:
+            Filas liberadas en la colección (0 con Chroma)
+        """
+        freed = self.collection.compact() if self.backend == "numpy" else 0
+        self.normalized_store.compact()
+        self.keyword_index.compact()
+        self.article_index.compact()
+        return freed
+
+    def compact_if_needed(self) -> int:
+        """
+        Compacta si la colección NumPy acumula más filas muertas que
+        `compact_dead_ratio` (se llama tras borrar y al final de la ingesta).
+
+        Returns:
+            Filas liberadas (0 si no hizo falta o con Chroma)
+        """
+        if self.backend != "numpy":
+            return 0
+        total = self.collection.count() + self.collection.dead_rows
+        if not total or self.collection.dead_rows <= self.compact_dead_ratio * total:
+            return 0
+        return self.compact()
+
+    def chunk_ids(self, where: dict | None = None) -> list[str]:
+        """IDs de los chunks que cumplen una cláusula `where`."""
+        return self.collection.get(where=where, include=[])["ids"]
+
+    def get_chunks(
+        self, chunk_ids: list[str], filters: dict | None = None
+    ) -> list[dict]:
+        """
+        Lee chunks por ID (en el orden dado) con el formato de `search`.
+
+        Sin scoring: se usa cuando el ID ya se conoce (ej. índice de
+        artículos), así que el score es 1.0.
+        """
+        if not chunk_ids:
+            return []
+        data = self.collection.get(
+            ids=chunk_ids,
+            where=build_where_clause(filters),
+            include=["documents", "metadatas"],
+        )
+        by_id = dict(zip(data["ids"], zip(data["documents"], data["metadatas"])))
+        return [
+            {
+                "chunk_id": chunk_id,
+                "content": by_id[chunk_id][0],
+                "metadata": by_id[chunk_id][1],
+                "distance": None,
+                "score": 1.0,
+                "score_vector": 0.0,
+                "score_keyword": 0.0,
+            }
+            for chunk_id in dict.fromkeys(chunk_ids)
+            if chunk_id in by_id
+        ]
+
+    def delete_chunks(self, chunk_ids: list[str]) -> int:
+        """
+        Elimina chunks del vector store, los índices de keywords y
+        artículos y el sidecar.
+        Retorna el número de chunks eliminados.
+        """
+        if not chunk_ids:
+            return 0
+        for start in range(0, len(chunk_ids), 500):
+            self.collection.delete(ids=chunk_ids[start : start + 500])
+        self.keyword_index.remove(chunk_ids)
+        self.article_index.remove(chunk_ids)
+        self.save_indexes()
+        self.normalized_store.remove(chunk_ids)
+        self.compact_if_needed()
+        return len(chunk_ids)
+
+    def delete_source(self, source: str) -> int:
+        """
+        Elimina todos los chunks de un documento (metadata `source`).
+        Retorna el número de chunks eliminados.
+        """
+        deleted = self.delete_chunks(self.chunk_ids({"source": source}))
+        if deleted:
+            print(f"✓ Eliminados {deleted} chunks de {source}")
+        return deleted
+
+    def search(
+        self, query: str, top_k: int | None = None, filters: dict | None = None
+    ) -> list[dict]:
         """
         Busca chunks similares a la query.
         Retorna lista de resultados con content, metadata y score.
+
+        filters (source, source_type, page_from, page_to) se aplican dentro
+        de Chroma y del índice de keywords, no sobre el resultado.
         """
         settings = get_settings()
         top_k = top_k or settings.top_k_results
@@ -107,7 +628,7 @@ class VectorStore:
             f"   [VectorStore.search] hybrid_search={settings.hybrid_search}, query='{query[:50]}...'"
         )
 
-        vector_results = self._vector_search(query, top_k)
+        vector_results = self._vector_search(query, top_k, filters)
         if not settings.hybrid_search:
             print("   [VectorStore.search] Usando SOLO vector search")
             return vector_results
@@ -115,7 +636,7 @@ class VectorStore:
         print(
             f"   [VectorStore.search] Usando HYBRID search (vector_weight={settings.vector_weight}, keyword_weight={settings.keyword_weight})"
         )
-        keyword_results = self._keyword_search(query, top_k)
+        keyword_results = self._keyword_search(query, top_k, filters)
         print(
             f"   [VectorStore.search] keyword_results: {len(keyword_results)} matches"
         )
@@ -132,25 +653,85 @@ class VectorStore:
         )
         return merged
 
-    def _vector_search(self, query: str, top_k: int) -> list[dict]:
-        """Busca por similitud vectorial en ChromaDB."""
+    def search_many(
+        self,
+        queries: list[str],
+        top_k: int | None = None,
+        filters: dict | None = None,
+    ) -> list[list[dict]]:
+        """
+        Busca varias queries a la vez.
+
+        Usa un solo batch de embeddings, una sola consulta multi-vector a
+        Chroma y una sola lectura de documentos para los resultados keyword.
+        Retorna una lista de resultados por query, en el mismo orden.
+        """
+        if not queries:
+            return []
+
+        settings = get_settings()
+        top_k = top_k or settings.top_k_results
+        print(f"   [VectorStore.search_many] {len(queries)} queries, top_k={top_k}")
+
+        vector_results = self._vector_search_many(queries, top_k, filters)
+        if not settings.hybrid_search:
+            return vector_results
+
+        keyword_results = [
+            self._score_keywords(query, top_k, filters) for query in queries
+        ]
+        self._attach_documents([r for results in keyword_results for r in results])
+
+        return [
+            self._merge_results(
+                vector,
+                keyword,
+                top_k,
+                settings.vector_weight,
+                settings.keyword_weight,
+            )
+            for vector, keyword in zip(vector_results, keyword_results)
+        ]
+
+    def _vector_search(
+        self, query: str, top_k: int, filters: dict | None = None
+    ) -> list[dict]:
+        """Busca por similitud vectorial en el backend configurado."""
         query_embedding = self.embedding_model.embed_query(query)
 
         results = self.collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
+            where=build_where_clause(filters),
+            include=["documents", "metadatas", "distances"],
+        )
+        return self._format_vector_results(results, 0)
+
+    def _vector_search_many(
+        self, queries: list[str], top_k: int, filters: dict | None = None
+    ) -> list[list[dict]]:
+        """Busqueda vectorial de varias queries en una sola consulta."""
+        query_embeddings = self.embedding_model.embed_queries(queries)
+
+        results = self.collection.query(
+            query_embeddings=query_embeddings,
+            n_results=top_k,
+            where=build_where_clause(filters),
             include=["documents", "metadatas", "distances"],
         )
+        return [self._format_vector_results(results, i) for i in range(len(queries))]
 
+    def _format_vector_results(self, results: dict, query_idx: int) -> list[dict]:
+        """Convierte la respuesta de Chroma de una query al formato interno."""
         formatted_results = []
-        for i in range(len(results["ids"][0])):
-            distance = results["distances"][0][i]
+        for i in range(len(results["ids"][query_idx])):
+            distance = results["distances"][query_idx][i]
             score = max(0.0, min(1.0, 1 - distance))
             formatted_results.append(
                 {
-                    "chunk_id": results["ids"][0][i],
-                    "content": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
+                    "chunk_id": results["ids"][query_idx][i],
+                    "content": results["documents"][query_idx][i],
+                    "metadata": results["metadatas"][query_idx][i],
                     "distance": distance,
                     "score": score,
                     "score_vector": score,
@@ -159,8 +740,19 @@ class VectorStore:
             )
         return formatted_results
 
-    def _keyword_search(self, query: str, top_k: int) -> list[dict]:
+    def _keyword_search(
+        self, query: str, top_k: int, filters: dict | None = None
+    ) -> list[dict]:
         """Busca por coincidencias de palabras clave."""
+        scored = self._score_keywords(query, top_k, filters)
+        # Solo se leen de Chroma el contenido y metadata del top_k final
+        self._attach_documents(scored)
+        return scored
+
+    def _score_keywords(
+        self, query: str, top_k: int, filters: dict | None = None
+    ) -> list[dict]:
+        """Calcula el top_k keyword usando solo el índice (sin content)."""
         normalized_query = self._normalize_text(query)
         tokens = self._tokenize(normalized_query)
         phrases = self._extract_phrases(tokens)
@@ -171,67 +763,75 @@ class VectorStore:
             print("   [_keyword_search] No tokens found, returning empty")
             return []
 
-        scored = []
-        total = self.collection.count()
-        batch_size = 500
-        offset = 0
-
-        while offset < total:
-            data = self.collection.get(
-                include=["documents", "metadatas"], limit=batch_size, offset=offset
+        # Solo se revisan los chunks que contienen algún token de la query
+        settings = get_settings()
+        candidates = self.keyword_index.match(tokens, filters)
+        bm25_scores = None
+        if settings.keyword_backend == "bm25":
+            bm25_scores = self.keyword_index.bm25(
+                tokens, k1=settings.bm25_k1, b=settings.bm25_b, filters=filters
             )
-            ids = data.get("ids", [])
-            documents = data.get("documents", [])
-            metadatas = data.get("metadatas", [])
-
-            for idx, doc in enumerate(documents):
-                doc_text = self._normalize_text(doc or "")
-                if not doc_text:
-                    continue
-
-                score = 0.0
-                token_hits = 0
-                for token in tokens:
-                    if token in doc_text:
-                        hits = doc_text.count(token)
-                        score += hits
-                        token_hits += 1
-
-                phrase_matches = 0
-                for phrase in phrases:
-                    if phrase in doc_text:
-                        score += len(tokens) * 1.5
-                        phrase_matches += 1
-
-                exact_match = normalized_query in doc_text
+        print(
+            f"   [_keyword_search] backend={settings.keyword_backend}, candidates={len(candidates)}"
+        )
+
+        # Frases y query exacta se resuelven por intersección de posiciones
+        phrase_counts = self.keyword_index.phrase_matches(phrases, filters)
+        exact_ids = self.keyword_index.exact_matches(normalized_query, filters)
+
+        scored = []
+        for chunk_id, token_counts in candidates.items():
+            score = float(sum(token_counts.values()))
+            phrase_matches = phrase_counts.get(chunk_id, 0)
+            exact_match = chunk_id in exact_ids
+
+            if bm25_scores is not None:
+                # BM25 ya pondera frecuencia y longitud; frases y match
+                # exacto escalan el score en vez de sumar conteos crudos
+                score = bm25_scores[chunk_id] * (
+                    1 + 0.5 * phrase_matches + (1.0 if exact_match else 0.0)
+                )
+            else:
+                score += phrase_matches * len(tokens) * 1.5
                 if exact_match:
                     score += len(tokens) * 2.0
 
-                if score > 0:
-                    scored.append(
-                        {
-                            "chunk_id": ids[idx],
-                            "content": doc,
-                            "metadata": metadatas[idx],
-                            "distance": None,
-                            "score": score,
-                            "score_vector": 0.0,
-                            "score_keyword": score,
-                            "exact_match": exact_match,
-                            "token_hits": token_hits,
-                            "phrase_matches": phrase_matches,
-                        }
-                    )
-
-            offset += batch_size
+            scored.append(
+                {
+                    "chunk_id": chunk_id,
+                    "distance": None,
+                    "score": score,
+                    "score_vector": 0.0,
+                    "score_keyword": score,
+                    "exact_match": exact_match,
+                    "token_hits": len(token_counts),
+                    "phrase_matches": phrase_matches,
+                }
+            )
 
         print(f"   [_keyword_search] Total scored matches: {len(scored)}")
+        scored.sort(key=lambda x: x["score"], reverse=True)
+        scored = scored[:top_k]
         if scored:
-            print(
-                f"   [_keyword_search] Top match score: {scored[0]['score'] if scored else 0}"
+            print(f"   [_keyword_search] Top match score: {scored[0]['score']}")
+        return scored
+
+    def _attach_documents(self, results: list[dict]) -> None:
+        """Completa content y metadata de resultados a partir de sus ids."""
+        if not results:
+            return
+        ids = list(dict.fromkeys(r["chunk_id"] for r in results))
+        data = self.collection.get(ids=ids, include=["documents", "metadatas"])
+        by_id = {
+            chunk_id: (doc, meta)
+            for chunk_id, doc, meta in zip(
+                data.get("ids", []),
+                data.get("documents", []),
+                data.get("metadatas", []),
             )
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        }
+        for res in results:
+            res["content"], res["metadata"] = by_id.get(res["chunk_id"], ("", {}))
 
     def _merge_results(
         self,
@@ -292,87 +892,15 @@ class VectorStore:
 
     def _normalize_text(self, text: str) -> str:
         """Normaliza texto para comparaciones simples."""
-        normalized = unicodedata.normalize("NFD", text)
-        normalized = "".join(
-            char for char in normalized if unicodedata.category(char) != "Mn"
-        )
-        normalized = normalized.lower()
-        normalized = re.sub(r"[^a-z0-9]+", " ", normalized)
-        return re.sub(r"\s+", " ", normalized).strip()
+        return normalize_text(text)
 
     def _tokenize(self, text: str) -> list[str]:
         """Tokeniza texto en palabras relevantes."""
-        tokens = re.findall(r"\b\w+\b", text)
-        stopwords = {
-            "de",
-            "del",
-            "la",
-            "el",
-            "los",
-            "las",
-            "un",
-            "una",
-            "unos",
-            "unas",
-            "y",
-            "o",
-            "u",
-            "que",
-            "como",
-            "para",
-            "por",
-            "sobre",
-            "en",
-            "al",
-            "se",
-            "es",
-        }
-        roman = {
-            "i",
-            "ii",
-            "iii",
-            "iv",
-            "v",
-            "vi",
-            "vii",
-            "viii",
-            "ix",
-            "x",
-            "xi",
-            "xii",
-            "xiii",
-            "xiv",
-            "xv",
-            "xvi",
-            "xvii",
-            "xviii",
-            "xix",
-            "xx",
-        }
-        filtered = []
-        for token in tokens:
-            if token in stopwords:
-                continue
-            if len(token) >= 3 or token in roman:
-                filtered.append(token)
-        return filtered
+        return tokenize(text)
 
     def _extract_phrases(self, tokens: list[str]) -> list[str]:
         """Construye bigramas y trigramas para boosting."""
-        phrases = []
-        for i in range(len(tokens) - 1):
-            phrases.append(f"{tokens[i]} {tokens[i + 1]}")
-        for i in range(len(tokens) - 2):
-            phrases.append(f"{tokens[i]} {tokens[i + 1]} {tokens[i + 2]}")
-        # Deduplicar manteniendo orden
-        seen = set()
-        deduped = []
-        for phrase in phrases:
-            if phrase in seen:
-                continue
-            seen.add(phrase)
-            deduped.append(phrase)
-        return deduped
+        return extract_phrases(tokens)
 
     def count(self) -> int:
         """Retorna el número de chunks en el store"""
@@ -380,12 +908,18 @@ class VectorStore:
 
     def clear(self):
         """Elimina todos los documentos de la colección"""
-        self.client.delete_collection(self.collection_name)
-        self.collection = self.client.create_collection(
-            name=self.collection_name,
-            metadata={
-                "description": "RAG Estado Peru documents",
-                "hnsw:space": "cosine",
-            },
-        )
+        if self.backend == "numpy":
+            self.collection.clear()
+        else:
+            self.client.delete_collection(self.collection_name)
+            self.collection = self.client.create_collection(
+                name=self.collection_name,
+                metadata={
+                    "description": "RAG Estado Peru documents",
+                    "hnsw:space": "cosine",
+                },
+            )
+        self.keyword_index.clear()
+        self.article_index.clear()
+        self.normalized_store.clear()
         print("✓ Vector store limpiado")
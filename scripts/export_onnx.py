@@ -0,0 +1,84 @@
+"""
+Script para exportar el modelo de embeddings a ONNX y validar el backend.
+
+Exporta (y opcionalmente cuantiza) el modelo configurado en EMBEDDING_MODEL
+y compara sus embeddings con los de PyTorch mediante similitud coseno.
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar root al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+
+from packages.rag_core import get_settings
+from packages.rag_core.eval import EvalDataset
+from packages.rag_core.onnx_backend import check_agreement, export_model
+
+SAMPLE_TEXTS = [
+    "Artículo 43.- Plazos de prescripción. La acción de la Administración "
+    "Tributaria para determinar la obligación tributaria prescribe a los "
+    "cuatro (4) años.",
+    "NORMA XV: UNIDAD IMPOSITIVA TRIBUTARIA",
+    "Las disposiciones finales del código entran en vigencia al día siguiente.",
+]
+
+
+def main():
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(
+        description="Exporta el modelo de embeddings a ONNX y valida su precisión"
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=settings.embedding_model,
+        help=f"Modelo a exportar (default: {settings.embedding_model})",
+    )
+    parser.add_argument(
+        "--quantize",
+        action="store_true",
+        default=settings.onnx_quantize,
+        help="Generar también la versión con cuantización dinámica int8",
+    )
+    parser.add_argument(
+        "--min-cosine",
+        type=float,
+        default=0.99,
+        help="Similitud coseno mínima aceptable vs. PyTorch (default: 0.99)",
+    )
+
+    args = parser.parse_args()
+
+    model_dir = export_model(
+        args.model, settings.onnx_cache_dir, quantize=args.quantize
+    )
+    print(f"Modelo ONNX en: {model_dir}\n")
+
+    texts = SAMPLE_TEXTS + [item.question for item in EvalDataset.create_sample()]
+    variants = [False, True] if args.quantize else [False]
+
+    ok = True
+    for quantize in variants:
+        result = check_agreement(
+            args.model, texts, cache_dir=settings.onnx_cache_dir, quantize=quantize
+        )
+        label = "int8" if quantize else "fp32"
+        status = "✓" if result["min_cosine"] >= args.min_cosine else "✗"
+        ok = ok and status == "✓"
+        print(
+            f"{status} ONNX {label}: coseno min={result['min_cosine']:.4f} "
+            f"promedio={result['mean_cosine']:.4f} ({result['texts']} textos)"
+        )
+
+    if not ok:
+        print(f"\n✗ Coincidencia por debajo de {args.min_cosine}")
+        sys.exit(1)
+    print("\n✓ Backend ONNX validado. Usa EMBEDDING_BACKEND=onnx")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,16 +27,79 @@ def main():
     parser.add_argument(
         "--clear", action="store_true", help="Limpiar el vector store antes de ingestar"
     )
+    parser.add_argument(
+        "--incremental",
+        "-i",
+        action="store_true",
+        help="Solo ingestar archivos nuevos o modificados (según el manifest)",
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=None,
+        help="Procesos para generar embeddings (default: EMBEDDING_WORKERS)",
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        default=None,
+        help="Procesos para extraer PDFs por rangos de páginas (default: PDF_WORKERS)",
+    )
+    parser.add_argument(
+        "--torch-threads",
+        type=int,
+        default=None,
+        help="Threads por worker (default: EMBEDDING_WORKER_THREADS)",
+    )
+
+    parser.add_argument(
+        "--replace",
+        type=str,
+        metavar="ARCHIVO",
+        help="Reemplazar un solo documento ya indexado por esta versión",
+    )
+    parser.add_argument(
+        "--delete",
+        type=str,
+        metavar="DOCUMENTO",
+        help="Eliminar un documento por nombre (ej. Codigo-Tributario.pdf)",
+    )
 
     args = parser.parse_args()
 
     pipeline = RAGPipeline()
 
+    if args.delete:
+        result = pipeline.delete_source(args.delete)
+        if result["status"] == "success":
+            print(f"\n✓ Eliminados {result['deleted_chunks']} chunks de {args.delete}")
+        else:
+            print(f"\n✗ Documento no encontrado: {args.delete}")
+        return
+
+    if args.replace:
+        result = pipeline.replace_source(args.replace)
+        print(
+            f"\n✓ {args.replace} reemplazado: {result['chunks']} chunks escritos, "
+            f"{result['deleted_chunks']} eliminados"
+        )
+        return
+
     if args.clear:
         print("Limpiando vector store...")
         pipeline.clear()
 
-    result = pipeline.ingest_directory(args.directory)
+    result = pipeline.ingest_directory(
+        args.directory,
+        workers=args.workers,
+        worker_threads=args.torch_threads,
+        incremental=args.incremental,
+        pdf_workers=args.pdf_workers,
+        progress=lambda written, total: print(
+            f"   Progreso: {written}/{total} chunks escritos"
+        ),
+    )
 
     if result["status"] == "success":
         print("\n✓ Ingesta exitosa!")
@@ -0,0 +1,54 @@
+"""
+Script de migración: completa el texto normalizado y el índice de keywords
+de colecciones creadas antes de que existieran.
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar root al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+
+from packages.rag_core import VectorStore
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Backfill del texto normalizado e índice de keywords"
+    )
+    parser.add_argument(
+        "--collection",
+        type=str,
+        default="rag_documents",
+        help="Nombre de la colección (default: rag_documents)",
+    )
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Reconstruir el índice aunque parezca sincronizado",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Liberar filas borradas o reemplazadas (backend numpy) y tombstones",
+    )
+
+    args = parser.parse_args()
+
+    # Al inicializar, VectorStore ya reconstruye el índice si no coincide
+    store = VectorStore(collection_name=args.collection)
+
+    backfilled = store.backfill_normalized_text()
+    if args.rebuild or backfilled:
+        store.rebuild_keyword_index()
+    if args.compact:
+        freed = store.compact()
+        print(f"✓ Compactación: {freed} filas liberadas")
+
+    print(f"\n✓ Migración completada: {store.count()} chunks indexados")
+
+
+if __name__ == "__main__":
+    main()
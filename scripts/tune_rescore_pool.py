@@ -0,0 +1,93 @@
+"""
+Script para elegir el tamaño del pool de re-scoring de la búsqueda cuantizada.
+
+Compara el top-k de la búsqueda cuantizada con el de la búsqueda exacta
+para varios tamaños de pool y recomienda el menor que alcanza el recall
+objetivo. Requiere VECTOR_BACKEND=numpy y VECTOR_QUANTIZATION=int8|binary.
+"""
+
+import sys
+from pathlib import Path
+
+# Agregar root al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import argparse
+import time
+
+from packages.rag_core import VectorStore
+from packages.rag_core.eval import EvalDataset
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mide recall@k de la búsqueda cuantizada vs. exacta"
+    )
+    parser.add_argument(
+        "--collection",
+        type=str,
+        default="rag_documents",
+        help="Nombre de la colección (default: rag_documents)",
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default=None,
+        help="Dataset JSONL con preguntas (default: dataset de ejemplo)",
+    )
+    parser.add_argument(
+        "--top-k", "-k", type=int, default=5, help="k para el recall (default: 5)"
+    )
+    parser.add_argument(
+        "--pools",
+        type=int,
+        nargs="+",
+        default=[20, 50, 100, 200, 400],
+        help="Tamaños de pool a evaluar",
+    )
+    parser.add_argument(
+        "--target",
+        type=float,
+        default=0.99,
+        help="Recall objetivo (default: 0.99)",
+    )
+
+    args = parser.parse_args()
+
+    store = VectorStore(collection_name=args.collection)
+    if getattr(store.collection, "quantization", "none") == "none":
+        print("✗ La colección no está cuantizada.")
+        print("  Configura VECTOR_BACKEND=numpy y VECTOR_QUANTIZATION=int8|binary")
+        sys.exit(1)
+
+    dataset = (
+        EvalDataset.load(args.dataset) if args.dataset else EvalDataset.create_sample()
+    )
+    questions = [item.question for item in dataset]
+    print(f"Colección: {store.count()} chunks ({store.collection.quantization})")
+    print(f"Preguntas: {len(questions)}  |  k={args.top_k}\n")
+
+    query_embeddings = store.embedding_model.embed_queries(questions)
+
+    start = time.perf_counter()
+    recalls = store.collection.measure_recall(
+        query_embeddings, k=args.top_k, pool_sizes=sorted(args.pools)
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"{'Pool':>8}  {'Recall@k':>9}")
+    for pool, recall in recalls.items():
+        print(f"{pool:>8}  {recall:>9.3f}")
+    print(f"\n(medición en {elapsed:.2f}s)")
+
+    recommended = next(
+        (pool for pool, recall in recalls.items() if recall >= args.target), None
+    )
+    if recommended is None:
+        print(f"\n⚠ Ningún pool alcanza recall {args.target:.2f}; prueba pools mayores")
+    else:
+        print(f"\n✓ Recomendado: RESCORE_POOL={recommended}")
+
+
+if __name__ == "__main__":
+    main()
@@ -19,13 +19,16 @@ from fastapi.staticfiles import StaticFiles  # noqa: E402
 from packages.rag_core import RAGPipeline, __version__  # noqa: E402
 
 from .schemas import (  # noqa: E402
+    BatchSearchRequest,
     Citation,
     DebugSearchRequest,
+    DeleteSourceResponse,
     HealthResponse,
     IngestRequest,
     IngestResponse,
     QueryRequest,
     QueryResponse,
+    ReplaceRequest,
     StatsResponse,
 )
 
@@ -92,13 +95,16 @@ async def query(request: QueryRequest):
         )
 
     try:
-        result = pipeline.query(request.question, top_k=request.top_k)
+        result = pipeline.query(
+            request.question, top_k=request.top_k, filters=request.filters()
+        )
 
         # Convertir citations al schema
         citations = [
             Citation(
                 source=c.get("source", "Desconocido"),
                 page=c.get("page"),
+                also_in=c.get("also_in", []),
                 quote=c.get("quote", c.get("excerpt", "")),
                 relevance_score=c.get("relevance_score", 0),
             )
@@ -135,29 +141,57 @@ async def debug_chunks(request: QueryRequest):
         pass
 
     top_k = request.top_k or pipeline.settings.top_k_results
-    chunks = pipeline.vector_store.search(normalized, top_k=top_k)
+    chunks = pipeline.vector_store.search(
+        normalized, top_k=top_k, filters=request.filters()
+    )
     return {
         "question": request.question,
         "normalized": normalized,
         "top_k": top_k,
-        "chunks": [
-            {
-                "score": c.get("score", 0),
-                "score_vector": c.get("score_vector"),
-                "score_keyword": c.get("score_keyword"),
-                "exact_match": c.get("exact_match"),
-                "token_hits": c.get("token_hits"),
-                "phrase_matches": c.get("phrase_matches"),
-                "content": c.get("content", ""),
-                "source": c.get("metadata", {}).get("source"),
-                "page": c.get("metadata", {}).get("page"),
-                "source_path": c.get("metadata", {}).get("source_path"),
-            }
-            for c in chunks
+        "filters": request.filters(),
+        "chunks": [_format_chunk(c) for c in chunks],
+    }
+
+
+@app.post("/search/batch", tags=["RAG"])
+async def search_batch(request: BatchSearchRequest):
+    """
+    Recupera chunks para varias preguntas en una sola llamada.
+
+    Los embeddings y la consulta al vector store se hacen en batch,
+    mucho más rápido que llamar /debug/chunks una vez por pregunta.
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline no inicializado")
+
+    top_k = request.top_k or pipeline.settings.top_k_results
+    results = pipeline.retrieve_many(request.questions, top_k=top_k)
+    return {
+        "top_k": top_k,
+        "results": [
+            {"question": question, "chunks": [_format_chunk(c) for c in chunks]}
+            for question, chunks in zip(request.questions, results)
         ],
     }
 
 
+def _format_chunk(chunk: dict) -> dict:
+    """Formato de un chunk recuperado para respuestas de debug/búsqueda"""
+    metadata = chunk.get("metadata", {})
+    return {
+        "score": chunk.get("score", 0),
+        "score_vector": chunk.get("score_vector"),
+        "score_keyword": chunk.get("score_keyword"),
+        "exact_match": chunk.get("exact_match"),
+        "token_hits": chunk.get("token_hits"),
+        "phrase_matches": chunk.get("phrase_matches"),
+        "content": chunk.get("content", ""),
+        "source": metadata.get("source"),
+        "page": metadata.get("page"),
+        "source_path": metadata.get("source_path"),
+    }
+
+
 @app.post("/debug/pdf-search", tags=["Debug"])
 async def debug_pdf_search(request: DebugSearchRequest):
     """
@@ -228,12 +262,13 @@ async def query_stream(request: QueryRequest):
     async def generate():
         try:
             # Primero verificar caché
-            from packages.rag_core.pipeline import normalize_query
+            from packages.rag_core.pipeline import cache_key_for, normalize_query
 
             normalized = normalize_query(request.question)
+            cache_key = cache_key_for(normalized, request.filters())
 
             if pipeline.enable_cache:
-                cached = pipeline.cache.get(normalized)
+                cached = pipeline.cache.get(cache_key)
                 if cached:
                     # Enviar respuesta cacheada de inmediato
                     cached["from_cache"] = True
@@ -242,7 +277,9 @@ async def query_stream(request: QueryRequest):
 
             # Obtener chunks relevantes
             relevant_chunks = pipeline.vector_store.search(
-                normalized, top_k=request.top_k or pipeline.settings.top_k_results
+                normalized,
+                top_k=request.top_k or pipeline.settings.top_k_results,
+                filters=request.filters(),
             )
 
             # Hacer routing si está habilitado
@@ -270,7 +307,7 @@ async def query_stream(request: QueryRequest):
 
             # Guardar en caché
             if pipeline.enable_cache and not result.get("refusal"):
-                pipeline.cache.set(normalized, result)
+                pipeline.cache.set(cache_key, result)
 
             # Enviar resultado final
             yield f"data: {json.dumps({'type': 'done', 'result': result})}\n\n"
@@ -319,6 +356,39 @@ async def ingest(request: IngestRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.put("/documents", response_model=IngestResponse, tags=["RAG"])
+async def replace_document(request: ReplaceRequest):
+    """
+    Reemplaza un documento ya indexado por su nueva versión.
+
+    Solo re-procesa ese archivo: elimina sus chunks obsoletos e invalida
+    las respuestas cacheadas que lo citan.
+    """
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline no inicializado")
+
+    try:
+        return IngestResponse(**pipeline.replace_source(request.file_path))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/documents/{source}", response_model=DeleteSourceResponse, tags=["RAG"])
+async def delete_document(source: str):
+    """Elimina un documento (por nombre) sin limpiar el resto del índice"""
+    if pipeline is None:
+        raise HTTPException(status_code=503, detail="Pipeline no inicializado")
+
+    result = pipeline.delete_source(source)
+    if result["status"] == "not_found":
+        raise HTTPException(
+            status_code=404, detail=f"Documento no encontrado: {source}"
+        )
+    return DeleteSourceResponse(**result)
+
+
 @app.delete("/clear", tags=["RAG"])
 async def clear_index():
     """Elimina todos los documentos del vector store"""
@@ -354,13 +424,17 @@ async def debug_settings():
         "hybrid_search": settings.hybrid_search,
         "vector_weight": settings.vector_weight,
         "keyword_weight": settings.keyword_weight,
+        "keyword_backend": settings.keyword_backend,
         "llm_provider": settings.llm_provider,
         "groq_model": settings.groq_model,
         "gemini_model": settings.gemini_model,
         "top_k_results": settings.top_k_results,
         "chunk_size": settings.chunk_size,
+        "chunking_strategy": settings.chunking_strategy,
         "embedding_model": settings.embedding_model,
         "chroma_persist_dir": settings.chroma_persist_dir,
+        "vector_backend": settings.vector_backend,
+        "vector_quantization": settings.vector_quantization,
     }
 
 
@@ -381,7 +455,9 @@ async def debug_llm(request: QueryRequest):
     try:
         # Normalizar y buscar chunks
         normalized = normalize_query(request.question)
-        chunks = pipeline.vector_store.search(normalized, top_k=request.top_k or 5)
+        chunks = pipeline.vector_store.search(
+            normalized, top_k=request.top_k or 5, filters=request.filters()
+        )
 
         # Hacer routing
         routing_decision = None
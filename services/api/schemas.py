@@ -12,6 +12,34 @@ class QueryRequest(BaseModel):
     top_k: int | None = Field(
         None, ge=1, le=20, description="Número de chunks a recuperar"
     )
+    source: str | None = Field(
+        None, description="Solo buscar en este documento (ej. Codigo-Tributario.pdf)"
+    )
+    source_type: str | None = Field(None, description="Tipo de fuente: pdf o html")
+    page_from: int | None = Field(None, ge=1, description="Página inicial")
+    page_to: int | None = Field(None, ge=1, description="Página final")
+
+    def filters(self) -> dict | None:
+        """Filtros de búsqueda activos (None si no hay ninguno)"""
+        filters = {
+            "source": self.source,
+            "source_type": self.source_type,
+            "page_from": self.page_from,
+            "page_to": self.page_to,
+        }
+        active = {k: v for k, v in filters.items() if v is not None}
+        return active or None
+
+
+class BatchSearchRequest(BaseModel):
+    """Request para recuperar chunks de varias preguntas a la vez"""
+
+    questions: list[str] = Field(
+        ..., min_length=1, max_length=100, description="Preguntas a buscar"
+    )
+    top_k: int | None = Field(
+        None, ge=1, le=20, description="Número de chunks a recuperar por pregunta"
+    )
 
 
 class Citation(BaseModel):
@@ -19,6 +47,9 @@ class Citation(BaseModel):
 
     source: str
     page: int | None = None
+    also_in: list[int] = Field(
+        default_factory=list, description="Otras páginas con el mismo texto"
+    )
     quote: str | None = None
     relevance_score: float = 0.0
 
@@ -49,10 +80,29 @@ class IngestResponse(BaseModel):
     documents: int | None = None
     pages: int | None = None
     chunks: int | None = None
+    duplicate_chunks: int | None = None
     total_indexed: int | None = None
+    deleted_chunks: int | None = None
+    file_timings: dict[str, float] | None = None
     message: str | None = None
 
 
+class ReplaceRequest(BaseModel):
+    """Request para reemplazar un documento ya indexado"""
+
+    file_path: str = Field(..., description="Ruta a la nueva versión del PDF/HTML")
+
+
+class DeleteSourceResponse(BaseModel):
+    """Response de eliminación de un documento"""
+
+    status: str
+    source: str
+    deleted_chunks: int
+    invalidated_cache_entries: int = 0
+    total_indexed: int | None = None
+
+
 class CacheStats(BaseModel):
     """Estadísticas del caché"""
 
@@ -0,0 +1,106 @@
+"""
+Fixtures compartidas: modelo de embeddings diminuto y settings aislados
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Vocabulario del modelo de prueba (las palabras fuera de él van a [UNK])
+_VOCAB = [
+    "[PAD]",
+    "[UNK]",
+    "[CLS]",
+    "[SEP]",
+    "[MASK]",
+    "articulo",
+    "codigo",
+    "tributario",
+    "impuesto",
+    "renta",
+    "deuda",
+    "plazo",
+    "pago",
+    "multa",
+    "sancion",
+    "contribuyente",
+    "obligacion",
+    "tributaria",
+    "prescripcion",
+    "unidad",
+    "impositiva",
+    "la",
+    "el",
+    "de",
+    "del",
+    "que",
+    "es",
+    "en",
+]
+
+
+@pytest.fixture(scope="session")
+def tiny_model_path(tmp_path_factory) -> str:
+    """
+    Modelo sentence-transformers local y diminuto (BERT de 2 capas, 32
+    dimensiones, pesos con semilla fija), para tests sin descargas.
+    """
+    torch = pytest.importorskip("torch")
+    transformers = pytest.importorskip("transformers")
+    st = pytest.importorskip("sentence_transformers")
+    models = pytest.importorskip("sentence_transformers.models")
+
+    root = tmp_path_factory.mktemp("tiny_model")
+    bert_dir = root / "bert"
+    bert_dir.mkdir()
+    (bert_dir / "vocab.txt").write_text("\n".join(_VOCAB) + "\n", encoding="utf-8")
+    transformers.BertTokenizerFast(
+        vocab_file=str(bert_dir / "vocab.txt"), do_lower_case=True
+    ).save_pretrained(bert_dir)
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(_VOCAB),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=64,
+    )
+    transformers.BertModel(config).save_pretrained(bert_dir)
+
+    encoder = models.Transformer(str(bert_dir), max_seq_length=32)
+    pooling = models.Pooling(encoder.get_word_embedding_dimension(), "mean")
+    model_dir = root / "st"
+    st.SentenceTransformer(modules=[encoder, pooling]).save(str(model_dir))
+    return str(model_dir)
+
+
+@pytest.fixture
+def rag_settings(tmp_path, monkeypatch, tiny_model_path):
+    """
+    Settings apuntando al modelo diminuto y a directorios temporales.
+
+    Limpia el caché de get_settings() y el singleton del caché de queries
+    para que cada test parta de un estado aislado.
+    """
+    from packages.rag_core import embedding_cache
+    from packages.rag_core.config import get_settings
+
+    env = {
+        "EMBEDDING_MODEL": tiny_model_path,
+        "EMBEDDING_BACKEND": "torch",
+        "CACHE_DIR": str(tmp_path / "cache"),
+        "CHROMA_PERSIST_DIR": str(tmp_path / "chroma"),
+        "ONNX_CACHE_DIR": str(tmp_path / "onnx"),
+        "EXTRACTION_CACHE_PATH": str(tmp_path / "extraction.sqlite"),
+        "QUERY_EMBEDDING_CACHE_PERSIST": "false",
+    }
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.setattr(embedding_cache, "_query_cache_instance", None)
+    get_settings.cache_clear()
+    yield get_settings()
+    get_settings.cache_clear()
@@ -77,6 +77,21 @@ class TestAPISmoke:
 
         assert response.status_code == 400
 
+    def test_delete_unknown_document(self, client):
+        """DELETE /documents/{source} retorna 404 si el documento no existe"""
+        response = client.delete("/documents/no-existe.pdf")
+
+        assert response.status_code == 404
+
+    def test_search_batch_validation(self, client):
+        """POST /search/batch requiere al menos una pregunta"""
+        response = client.post(
+            "/search/batch",
+            json={"questions": []}
+        )
+
+        assert response.status_code == 422
+
     def test_openapi_docs(self, client):
         """Documentación OpenAPI disponible"""
         response = client.get("/openapi.json")
@@ -0,0 +1,59 @@
+"""
+Tests para el índice de artículos
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.article_index import ArticleIndex, normalize_article
+
+
+class TestArticleIndex:
+    """Tests para ArticleIndex"""
+
+    def test_normalize_article(self):
+        assert normalize_article("Artículo 43°") == "43"
+        assert normalize_article("art. 102 - a") == "102-A"
+        assert normalize_article("Norma iv") == "NORMA IV"
+        assert normalize_article("Primera Disposición Final") == "PRIMERA DISPOSICION FINAL"
+
+    def test_lookup_remove_and_persist(self, tmp_path):
+        index = ArticleIndex(tmp_path / "articles.json")
+        index.add("c1", {"source": "codigo.pdf", "article": "43"})
+        index.add("c2", {"source": "codigo.pdf", "article": "43"})
+        index.add("c3", {"source": "ley.pdf", "article": "43"})
+        index.add("c4", {"source": "ley.pdf"})
+
+        assert index.lookup("Artículo 43º") == ["c1", "c2", "c3"]
+        assert index.lookup("43", source="ley.pdf") == ["c3"]
+        assert len(index) == 3
+
+        index.remove(["c2", "c3"])
+        index.save()
+
+        reloaded = ArticleIndex(tmp_path / "articles.json")
+        assert reloaded.lookup("43") == ["c1"]
+        assert reloaded.articles("ley.pdf") == []
+
+    def test_save_appends_changes_to_log(self, tmp_path):
+        index = ArticleIndex(tmp_path / "articles.json")
+        for i in range(1, 6):
+            index.add(f"c{i}", {"source": "codigo.pdf", "article": str(i)})
+        index.save()
+        snapshot = (tmp_path / "articles.json").read_bytes()
+
+        index.remove(["c2"])
+        index.add("c3", {"source": "codigo.pdf", "article": "30"})
+        index.save()
+
+        assert (tmp_path / "articles.json").read_bytes() == snapshot
+        reloaded = ArticleIndex(tmp_path / "articles.json")
+        assert reloaded.lookup("2") == []
+        assert reloaded.lookup("3") == []
+        assert reloaded.lookup("30") == ["c3"]
+        assert len(reloaded) == 4
+
+        reloaded.compact()
+        assert not (tmp_path / "articles.log.jsonl").exists()
+        assert ArticleIndex(tmp_path / "articles.json").lookup("30") == ["c3"]
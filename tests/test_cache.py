@@ -0,0 +1,89 @@
+"""
+Tests para el caché de respuestas
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.cache import ResponseCache
+
+
+def answer_citing(source: str) -> dict:
+    return {
+        "answer": "respuesta",
+        "citations": [
+            {"source": source, "source_uri": f"data/raw/{source}", "page": 1}
+        ],
+    }
+
+
+class TestResponseCacheInvalidation:
+    """Tests para invalidate_source"""
+
+    def test_invalidates_only_answers_citing_source(self, tmp_path):
+        cache = ResponseCache(cache_dir=str(tmp_path))
+        cache.set("pregunta uno", answer_citing("Codigo-Tributario.pdf"))
+        cache.set("pregunta dos", answer_citing("Ley-IGV.pdf"))
+
+        assert cache.invalidate_source("Codigo-Tributario.pdf") == 1
+        assert cache.get("pregunta uno") is None
+        assert cache.get("pregunta dos") is not None
+
+    def test_invalidation_is_persisted(self, tmp_path):
+        cache = ResponseCache(cache_dir=str(tmp_path))
+        cache.set("pregunta uno", answer_citing("Codigo-Tributario.pdf"))
+        cache.invalidate_source("codigo-tributario.pdf")
+
+        reloaded = ResponseCache(cache_dir=str(tmp_path))
+        assert reloaded.get("pregunta uno") is None
+
+
+class TestResponseCacheStorage:
+    """Tests para la persistencia en SQLite"""
+
+    def test_entries_survive_restart(self, tmp_path):
+        ResponseCache(cache_dir=str(tmp_path)).set("¿Qué es el IGV?", answer_citing("Ley-IGV.pdf"))
+
+        reloaded = ResponseCache(cache_dir=str(tmp_path))
+        assert reloaded.get("que es el igv") == answer_citing("Ley-IGV.pdf")
+        assert reloaded.get_stats()["total_entries"] == 1
+
+    def test_expired_entries_are_misses(self, tmp_path):
+        cache = ResponseCache(cache_dir=str(tmp_path), ttl_hours=0)
+        cache.set("pregunta", answer_citing("Ley-IGV.pdf"))
+
+        assert cache.get("pregunta") is None
+        assert cache.get_stats()["total_entries"] == 0
+
+    def test_eviction_keeps_newest(self, tmp_path):
+        cache = ResponseCache(cache_dir=str(tmp_path), max_entries=5)
+        for i in range(6):
+            cache.set(f"pregunta {i}", answer_citing("Ley-IGV.pdf"))
+
+        assert cache.get_stats()["total_entries"] == 5
+        assert cache.get("pregunta 0") is None
+        assert cache.get("pregunta 5") is not None
+
+    def test_migrates_json_cache(self, tmp_path):
+        legacy = {
+            "version": 1,
+            "entries": [
+                {
+                    "question_hash": ResponseCache(cache_dir=str(tmp_path / "x"))._hash_question("pregunta"),
+                    "question": "pregunta",
+                    "answer": answer_citing("Codigo-Tributario.pdf"),
+                    "timestamp": time.time(),
+                    "hits": 3,
+                }
+            ],
+        }
+        (tmp_path / "response_cache.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+        cache = ResponseCache(cache_dir=str(tmp_path))
+
+        assert cache.get("pregunta") == answer_citing("Codigo-Tributario.pdf")
+        assert not (tmp_path / "response_cache.json").exists()
+        assert cache.invalidate_source("Codigo-Tributario.pdf") == 1
@@ -8,7 +8,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from packages.rag_core.loaders import Document
-from packages.rag_core.chunker import TextChunker, chunk_documents, Chunk
+from packages.rag_core.chunker import LegalChunker, TextChunker, chunk_documents, Chunk
 
 
 class TestTextChunker:
@@ -59,6 +59,44 @@ class TestTextChunker:
 
         assert len(chunk_ids) == len(set(chunk_ids))
 
+    def test_chunk_ids_are_deterministic(self):
+        """El mismo documento genera los mismos chunk_ids"""
+        chunker = TextChunker(chunk_size=50, chunk_overlap=10)
+
+        def make_doc(content):
+            return Document(content=content, metadata={"source": "a.pdf", "page": 3})
+
+        first = [c.chunk_id for c in chunker.split_document(make_doc("Texto " * 50))]
+        second = [c.chunk_id for c in chunker.split_document(make_doc("Texto " * 50))]
+        changed = chunker.split_document(make_doc("Otro " * 50))
+
+        assert first == second
+        assert first[0].startswith("a.pdf::p3::c0::")
+        assert changed[0].chunk_id != first[0]
+
+    def test_chunks_share_page_text_and_metadata(self):
+        """Los chunks apuntan al texto y metadata del documento sin copiarlos"""
+        doc = Document(
+            content="Texto de la página número uno. " * 40,
+            metadata={"source": "test.pdf", "page": 3},
+        )
+        chunks = TextChunker(chunk_size=100, chunk_overlap=20).split_document(doc)
+
+        for chunk in chunks:
+            start, end = chunk.span
+            assert chunk.buffer is doc.content
+            assert chunk.content == doc.content[start:end]
+            assert chunk.metadata["source"] == "test.pdf"
+            assert chunk.metadata["page"] == 3
+
+    def test_explicit_content_constructor(self):
+        """Chunk acepta content y metadata explícitos"""
+        chunk = Chunk(chunk_id="a::c0", content="texto", metadata={"source": "a.pdf"})
+
+        assert chunk.content == "texto"
+        assert chunk.metadata == {"source": "a.pdf"}
+        assert chunk == Chunk("a::c0", "texto", {"source": "a.pdf"})
+
     def test_overlap_works(self):
         """El overlap funciona correctamente"""
         chunker = TextChunker(chunk_size=20, chunk_overlap=5)
@@ -122,3 +160,146 @@ class TestChunkDocuments:
         """Maneja lista vacía"""
         chunks = chunk_documents([], chunk_size=100, chunk_overlap=20)
         assert chunks == []
+
+
+LEGAL_PAGES = [
+    "LIBRO PRIMERO LA OBLIGACION TRIBUTARIA TITULO I DISPOSICIONES GENERALES "
+    "Artículo 1º.- CONCEPTO DE LA OBLIGACION TRIBUTARIA La obligación tributaria "
+    "es el vínculo entre el acreedor y el deudor tributario. "
+    "Artículo 2º.- NACIMIENTO DE LA OBLIGACION TRIBUTARIA La obligación nace "
+    "cuando se realiza el hecho previsto en la ley, conforme al Artículo 1º de "
+    "este Código. CAPITULO IV PRESCRIPCION Artículo 43°.- PLAZOS DE PRESCRIPCIÓN "
+    "La acción para determinar la obligación prescribe a los cuatro (4) años",
+    "y a los seis (6) años para quienes no hayan presentado la declaración. "
+    "Artículo 102-A.- FORMAS DE ASISTENCIA La asistencia comprende el intercambio "
+    "de información. DISPOSICIONES FINALES PRIMERA.- Tratándose de deudores en "
+    "proceso de reestructuración patrimonial se aplicará lo dispuesto.",
+]
+
+
+class TestLegalChunker:
+    """Tests para LegalChunker"""
+
+    def chunks(self, max_chunk_size=1500, pages=LEGAL_PAGES):
+        docs = [
+            Document(content=text, metadata={"source": "codigo.pdf", "page": i + 1})
+            for i, text in enumerate(pages)
+        ]
+        chunker = LegalChunker(chunk_size=100, chunk_overlap=10, max_chunk_size=max_chunk_size)
+        return chunker.split_documents(docs)
+
+    def test_splits_on_articles_with_structure(self):
+        chunks = self.chunks()
+        articles = [c.metadata.get("article") for c in chunks]
+
+        # Las referencias ("conforme al Artículo 1º de") no son encabezados
+        assert articles == ["1", "2", "43", "102-A", "Primera Disposición Final"]
+        first = chunks[0]
+        assert first.content.startswith("LIBRO PRIMERO")
+        assert first.metadata["article_name"] == "CONCEPTO DE LA OBLIGACION TRIBUTARIA"
+        assert first.metadata["book"] == "Libro PRIMERO LA OBLIGACION TRIBUTARIA"
+        assert first.metadata["law_title"] == "Título I DISPOSICIONES GENERALES"
+        assert chunks[2].metadata["chapter"] == "Capítulo IV PRESCRIPCION"
+
+    def test_article_spanning_pages(self):
+        article_43 = self.chunks()[2]
+
+        assert article_43.metadata["page"] == 1
+        assert article_43.metadata["page_end"] == 2
+        assert "seis (6) años" in article_43.content
+
+    def test_long_articles_are_subdivided(self):
+        chunks = self.chunks(max_chunk_size=120)
+
+        assert all(len(c.content) <= 120 for c in chunks)
+        assert sum(c.metadata.get("article") == "43" for c in chunks) > 1
+
+    def test_chunk_ids_stable_after_earlier_page_edit(self):
+        chunks = self.chunks()
+        first_page = LEGAL_PAGES[0].replace(
+            "Artículo 2º.-",
+            "Artículo 1-A.- DEFINICIONES Para efectos del Código se entiende por "
+            "deudor al obligado. Artículo 2º.-",
+        )
+        edited = self.chunks(pages=[first_page, *LEGAL_PAGES[1:]])
+
+        assert [c.metadata["chunk_index"] for c in chunks] == [0, 1, 2, 0, 1]
+        assert len(edited) == len(chunks) + 1
+        # Los chunks que empiezan en la página 2 conservan su ID
+        assert [c.chunk_id for c in edited if c.metadata["page"] == 2] == [
+            c.chunk_id for c in chunks if c.metadata["page"] == 2
+        ]
+        assert len({c.chunk_id for c in edited}) == len(edited)
+
+    def test_chunk_documents_strategy(self):
+        docs = [Document(content=LEGAL_PAGES[0], metadata={"source": "codigo.pdf", "page": 1})]
+
+        legal = chunk_documents(docs, chunk_size=100, chunk_overlap=10, strategy="legal")
+        fixed = chunk_documents(docs, chunk_size=100, chunk_overlap=10)
+
+        assert legal[0].metadata["article"] == "1"
+        assert "article" not in fixed[0].metadata
+
+
+def word_tokenizer(text: str):
+    """Tokenizer por palabras (+ [CLS]/[SEP]) con el vocabulario de `text`"""
+    tokenizers = pytest.importorskip("tokenizers")
+    from tokenizers.models import WordLevel
+    from tokenizers.pre_tokenizers import Whitespace
+    from tokenizers.processors import BertProcessing
+
+    vocab = {"[UNK]": 0, "[CLS]": 1, "[SEP]": 2}
+    for word in Whitespace().pre_tokenize_str(text):
+        vocab.setdefault(word[0], len(vocab))
+    tokenizer = tokenizers.Tokenizer(WordLevel(vocab, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.post_processor = BertProcessing(("[SEP]", 2), ("[CLS]", 1))
+    return tokenizer
+
+
+class TestTokenChunker:
+    """Tests para el chunking por tokens del modelo de embeddings"""
+
+    TEXT = " ".join(f"palabra{i}" for i in range(100))
+
+    def chunks(self, **kwargs):
+        tokenizer = word_tokenizer(self.TEXT)
+        docs = [Document(content=self.TEXT, metadata={"source": "ley.pdf", "page": 1})]
+        return chunk_documents(docs, strategy="tokens", tokenizer=tokenizer, **kwargs)
+
+    def test_fills_model_window(self):
+        # 12 tokens de ventana - [CLS] y [SEP] = 10 palabras por chunk
+        chunks = self.chunks(chunk_size=0, chunk_overlap=0, max_seq_length=12)
+
+        assert len(chunks) == 10
+        assert all(c.metadata["chunk_tokens"] == 10 for c in chunks)
+        assert chunks[0].content == " ".join(f"palabra{i}" for i in range(10))
+
+    def test_overlap_in_tokens(self):
+        chunks = self.chunks(chunk_size=10, chunk_overlap=3, max_seq_length=128)
+
+        assert chunks[0].content.split()[-3:] == chunks[1].content.split()[:3]
+        assert chunks[-1].content.endswith("palabra99")
+
+    def test_chunk_size_capped_by_window(self):
+        chunks = self.chunks(chunk_size=500, chunk_overlap=0, max_seq_length=22)
+
+        assert max(c.metadata["chunk_tokens"] for c in chunks) == 20
+
+    def test_does_not_split_words(self):
+        text = "Artículo 43°.- Plazos de prescripción. " * 20
+        tokenizer = word_tokenizer(text)
+        docs = [Document(content=text, metadata={"source": "ley.pdf", "page": 1})]
+        chunks = chunk_documents(
+            docs, chunk_size=7, chunk_overlap=2, strategy="tokens", tokenizer=tokenizer
+        )
+
+        for chunk in chunks:
+            start, end = chunk.span
+            assert start == 0 or text[start - 1] == " "
+            assert end == len(text.rstrip()) or text[end] == " "
+            assert len(tokenizer.encode(chunk.content, add_special_tokens=False).ids) <= 7
+
+    def test_requires_tokenizer(self):
+        with pytest.raises(ValueError):
+            chunk_documents([], strategy="tokens")
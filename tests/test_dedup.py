@@ -0,0 +1,96 @@
+"""
+Tests para la deduplicación de chunks (MinHash/LSH)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.chunker import Chunk
+from packages.rag_core.dedup import ChunkDeduplicator, MinHasher, shingles
+
+BANNER = (
+    "NORMAS LEGALES Diario Oficial El Peruano Lima, jueves 22 de junio de 2013. "
+    "Artículo 43.- PLAZOS DE PRESCRIPCIÓN La acción de la Administración "
+    "Tributaria para determinar la obligación tributaria, así como la acción "
+    "para exigir su pago y aplicar sanciones prescribe a los cuatro (4) años, "
+    "y a los seis (6) años para quienes no hayan presentado la declaración "
+    "respectiva. Dichas acciones prescriben a los diez (10) años cuando el "
+    "Agente de retención o percepción no ha pagado el tributo retenido o percibido."
+)
+
+
+def make_chunk(page: int, content: str, **metadata) -> Chunk:
+    return Chunk(
+        chunk_id=f"ley.pdf::p{page}::c0",
+        content=content,
+        metadata={"source": "ley.pdf", "page": page, **metadata},
+    )
+
+
+class TestMinHash:
+    """Tests para las firmas MinHash"""
+
+    def test_similar_texts_have_similar_signatures(self):
+        hasher = MinHasher(num_perm=128)
+        words = [f"palabra{i}" for i in range(60)]
+        a = hasher.signature(shingles(" ".join(words)))
+        b = hasher.signature(shingles(" ".join(words[:-1] + ["distinta"])))
+        c = hasher.signature(shingles(" ".join(reversed(words))))
+
+        assert (a == b).mean() > 0.8
+        assert (a == c).mean() < 0.2
+
+    def test_signature_matches_exact_universal_hash(self):
+        hasher = MinHasher(num_perm=16)
+        hashes = shingles(BANNER)
+        prime = (1 << 31) - 1
+
+        # Aritmética exacta de Python (sin desborde) como referencia
+        expected = [
+            min((int(a) * (x % prime) + int(b)) % prime for x in hashes)
+            for a, b in zip(hasher._a, hasher._b)
+        ]
+        assert hasher.signature(hashes).tolist() == expected
+
+    def test_signature_is_deterministic(self):
+        hashes = shingles(BANNER)
+        assert (MinHasher().signature(hashes) == MinHasher().signature(hashes)).all()
+
+
+class TestChunkDeduplicator:
+    """Tests para ChunkDeduplicator"""
+
+    def test_merges_near_duplicates(self):
+        chunks = [
+            make_chunk(1, BANNER),
+            make_chunk(2, "Artículo 1.- El presente Código establece los principios generales."),
+            make_chunk(3, BANNER.replace("jueves", "viernes")),
+            make_chunk(7, BANNER),
+        ]
+
+        kept = ChunkDeduplicator().deduplicate(chunks)
+
+        assert len(kept) == 2
+        assert kept[0].metadata["also_in"] == "3,7"
+        assert kept[0].chunk_id.startswith("ley.pdf::p1::c0::d")
+        assert "also_in" not in kept[1].metadata
+
+    def test_keeps_distinct_articles(self):
+        body = "Los plazos se computan desde el uno de enero del año siguiente " * 3
+        chunks = [
+            make_chunk(1, body, article="43"),
+            make_chunk(2, body, article="44"),
+        ]
+
+        assert len(ChunkDeduplicator().deduplicate(chunks)) == 2
+
+    def test_short_chunks_are_kept(self):
+        chunks = [make_chunk(1, "Derogado."), make_chunk(2, "Derogado.")]
+        assert len(ChunkDeduplicator().deduplicate(chunks)) == 2
+
+    def test_invalid_bands(self):
+        with pytest.raises(ValueError):
+            ChunkDeduplicator(num_perm=100, bands=16)
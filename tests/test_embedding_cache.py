@@ -0,0 +1,176 @@
+"""
+Tests para el caché de embeddings de queries
+"""
+import multiprocessing
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.embedding_cache import (
+    ChunkEmbeddingCache,
+    QueryEmbeddingCache,
+    normalize_query,
+)
+from packages.rag_core.vectorstore import EmbeddingModel
+
+
+def _add_range(cache_dir: str, start: int, count: int) -> None:
+    """Worker: agrega de a un texto los vectores [i, -i] de "t{i}"."""
+    cache = ChunkEmbeddingCache(cache_dir, "m")
+    for i in range(start, start + count):
+        keys, _ = cache.lookup([f"t{i}"])
+        cache.add(keys, np.array([[i, -i]], dtype=np.float32))
+
+
+class LengthEncoder:
+    """Encoder mínimo: el embedding de un texto es [len(texto), 1]"""
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, **kwargs):
+        self.calls.append(list(texts))
+        return np.array([[len(t), 1.0] for t in texts], dtype=np.float64)
+
+
+class TestQueryEmbeddingCache:
+    """Tests para QueryEmbeddingCache"""
+
+    def test_normalize_query_keeps_case_and_accents(self):
+        assert normalize_query("  ¿Qué es   la UIT? ") == "¿Qué es la UIT?"
+
+    def test_hit_and_miss_counters(self):
+        cache = QueryEmbeddingCache(max_entries=10)
+        assert cache.get("m", "hola") is None
+        cache.put("m", "hola", [0.1, 0.2])
+
+        assert cache.get("m", " hola ") == pytest.approx([0.1, 0.2])
+        assert cache.get("otro-modelo", "hola") is None
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
+
+    def test_lru_eviction(self):
+        cache = QueryEmbeddingCache(max_entries=2)
+        cache.put("m", "a", [1.0])
+        cache.put("m", "b", [2.0])
+        cache.get("m", "a")
+        cache.put("m", "c", [3.0])
+
+        assert cache.get("m", "b") is None
+        assert cache.get("m", "a") is not None
+
+    def test_persistence_roundtrip(self, tmp_path):
+        path = tmp_path / "query_embeddings.npz"
+        cache = QueryEmbeddingCache(max_entries=10, persist_path=path)
+        cache.put("m", "plazo de prescripción", np.ones(4))
+        cache.save()
+
+        reloaded = QueryEmbeddingCache(max_entries=10, persist_path=path)
+        assert reloaded.get("m", "plazo de prescripción") == pytest.approx(np.ones(4))
+
+
+class TestEmbedBatches:
+    """Tests para EmbeddingModel.embed_batches"""
+
+    def test_batches_grouped_by_length_keep_indices(self):
+        model = EmbeddingModel(model_name="test")
+        model._model = LengthEncoder()
+        texts = ["aaaa", "a", "aaaaaaaa", "aa", "aaaaaaa"]
+
+        batches = list(model.embed_batches(texts, batch_size=2))
+
+        assert model._model.calls[0] == ["aaaaaaaa", "aaaaaaa"]
+        for indices, embeddings in batches:
+            assert embeddings.dtype == np.float32
+            assert [len(texts[i]) for i in indices] == embeddings[:, 0].tolist()
+        assert sorted(i for indices, _ in batches for i in indices) == list(range(5))
+
+
+class TestChunkEmbeddingCache:
+    """Tests para el caché de embeddings de chunks en disco"""
+
+    def test_lookup_add_and_reload(self, tmp_path):
+        cache = ChunkEmbeddingCache(tmp_path, "modelo/test")
+        keys, found = cache.lookup(["uno", "dos", "uno"])
+        assert found == {}
+
+        cache.add(keys, np.array([[1, 0], [0, 1], [1, 0]], dtype=np.float32))
+        assert len(cache) == 2
+
+        reloaded = ChunkEmbeddingCache(tmp_path, "modelo/test")
+        _, found = reloaded.lookup(["dos", "tres"])
+        assert list(found) == [0]
+        assert found[0] == pytest.approx([0.0, 1.0])
+
+    def test_key_includes_model(self, tmp_path):
+        cache = ChunkEmbeddingCache(tmp_path, "modelo-a")
+        keys, _ = cache.lookup(["texto"])
+        cache.add(keys, np.ones((1, 3)))
+
+        other = ChunkEmbeddingCache(tmp_path, "modelo-b")
+        assert other.lookup(["texto"])[1] == {}
+
+    def test_key_includes_backend_and_quantization(self, tmp_path):
+        cache = ChunkEmbeddingCache(tmp_path, "modelo", backend="torch")
+        keys, _ = cache.lookup(["texto"])
+        cache.add(keys, np.ones((1, 3)))
+
+        for backend, quantization in [("onnx", "fp32"), ("onnx", "int8")]:
+            other = ChunkEmbeddingCache(
+                tmp_path, "modelo", backend=backend, quantization=quantization
+            )
+            assert other.cache_file != cache.cache_file
+            assert other.lookup(["texto"])[1] == {}
+        assert ChunkEmbeddingCache(tmp_path, "modelo").lookup(["texto"])[1]
+
+    def test_truncated_record_is_dropped(self, tmp_path):
+        cache = ChunkEmbeddingCache(tmp_path, "m")
+        keys, _ = cache.lookup(["a", "b"])
+        cache.add(keys, np.ones((2, 4)))
+        with open(cache.cache_file, "ab") as f:
+            f.write(b"\x00" * 10)
+
+        reloaded = ChunkEmbeddingCache(tmp_path, "m")
+        keys, found = reloaded.lookup(["a", "b", "c"])
+        assert sorted(found) == [0, 1]
+        reloaded.add(keys, np.full((3, 4), 2.0))
+        assert ChunkEmbeddingCache(tmp_path, "m").lookup(["c"])[1][0][0] == 2.0
+
+    def test_stale_instances_append_at_file_end(self, tmp_path):
+        first = ChunkEmbeddingCache(tmp_path, "m")
+        second = ChunkEmbeddingCache(tmp_path, "m")
+        keys, _ = first.lookup(["a", "b"])
+        first.add(keys, np.array([[1, 1], [2, 2]], dtype=np.float32))
+
+        # `second` no vio lo escrito por `first`: "b" no se duplica y "c"
+        # queda después de los registros de `first`
+        keys, found = second.lookup(["b", "c"])
+        assert found == {}
+        second.add(keys, np.array([[9, 9], [3, 3]], dtype=np.float32))
+
+        reloaded = ChunkEmbeddingCache(tmp_path, "m")
+        _, found = reloaded.lookup(["a", "b", "c"])
+        assert len(reloaded) == 3
+        assert [found[i].tolist() for i in range(3)] == [[1, 1], [2, 2], [3, 3]]
+        assert second.lookup(["a"])[1][0].tolist() == [1, 1]
+
+    def test_concurrent_processes(self, tmp_path):
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(target=_add_range, args=(str(tmp_path), n * 25, 25))
+            for n in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        cache = ChunkEmbeddingCache(tmp_path, "m")
+        _, found = cache.lookup([f"t{i}" for i in range(100)])
+        assert len(cache) == 100
+        assert all(found[i].tolist() == [i, -i] for i in range(100))
@@ -0,0 +1,72 @@
+"""
+Tests para el pool de procesos de embeddings (modelo diminuto de conftest)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+TEXTS = [
+    f"{word} del codigo tributario {'y la deuda ' * (i % 5)}articulo {i}"
+    for i, word in enumerate(
+        ["impuesto", "renta", "multa", "plazo", "pago", "sancion", "unidad"] * 4
+    )
+]
+
+
+@pytest.fixture
+def model(rag_settings):
+    from packages.rag_core.vectorstore import EmbeddingModel
+
+    return EmbeddingModel()
+
+
+def _collect(model, batch_size: int = 4) -> tuple[list[list[int]], np.ndarray]:
+    """Índices de cada batch y la matriz de embeddings en el orden original."""
+    indices, embeddings = [], np.empty((len(TEXTS), 32), dtype=np.float32)
+    for batch_indices, batch in model.embed_batches(TEXTS, batch_size=batch_size):
+        indices.append(batch_indices)
+        embeddings[batch_indices] = batch
+    return indices, embeddings
+
+
+class TestEmbeddingPool:
+    """Tests para EmbeddingModel.worker_pool / EmbeddingPool"""
+
+    def test_pooled_matches_serial_and_shuts_down(self, model):
+        serial_indices, serial = _collect(model)
+        with model.worker_pool(workers=2, threads=1):
+            pool = model.pool
+            pooled_indices, pooled = _collect(model)
+            processes = list(pool._executor._processes.values())
+
+        assert pooled_indices == serial_indices
+        assert pooled.dtype == np.float32
+        np.testing.assert_allclose(pooled, serial, rtol=1e-5, atol=1e-6)
+        np.testing.assert_allclose(
+            serial, model.model.encode(TEXTS), rtol=1e-5, atol=1e-6
+        )
+
+        # Al salir del bloque el pool se cierra y los workers terminan
+        assert model.pool is None
+        assert pool._executor is None
+        assert processes
+        assert not any(process.is_alive() for process in processes)
+
+    def test_pool_shuts_down_on_error(self, model):
+        with pytest.raises(RuntimeError, match="ingesta rota"):
+            with model.worker_pool(workers=2, threads=1):
+                pool = model.pool
+                next(model.embed_batches(TEXTS, batch_size=4))
+                processes = list(pool._executor._processes.values())
+                raise RuntimeError("ingesta rota")
+
+        assert model.pool is None
+        assert not any(process.is_alive() for process in processes)
+
+    def test_single_worker_stays_in_process(self, model):
+        with model.worker_pool(workers=1):
+            assert model.pool is None
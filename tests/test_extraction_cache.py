@@ -0,0 +1,64 @@
+"""
+Tests para el caché de extracción de páginas
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.extraction_cache import ExtractionCache
+from packages.rag_core.loaders import HTMLLoader
+
+HTML = """<html><body><main>
+<h2>Artículo 1</h2><p>La obligación tributaria nace cuando se realiza el hecho
+previsto en la ley como generador de dicha obligación.</p>
+<h2>Artículo 2</h2><p>La acción para exigir el pago de la deuda tributaria
+prescribe a los cuatro años, y a los seis años para quienes no presentaron.</p>
+</main></body></html>"""
+
+
+class TestExtractionCache:
+    """Tests para ExtractionCache"""
+
+    def test_put_and_get_roundtrip(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "extraction.sqlite")
+        cache.put("abc", "pdf", 3, [(2, "dos", None), (1, "uno", {"x": 1})])
+
+        total, rows = cache.get("abc")
+        assert total == 3
+        assert rows == [(1, "uno", {"x": 1}), (2, "dos", None)]
+        assert cache.get("otro") is None
+
+        stats = cache.get_stats()
+        assert stats["hits"] == 1 and stats["misses"] == 1
+        assert stats["files"] == 1 and stats["pages"] == 2
+
+    def test_fingerprint_follows_content(self, tmp_path):
+        cache = ExtractionCache(tmp_path / "extraction.sqlite")
+        path = tmp_path / "doc.html"
+        path.write_text("uno")
+        first = cache.fingerprint(path)
+        assert cache.fingerprint(path) == first
+
+        path.write_text("dos, distinto")
+        assert cache.fingerprint(path) != first
+
+    def test_html_loader_reads_from_cache(self, tmp_path, monkeypatch):
+        cache = ExtractionCache(tmp_path / "extraction.sqlite")
+        monkeypatch.setattr(
+            "packages.rag_core.loaders.get_extraction_cache", lambda: cache
+        )
+        path = tmp_path / "ley.html"
+        path.write_text(HTML, encoding="utf-8")
+
+        first = HTMLLoader(str(path)).load()
+
+        def fail(self):
+            raise AssertionError("no debería volver a parsear")
+
+        monkeypatch.setattr(HTMLLoader, "_load_uncached", fail)
+        second = HTMLLoader(str(path)).load()
+
+        assert [d.content for d in second] == [d.content for d in first]
+        assert [d.metadata for d in second] == [d.metadata for d in first]
+        assert cache.get_stats()["hits"] == 1
@@ -0,0 +1,74 @@
+"""
+Tests para el enriquecimiento de citas del generador
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.generator import MultiProviderGenerator
+
+
+def make_chunk(page: int, score: float, **metadata) -> dict:
+    return {
+        "content": f"texto de la página {page}",
+        "score": score,
+        "metadata": {
+            "source": "codigo.pdf",
+            "source_path": "/docs/codigo.pdf",
+            "page": page,
+            **metadata,
+        },
+    }
+
+
+@pytest.fixture
+def generator():
+    return MultiProviderGenerator(provider_name="groq")
+
+
+class TestEnrichCitations:
+    """Tests para _enrich_citations"""
+
+    CHUNKS = [
+        make_chunk(4, 0.9),
+        make_chunk(12, 0.6, also_in="30,45"),
+        make_chunk(20, 0.5),
+    ]
+
+    def test_matches_cited_page_within_source(self, generator):
+        [citation] = generator._enrich_citations(
+            [{"quote": "...", "source": "Codigo.pdf", "page": 20}], self.CHUNKS
+        )
+
+        assert citation["relevance_score"] == 0.5
+        assert citation["source_uri"] == "/docs/codigo.pdf"
+        assert citation["also_in"] == []
+
+    def test_matches_page_of_merged_copy(self, generator):
+        citations = generator._enrich_citations(
+            [
+                {"quote": "...", "source": "codigo.pdf", "page": "45"},
+                {"quote": "...", "source": "codigo.pdf", "page": 12},
+            ],
+            self.CHUNKS,
+        )
+
+        assert [c["relevance_score"] for c in citations] == [0.6, 0.6]
+        assert citations[0]["also_in"] == [12, 30]
+        assert citations[1]["also_in"] == [30, 45]
+
+    def test_falls_back_to_first_chunk_of_source(self, generator):
+        citations = generator._enrich_citations(
+            [
+                {"quote": "...", "source": "codigo.pdf", "page": 99},
+                {"quote": "...", "source": "codigo.pdf"},
+                {"quote": "...", "source": "ley.pdf", "page": 4},
+            ],
+            self.CHUNKS,
+        )
+
+        assert [c["relevance_score"] for c in citations] == [0.9, 0.9, 0.0]
+        assert citations[2]["source_uri"] is None
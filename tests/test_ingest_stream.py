@@ -0,0 +1,209 @@
+"""
+Tests para la ingesta en streaming
+"""
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core import loaders
+from packages.rag_core.chunker import TextChunker
+from packages.rag_core.dedup import ChunkDeduplicator
+from packages.rag_core.ingest_stream import IngestStream, threaded
+
+
+class TestThreaded:
+    """Tests para las etapas con cola acotada"""
+
+    def test_preserves_order(self):
+        assert list(threaded(range(100), maxsize=2)) == list(range(100))
+
+    def test_chained_stages(self):
+        doubled = threaded((x * 2 for x in range(10)), maxsize=1)
+        shifted = threaded((x + 1 for x in doubled), maxsize=1)
+        assert list(shifted) == [x * 2 + 1 for x in range(10)]
+
+    def test_propagates_exceptions(self):
+        def failing():
+            yield 1
+            raise ValueError("etapa rota")
+
+        items = threaded(failing(), maxsize=1)
+        assert next(items) == 1
+        with pytest.raises(ValueError, match="etapa rota"):
+            next(items)
+
+    def test_close_stops_producer_and_closes_source(self):
+        closed = threading.Event()
+
+        def endless():
+            try:
+                while True:
+                    yield 1
+            finally:
+                closed.set()
+
+        before = threading.active_count()
+        items = threaded(endless(), maxsize=1, poll=0.01)
+        assert next(items) == 1
+        items.close()
+
+        assert closed.is_set()
+        assert threading.active_count() == before
+
+    def test_consumer_error_stops_chained_producers(self):
+        produced = []
+
+        def source():
+            for i in range(1000):
+                produced.append(i)
+                yield i
+
+        before = threading.active_count()
+        first = threaded(source(), maxsize=1, poll=0.01)
+        second = threaded((x * 2 for x in first), maxsize=1, poll=0.01)
+        with pytest.raises(RuntimeError):
+            for x in second:
+                if x == 4:
+                    raise RuntimeError("consumidor roto")
+        second.close()
+        first.close()
+
+        assert threading.active_count() == before
+        assert len(produced) < 1000
+
+
+SECTION = (
+    "<h2>{title}</h2><p>{title}: la obligación tributaria nace cuando se "
+    "realiza el hecho previsto en la ley como generador de dicha obligación "
+    "y el deudor responde con su patrimonio.</p>"
+)
+
+
+def write_html(path: Path, titles: list[str]) -> Path:
+    body = "".join(SECTION.format(title=title) for title in titles)
+    path.write_text(f"<html><body><main>{body}</main></body></html>", "utf-8")
+    return path
+
+
+class FakeStore:
+    """Vector store mínimo: embeddings [len(texto), 1] y escrituras en memoria"""
+
+    def __init__(self, fail_add_call: int = 0, fail_embed: bool = False):
+        self.fail_add_call = fail_add_call
+        self.fail_embed = fail_embed
+        self.writes: list[list[str]] = []
+        self.saved = 0
+
+    def embed_documents(self, documents: list[str]) -> np.ndarray:
+        if self.fail_embed:
+            raise RuntimeError("modelo caído")
+        return np.array([[len(d), 1.0] for d in documents], dtype=np.float32)
+
+    def add_embedded(self, chunks, embeddings, save_index: bool = True) -> int:
+        assert not save_index
+        assert embeddings[:, 0].tolist() == [len(c.content) for c in chunks]
+        if len(self.writes) + 1 == self.fail_add_call:
+            raise RuntimeError("escritura fallida")
+        self.writes.append([c.chunk_id for c in chunks])
+        return len(chunks)
+
+    def save_indexes(self) -> None:
+        self.saved += 1
+
+
+class TestIngestStream:
+    """Tests para IngestStream.run con un vector store falso"""
+
+    @pytest.fixture(autouse=True)
+    def no_extraction_cache(self, monkeypatch):
+        monkeypatch.setattr(loaders, "get_extraction_cache", lambda: None)
+
+    @pytest.fixture
+    def files(self, tmp_path):
+        return [
+            write_html(tmp_path / "ley.html", [f"Artículo {i}" for i in range(1, 6)]),
+            write_html(tmp_path / "codigo.html", ["Norma I", "Norma II", "Norma III"]),
+        ]
+
+    def _stream(self, store, **kwargs) -> IngestStream:
+        options = {"batch_size": 2, "flush_size": 3, "queue_size": 1}
+        options.update(kwargs)
+        return IngestStream(store, TextChunker(chunk_size=1000), **options)
+
+    def test_run_chains_stages_and_summarizes(self, files):
+        store = FakeStore()
+        progress = []
+
+        stats = self._stream(store, progress=lambda *a: progress.append(a)).run(files)
+
+        written = [cid for block in store.writes for cid in block]
+        by_file = stats.chunk_ids_by_file
+        assert stats.loaded_files == files
+        assert stats.sources == {"ley.html", "codigo.html"}
+        assert stats.pages == 8
+        assert stats.chunks == stats.added == len(written) == 8
+        assert written == by_file[files[0]] + by_file[files[1]]
+        assert all(len(block) >= 3 for block in store.writes[:-1])
+        assert progress[-1] == (8, 8)
+        assert [p[0] for p in progress] == sorted(p[0] for p in progress)
+        assert set(stats.timings) == {"ley.html", "codigo.html"}
+        assert store.saved == 1
+
+    def test_dedup_merges_copies_within_file(self, tmp_path):
+        path = write_html(tmp_path / "dup.html", ["Artículo 1", "Artículo 2"] * 2)
+        store = FakeStore()
+
+        stats = self._stream(store, deduplicator=ChunkDeduplicator()).run([path])
+
+        assert stats.pages == 4
+        assert stats.duplicates == 2
+        assert stats.chunks == stats.added == 2
+
+    def test_skip_ids_are_not_written(self, files):
+        first = self._stream(FakeStore()).run(files)
+        skip = set(first.chunk_ids_by_file[files[0]])
+        store = FakeStore()
+
+        stats = self._stream(store, skip_ids=skip).run(files)
+
+        written = [cid for block in store.writes for cid in block]
+        assert written == first.chunk_ids_by_file[files[1]]
+        assert stats.added == 3
+        assert stats.chunks == 8
+        assert stats.chunk_ids_by_file == first.chunk_ids_by_file
+
+    def test_unreadable_file_is_skipped(self, files, tmp_path):
+        broken = tmp_path / "roto.pdf"
+        broken.write_bytes(b"no es un pdf")
+
+        stats = self._stream(FakeStore()).run([broken] + files)
+
+        assert stats.loaded_files == files
+        assert stats.added == 8
+
+    def test_write_failure_saves_indexes_and_stops_stages(self, files):
+        store = FakeStore(fail_add_call=2)
+        before = threading.active_count()
+
+        with pytest.raises(RuntimeError, match="escritura fallida"):
+            self._stream(store).run(files)
+
+        assert len(store.writes) == 1
+        assert store.saved == 1
+        assert threading.active_count() == before
+
+    def test_embed_failure_propagates_and_stops_stages(self, files):
+        store = FakeStore(fail_embed=True)
+        before = threading.active_count()
+
+        with pytest.raises(RuntimeError, match="modelo caído"):
+            self._stream(store).run(files)
+
+        assert store.writes == []
+        assert store.saved == 1
+        assert threading.active_count() == before
@@ -0,0 +1,272 @@
+"""
+Tests para el índice invertido de keywords
+"""
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.keyword_index import (
+    KeywordIndex,
+    NormalizedTextStore,
+    extract_phrases,
+    normalize_text,
+    tokenize,
+)
+
+
+class TestTextHelpers:
+    """Tests para normalización y tokenización"""
+
+    def test_normalize_removes_accents_and_punctuation(self):
+        assert normalize_text("¿Qué dice el Artículo 132?") == "que dice el articulo 132"
+
+    def test_tokenize_filters_stopwords(self):
+        tokens = tokenize("norma xv de la unidad impositiva tributaria")
+        assert tokens == ["norma", "xv", "unidad", "impositiva", "tributaria"]
+
+    def test_extract_phrases(self):
+        phrases = extract_phrases(["unidad", "impositiva", "tributaria"])
+        assert "unidad impositiva" in phrases
+        assert "unidad impositiva tributaria" in phrases
+
+
+class TestKeywordIndex:
+    """Tests para KeywordIndex"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = KeywordIndex(tmp_path / "keyword_index.json")
+        index.add("c1", "NORMA XV: UNIDAD IMPOSITIVA TRIBUTARIA")
+        index.add("c2", "El plazo de prescripción tributaria es de cuatro años.")
+        index.add("c3", "Disposiciones finales del código.")
+        return index
+
+    def test_match_only_returns_candidates(self, index):
+        matches = index.match(["tributaria"])
+        assert set(matches) == {"c1", "c2"}
+        assert matches["c1"] == {"tributaria": 1}
+
+    def test_prefix_matches_inflections(self, index):
+        matches = index.match(["disposicion"])
+        assert set(matches) == {"c3"}
+
+    def test_persistence_roundtrip(self, index, tmp_path):
+        index.save()
+        reloaded = KeywordIndex(tmp_path / "keyword_index.json")
+        assert len(reloaded) == 3
+        assert set(reloaded.match(["norma"])) == {"c1"}
+
+    def test_remove_and_clear(self, index, tmp_path):
+        index.remove(["c1"])
+        assert set(index.match(["tributaria"])) == {"c2"}
+        index.save()
+        index.clear()
+        assert len(index) == 0
+        assert not (tmp_path / "keyword_index.json").exists()
+
+    def test_bm25_prefers_shorter_chunks(self, tmp_path):
+        index = KeywordIndex(tmp_path / "bm25.json")
+        index.add("short", "prescripción tributaria")
+        index.add("long", "prescripción " + "texto adicional sin relación " * 20)
+        index.add("other", "disposiciones finales")
+
+        scores = index.bm25(["prescripcion"])
+
+        assert set(scores) == {"short", "long"}
+        assert scores["short"] > scores["long"]
+
+    def test_phrase_and_exact_matches(self, index):
+        phrases = extract_phrases(["unidad", "impositiva", "tributaria"])
+
+        counts = index.phrase_matches(phrases)
+        exact = index.exact_matches("norma xv unidad impositiva")
+
+        assert counts == {"c1": 3}
+        assert exact == {"c1"}
+        assert index.exact_matches("unidad tributaria") == set()
+
+
+class NoScanDict(dict):
+    """Posting lists que fallan si alguien recorre todo el vocabulario"""
+
+    scans_allowed = False
+
+    def _check(self):
+        if not self.scans_allowed:
+            raise AssertionError("no debería recorrer todas las posting lists")
+
+    def __iter__(self):
+        self._check()
+        return super().__iter__()
+
+    def keys(self):
+        self._check()
+        return super().keys()
+
+    def items(self):
+        self._check()
+        return super().items()
+
+
+class TestIncrementalPersistence:
+    """Tests para el borrado por documento y el log de cambios"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = KeywordIndex(tmp_path / "keyword_index.json")
+        for i in range(10):
+            index.add(f"c{i}", f"plazo de prescripción {i} del código tributario")
+        index.add("uit", "NORMA XV: UNIDAD IMPOSITIVA TRIBUTARIA")
+        index.save()
+        return index
+
+    @staticmethod
+    def _state(index: KeywordIndex) -> tuple:
+        return (
+            len(index),
+            sorted(index.match(["tributari", "norma", "plazo"])),
+            index.bm25(["prescripcion", "unidad"]),
+            index.exact_matches("unidad impositiva"),
+        )
+
+    def test_remove_only_touches_document_terms(self, index):
+        index._postings = NoScanDict(index._postings)
+
+        index.remove(["uit", "c3"])
+        index._postings.scans_allowed = True
+
+        assert index.expand("norma") == []
+        assert index.expand("unidad") == []
+        assert set(index.match(["tributario"])) == {
+            f"c{i}" for i in range(10) if i != 3
+        }
+
+    def test_reingest_replaces_postings(self, index):
+        index._postings = NoScanDict(index._postings)
+
+        index.add("uit", "unidad de referencia")
+        index._postings.scans_allowed = True
+
+        assert index.exact_matches("unidad de referencia") == {"uit"}
+        assert index.exact_matches("unidad impositiva") == set()
+
+    def test_save_appends_changes_to_log(self, index, tmp_path):
+        snapshot = (tmp_path / "keyword_index.json").read_bytes()
+
+        index.remove(["c3"])
+        index.add("uit", "unidad de referencia")
+        index.save()
+
+        assert (tmp_path / "keyword_index.json").read_bytes() == snapshot
+        log = (tmp_path / "keyword_index.log.jsonl").read_text(encoding="utf-8")
+        assert len(log.splitlines()) == 2
+        reloaded = KeywordIndex(tmp_path / "keyword_index.json")
+        assert self._state(reloaded) == self._state(index)
+        assert "c3" not in reloaded
+        assert reloaded.exact_matches("unidad de referencia") == {"uit"}
+
+    def test_snapshot_when_log_outgrows_index(self, index, tmp_path):
+        index.remove([f"c{i}" for i in range(8)])
+        index.save()
+
+        assert not (tmp_path / "keyword_index.log.jsonl").exists()
+        reloaded = KeywordIndex(tmp_path / "keyword_index.json")
+        assert self._state(reloaded) == self._state(index)
+        assert len(reloaded._docs) == 3
+
+    def test_replaying_log_over_newer_snapshot(self, index, tmp_path):
+        log_path = tmp_path / "keyword_index.log.jsonl"
+        index.remove(["c1"])
+        index.add("c2", "deuda tributaria")
+        index.save()
+        log = log_path.read_bytes()
+
+        # Caída entre escribir el snapshot y borrar el log
+        index.compact()
+        log_path.write_bytes(log)
+
+        reloaded = KeywordIndex(tmp_path / "keyword_index.json")
+        assert self._state(reloaded) == self._state(index)
+
+    def test_ignores_truncated_log_line(self, index, tmp_path):
+        index.remove(["c1"])
+        index.save()
+        with open(tmp_path / "keyword_index.log.jsonl", "a", encoding="utf-8") as f:
+            f.write('{"id": "c2", "dele')
+
+        reloaded = KeywordIndex(tmp_path / "keyword_index.json")
+        assert self._state(reloaded) == self._state(index)
+
+
+class TestNormalizedTextStore:
+    """Tests para el sidecar de texto normalizado"""
+
+    def test_append_and_load(self, tmp_path):
+        store = NormalizedTextStore(tmp_path / "normalized.jsonl")
+        store.append([("c1", "norma xv"), ("c2", "codigo tributario")])
+        store.append([("c1", "norma xvi")])
+
+        assert store.load() == {"c1": "norma xvi", "c2": "codigo tributario"}
+
+    def test_ignores_truncated_line(self, tmp_path):
+        path = tmp_path / "normalized.jsonl"
+        store = NormalizedTextStore(path)
+        store.append([("c1", "norma xv")])
+        with open(path, "a", encoding="utf-8") as f:
+            f.write('{"id": "c2", "te')
+
+        assert store.load() == {"c1": "norma xv"}
+
+
+class TestKeywordIndexFilters:
+    """Tests para filtros de metadata en el índice"""
+
+    @pytest.fixture
+    def index(self, tmp_path):
+        index = KeywordIndex(tmp_path / "keyword_index.json")
+        index.add("a1", "plazo de prescripción", {"source": "a.pdf", "page": 1})
+        index.add("a9", "plazo de prescripción", {"source": "a.pdf", "page": 9})
+        index.add("b1", "plazo de prescripción", {"source": "b.pdf", "page": 1})
+        return index
+
+    def test_filter_by_source(self, index):
+        matches = index.match(["plazo"], {"source": "a.pdf"})
+        assert set(matches) == {"a1", "a9"}
+
+    def test_filter_by_page_range(self, index):
+        matches = index.match(["plazo"], {"page_from": 2, "page_to": 10})
+        assert set(matches) == {"a9"}
+        assert index.exact_matches("plazo de prescripcion", {"page_to": 1}) == {
+            "a1",
+            "b1",
+        }
+
+    def test_remove_appends_tombstones_and_compact(self, tmp_path):
+        path = tmp_path / "normalized.jsonl"
+        store = NormalizedTextStore(path)
+        store.append([("c1", "norma xv"), ("c2", "codigo tributario")])
+        store.remove(["c1"])
+
+        assert store.load() == {"c2": "codigo tributario"}
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 3
+
+        assert store.compact() == {"c2": "codigo tributario"}
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 1
+
+
+class TestPhraseAnchor:
+    """Tests para frases que empiezan con palabras muy frecuentes"""
+
+    def test_phrase_starting_with_stopword(self, tmp_path):
+        index = KeywordIndex(tmp_path / "keyword_index.json")
+        for i in range(50):
+            index.add(f"c{i}", "el plazo de la deuda")
+        index.add("target", "el plazo de la prescripción tributaria")
+        index.add("reversed", "prescripción de la deuda")
+
+        assert index.exact_matches("de la prescripcion") == {"target"}
+        assert index.exact_matches("la prescripcion tributaria") == {"target"}
+        assert index.exact_matches("prescripcion de la") == {"reversed"}
+        assert index.phrase_matches(["de la pres"]) == {"target": 1}
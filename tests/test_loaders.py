@@ -0,0 +1,235 @@
+"""
+Tests para la extracción de PDFs (en paralelo, en serie y con caché)
+"""
+import multiprocessing
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core import loaders
+from packages.rag_core.extraction_cache import ExtractionCache
+from packages.rag_core.loaders import iter_document_files, iter_pdfs_parallel
+
+_original_extract = loaders._extract_page_range
+
+
+def write_pdf(path: Path, pages: list[str]) -> Path:
+    """PDF mínimo con una línea de texto (Helvetica) por página."""
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode("latin-1")
+        objects.append(
+            b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        )
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+            % len(objects)
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objects) + 1,
+        xref,
+    )
+    path.write_bytes(bytes(out))
+    return path
+
+
+def _slow_first_range(file_path: str, start: int, end: int):
+    """El primer rango termina último: el pool completa fuera de orden."""
+    if start == 0:
+        time.sleep(0.5)
+    return _original_extract(file_path, start, end)
+
+
+def _failing_range(file_path: str, start: int, end: int):
+    if "roto" in file_path and start > 0:
+        raise ValueError(f"página ilegible en {Path(file_path).name}")
+    return _original_extract(file_path, start, end)
+
+
+def _must_not_extract(file_path: str, start: int, end: int):
+    raise AssertionError("no debería volver a extraer")
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Caché de extracción aislado en tmp_path."""
+    cache = ExtractionCache(tmp_path / "extraction.sqlite")
+    monkeypatch.setattr(loaders, "get_extraction_cache", lambda: cache)
+    return cache
+
+
+@pytest.fixture
+def fork_pool(monkeypatch):
+    """
+    Pool con `fork` en vez de `spawn`: los workers heredan los monkeypatch
+    de este módulo (extracción lenta o con fallas) y arrancan rápido.
+    """
+    monkeypatch.setattr(
+        loaders,
+        "multiprocessing",
+        SimpleNamespace(get_context=lambda method: multiprocessing.get_context("fork")),
+    )
+
+
+@pytest.fixture
+def pdfs(tmp_path):
+    return [
+        write_pdf(
+            tmp_path / f"{name}.pdf",
+            [f"{name} articulo {page}" for page in range(1, pages + 1)],
+        )
+        for name, pages in (("ley", 7), ("codigo", 3), ("roto", 5))
+    ]
+
+
+def _pages(docs) -> list[tuple[int, str]]:
+    return [(doc.metadata["page"], doc.content) for doc in docs]
+
+
+def _expected(path: Path, pages: int) -> list[tuple[int, str]]:
+    return [(page, f"{path.stem} articulo {page}") for page in range(1, pages + 1)]
+
+
+class TestParallelExtraction:
+    """Tests para iter_pdfs_parallel"""
+
+    def test_page_order_with_spawn_pool(self, cache, pdfs):
+        results = list(iter_pdfs_parallel(pdfs[:2], workers=2, pages_per_task=2))
+
+        assert [path for path, _, _ in results] == pdfs[:2]
+        assert _pages(results[0][1]) == _expected(pdfs[0], 7)
+        assert _pages(results[1][1]) == _expected(pdfs[1], 3)
+        assert all(doc.metadata["total_pages"] == 7 for doc in results[0][1])
+
+    def test_page_order_when_tasks_finish_out_of_order(
+        self, cache, pdfs, fork_pool, monkeypatch
+    ):
+        monkeypatch.setattr(loaders, "_extract_page_range", _slow_first_range)
+
+        results = list(iter_pdfs_parallel(pdfs, workers=2, pages_per_task=2))
+
+        for (path, docs, _), pages in zip(results, (7, 3, 5)):
+            assert _pages(docs) == _expected(path, pages)
+
+    def test_worker_exception_is_reported_per_file(
+        self, cache, pdfs, fork_pool, monkeypatch
+    ):
+        monkeypatch.setattr(loaders, "_extract_page_range", _failing_range)
+
+        results = {
+            path.name: docs
+            for path, docs, _ in iter_pdfs_parallel(pdfs, workers=2, pages_per_task=2)
+        }
+
+        assert isinstance(results["roto.pdf"], ValueError)
+        assert "página ilegible en roto.pdf" in str(results["roto.pdf"])
+        assert _pages(results["ley.pdf"]) == _expected(pdfs[0], 7)
+        # Un archivo con error no queda en el caché
+        assert cache.get(cache.fingerprint(pdfs[2])) is None
+
+    def test_in_flight_tasks_are_capped(self, cache, pdfs, fork_pool, monkeypatch):
+        submitted = []
+
+        class CountingExecutor(loaders.ProcessPoolExecutor):
+            def submit(self, fn, *args):
+                submitted.append(args[1:])
+                return super().submit(fn, *args)
+
+        monkeypatch.setattr(loaders, "ProcessPoolExecutor", CountingExecutor)
+        results = iter_pdfs_parallel(pdfs, workers=2, pages_per_task=2, max_in_flight=2)
+
+        path, docs, _ = next(results)
+        # ley.pdf (4 rangos) ya se consumió: a lo sumo 2 rangos más en vuelo
+        assert path == pdfs[0]
+        assert _pages(docs) == _expected(pdfs[0], 7)
+        assert len(submitted) <= 4 + 2
+
+        rest = list(results)
+        assert len(submitted) == 4 + 2 + 3
+        for (path, docs, _), pages in zip(rest, (3, 5)):
+            assert _pages(docs) == _expected(path, pages)
+
+    def test_unreadable_file_does_not_stop_others(self, cache, pdfs, fork_pool):
+        broken = pdfs[0].with_name("vacio.pdf")
+        broken.write_bytes(b"no es un pdf")
+
+        results = list(iter_pdfs_parallel([broken, pdfs[1]], workers=2))
+
+        assert isinstance(results[0][1], Exception)
+        assert _pages(results[1][1]) == _expected(pdfs[1], 3)
+
+
+class TestSerialFallback:
+    """Tests para la extracción sin pool (workers 0/1)"""
+
+    @pytest.mark.parametrize("workers", [0, 1])
+    def test_no_pool_and_same_pages(self, cache, pdfs, monkeypatch, workers):
+        def no_pool(*args, **kwargs):
+            raise AssertionError("no debería crear un pool")
+
+        monkeypatch.setattr(loaders, "ProcessPoolExecutor", no_pool)
+
+        results = list(iter_document_files(pdfs[:2], workers=workers))
+
+        assert [path for path, _, _ in results] == pdfs[:2]
+        assert _pages(results[0][1]) == _expected(pdfs[0], 7)
+        assert _pages(results[1][1]) == _expected(pdfs[1], 3)
+
+    def test_serial_error_is_yielded(self, cache, tmp_path):
+        broken = tmp_path / "vacio.pdf"
+        broken.write_bytes(b"no es un pdf")
+
+        [(path, docs, _)] = iter_document_files([broken], workers=0)
+        assert path == broken
+        assert isinstance(docs, Exception)
+
+
+class TestExtractionCacheWithPool:
+    """Tests para el caché de extracción en la ruta paralela"""
+
+    def test_hit_skips_extraction(self, cache, pdfs, fork_pool, monkeypatch):
+        first = list(iter_pdfs_parallel(pdfs[:2], workers=2, pages_per_task=2))
+        monkeypatch.setattr(loaders, "_extract_page_range", _must_not_extract)
+
+        second = list(iter_pdfs_parallel(pdfs[:2], workers=2, pages_per_task=2))
+        serial = list(iter_document_files(pdfs[:2], workers=0))
+
+        for before, after, loaded in zip(first, second, serial):
+            assert _pages(after[1]) == _pages(before[1])
+            assert _pages(loaded[1]) == _pages(before[1])
+        assert cache.get_stats()["hits"] == 4
+
+    def test_changed_file_is_extracted_again(self, cache, pdfs, fork_pool):
+        list(iter_pdfs_parallel(pdfs[:1], workers=2, pages_per_task=2))
+        write_pdf(pdfs[0], ["ley reformada 1", "ley reformada 2"])
+
+        [(_, docs, _)] = iter_pdfs_parallel(pdfs[:1], workers=2, pages_per_task=2)
+
+        assert _pages(docs) == [(1, "ley reformada 1"), (2, "ley reformada 2")]
+        assert all(doc.metadata["total_pages"] == 2 for doc in docs)
+        assert cache.get_stats()["files"] == 2
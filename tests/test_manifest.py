@@ -0,0 +1,49 @@
+"""
+Tests para el manifest de ingesta incremental
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.manifest import IngestManifest
+
+
+class TestIngestManifest:
+    """Tests para IngestManifest"""
+
+    def test_diff_classifies_files(self, tmp_path):
+        a = tmp_path / "a.pdf"
+        b = tmp_path / "b.pdf"
+        c = tmp_path / "c.pdf"
+        for path in (a, b, c):
+            path.write_bytes(path.name.encode())
+
+        manifest = IngestManifest(tmp_path / "manifest.json")
+        for path in (a, b, c):
+            manifest.record(path, [f"{path.name}::c0"])
+        manifest.save()
+
+        b.write_bytes(b"contenido nuevo")
+        c.unlink()
+        d = tmp_path / "d.pdf"
+        d.write_bytes(b"d")
+
+        diff = IngestManifest(tmp_path / "manifest.json").diff([a, b, d])
+
+        assert diff.unchanged == [a]
+        assert diff.changed == [b]
+        assert diff.added == [d]
+        assert diff.removed == [IngestManifest.key(c)]
+
+    def test_touch_without_changes_is_unchanged(self, tmp_path):
+        a = tmp_path / "a.pdf"
+        a.write_bytes(b"igual")
+        manifest = IngestManifest(tmp_path / "manifest.json")
+        manifest.record(a, ["a::c0"])
+
+        os.utime(a, (1_000_000, 1_000_000))
+
+        assert manifest.diff([a]).unchanged == [a]
+        assert manifest.chunk_ids(a) == ["a::c0"]
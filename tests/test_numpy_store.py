@@ -0,0 +1,262 @@
+"""
+Tests para el backend vectorial NumPy
+"""
+import numpy as np
+import pytest
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.numpy_store import NumpyCollection, matches_where
+
+
+class TestMatchesWhere:
+    """Tests para la evaluación de filtros estilo Chroma"""
+
+    def test_and_with_range(self):
+        where = {"$and": [{"source": {"$eq": "a.pdf"}}, {"page": {"$gte": 2}}]}
+        assert matches_where({"source": "a.pdf", "page": 3}, where)
+        assert not matches_where({"source": "a.pdf", "page": 1}, where)
+        assert not matches_where({"source": "b.pdf", "page": 3}, where)
+
+    def test_literal_equality_and_in(self):
+        assert matches_where({"source_type": "pdf"}, {"source_type": "pdf"})
+        assert not matches_where({"page": 5}, {"page": {"$in": [1, 2]}})
+
+
+class TestNumpyCollection:
+    """Tests para NumpyCollection"""
+
+    @pytest.fixture
+    def collection(self, tmp_path):
+        collection = NumpyCollection(tmp_path / "numpy")
+        collection.add(
+            ids=["a", "b", "c"],
+            embeddings=[[1.0, 0.0], [0.0, 1.0], [0.7, 0.7]],
+            documents=["doc a", "doc b", "doc c"],
+            metadatas=[{"page": 1}, {"page": 2}, {"page": 3}],
+        )
+        return collection
+
+    def test_query_returns_exact_ranking(self, collection):
+        results = collection.query(query_embeddings=[[1.0, 0.1]], n_results=2)
+
+        assert results["ids"] == [["a", "c"]]
+        assert results["documents"][0][0] == "doc a"
+        assert results["distances"][0][0] == pytest.approx(
+            1 - 1 / np.sqrt(1.01), abs=1e-5
+        )
+
+    def test_query_with_where(self, collection):
+        results = collection.query(
+            query_embeddings=[[1.0, 0.0]], n_results=5, where={"page": {"$gte": 2}}
+        )
+        assert results["ids"] == [["c", "b"]]
+
+    def test_persistence_and_delete(self, collection, tmp_path):
+        collection.delete(ids=["a"])
+        reloaded = NumpyCollection(tmp_path / "numpy")
+
+        assert reloaded.count() == 2
+        assert reloaded.get(ids=["a", "b"])["ids"] == ["b"]
+
+    def test_add_replaces_existing_id(self, collection):
+        collection.add(
+            ids=["a"],
+            embeddings=[[0.6, -0.8]],
+            documents=["doc a v2"],
+            metadatas=[{"page": 1}],
+        )
+        results = collection.query(query_embeddings=[[1.0, 0.0]], n_results=3)
+        data = collection.get(ids=["a"], include=["documents", "embeddings"])
+
+        assert collection.count() == 3
+        # La fila anterior de "a" ([1, 0]) ya no aparece en la búsqueda
+        assert results["ids"] == [["c", "a", "b"]]
+        assert results["distances"][0][1] == pytest.approx(0.4, abs=1e-6)
+        assert data["documents"] == ["doc a v2"]
+        np.testing.assert_allclose(data["embeddings"], [[0.6, -0.8]], atol=1e-6)
+
+    def test_add_appends_without_rewriting(self, collection):
+        size = collection.matrix_path.stat().st_size
+        with open(collection.matrix_path, "rb") as f:
+            head = f.read()
+
+        collection.add(
+            ids=["d"],
+            embeddings=[[0.6, 0.8]],
+            documents=["doc d"],
+            metadatas=[{"page": 4}],
+        )
+
+        assert collection.matrix_path.stat().st_size == size + 2 * 4
+        with open(collection.matrix_path, "rb") as f:
+            assert f.read(size) == head
+
+    def test_delete_is_tombstone_until_compact(self, collection, tmp_path):
+        size = collection.matrix_path.stat().st_size
+        collection.delete(ids=["b"])
+        collection.delete(where={"page": 3})
+
+        assert collection.matrix_path.stat().st_size == size
+        assert collection.dead_rows == 2
+        assert collection.get()["ids"] == ["a"]
+        results = collection.query(query_embeddings=[[0.0, 1.0]], n_results=3)
+        assert results["ids"] == [["a"]]
+
+        reloaded = NumpyCollection(tmp_path / "numpy")
+        assert reloaded.get()["ids"] == ["a"]
+        assert reloaded.dead_rows == 2
+
+        assert reloaded.compact() == 2
+        assert reloaded.dead_rows == 0
+        assert reloaded.matrix_path.stat().st_size == 2 * 4
+        compacted = NumpyCollection(tmp_path / "numpy")
+        data = compacted.get(include=["documents", "metadatas", "embeddings"])
+        assert data["ids"] == ["a"]
+        assert data["metadatas"] == [{"page": 1}]
+        np.testing.assert_allclose(data["embeddings"], [[1.0, 0.0]])
+
+    def test_replacement_survives_reload_and_compact(self, collection, tmp_path):
+        collection.upsert(
+            ids=["b"],
+            embeddings=[[1.0, 0.0]],
+            documents=["doc b v2"],
+            metadatas=[{"page": 9}],
+        )
+        for reloaded in (NumpyCollection(tmp_path / "numpy"), collection):
+            reloaded.compact()
+            data = reloaded.get(include=["documents", "metadatas", "embeddings"])
+            assert data["ids"] == ["a", "c", "b"]
+            assert data["documents"] == ["doc a", "doc c", "doc b v2"]
+            np.testing.assert_allclose(data["embeddings"][2], [1.0, 0.0])
+
+    def test_truncated_write_is_ignored(self, collection, tmp_path):
+        with open(collection.records_path, "a", encoding="utf-8") as f:
+            f.write('{"id": "x", "row"')
+        with open(collection.matrix_path, "ab") as f:
+            f.write(b"\0\0")
+
+        reloaded = NumpyCollection(tmp_path / "numpy")
+        reloaded.add(
+            ids=["d"], embeddings=[[0.0, 1.0]], documents=["d"], metadatas=[{}]
+        )
+
+        again = NumpyCollection(tmp_path / "numpy")
+        assert again.get()["ids"] == ["a", "b", "c", "d"]
+        np.testing.assert_allclose(
+            again.get(ids=["d"], include=["embeddings"])["embeddings"], [[0.0, 1.0]]
+        )
+
+    def test_migrates_legacy_format(self, tmp_path):
+        legacy = tmp_path / "legacy"
+        legacy.mkdir()
+        np.save(legacy / "embeddings.npy", np.array([[1, 0], [0, 1]], np.float32))
+        (legacy / "records.json").write_text(
+            '{"ids": ["a", "b"], "documents": ["doc a", "doc b"], '
+            '"metadatas": [{"page": 1}, {"page": 2}]}',
+            encoding="utf-8",
+        )
+
+        collection = NumpyCollection(legacy)
+
+        assert not (legacy / "embeddings.npy").exists()
+        assert collection.get()["ids"] == ["a", "b"]
+        results = collection.query(query_embeddings=[[0.0, 1.0]], n_results=1)
+        assert results["ids"] == [["b"]]
+
+
+class TestQuantizedSearch:
+    """Tests para la búsqueda cuantizada con re-scoring"""
+
+    @pytest.fixture
+    def vectors(self):
+        rng = np.random.default_rng(0)
+        return rng.standard_normal((500, 64)).astype(np.float32)
+
+    def _collection(self, tmp_path, vectors, quantization, pool):
+        collection = NumpyCollection(
+            tmp_path / quantization, quantization=quantization, rescore_pool=pool
+        )
+        ids = [f"c{i}" for i in range(len(vectors))]
+        collection.add(
+            ids=ids,
+            embeddings=vectors,
+            documents=ids,
+            metadatas=[{"page": i} for i in range(len(vectors))],
+        )
+        return collection
+
+    @pytest.mark.parametrize("quantization", ["int8", "binary"])
+    def test_full_pool_matches_exact(self, tmp_path, vectors, quantization):
+        collection = self._collection(tmp_path, vectors, quantization, pool=500)
+        recalls = collection.measure_recall(vectors[:10], k=5, pool_sizes=[500])
+        assert recalls[500] == 1.0
+
+    def test_int8_recall_with_small_pool(self, tmp_path, vectors):
+        collection = self._collection(tmp_path, vectors, "int8", pool=50)
+        results = collection.query(query_embeddings=vectors[:3], n_results=1)
+
+        assert [ids[0] for ids in results["ids"]] == ["c0", "c1", "c2"]
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+    def test_codes_persist_and_respect_where(self, tmp_path, vectors):
+        self._collection(tmp_path, vectors, "binary", pool=100)
+        reloaded = NumpyCollection(
+            tmp_path / "binary", quantization="binary", rescore_pool=100
+        )
+        results = reloaded.query(
+            query_embeddings=vectors[:1], n_results=3, where={"page": {"$gte": 10}}
+        )
+
+        assert reloaded._codes().shape == (500, 8)
+        assert all(int(chunk_id[1:]) >= 10 for chunk_id in results["ids"][0])
+
+    def test_codes_follow_appends_and_compact(self, tmp_path, vectors):
+        collection = self._collection(tmp_path, vectors, "int8", pool=50)
+        collection.upsert(
+            ids=["c0"], embeddings=-vectors[:1], documents=["c0"], metadatas=[{}]
+        )
+        collection.compact()
+
+        reloaded = NumpyCollection(tmp_path / "int8", quantization="int8")
+        results = reloaded.query(query_embeddings=-vectors[:1], n_results=1)
+        assert reloaded._codes().shape == (500, 64)
+        assert results["ids"] == [["c0"]]
+        assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-5)
+
+    @pytest.mark.parametrize("quantization", ["none", "int8", "binary"])
+    def test_dead_rows_excluded_without_gathering(
+        self, tmp_path, vectors, quantization, monkeypatch
+    ):
+        collection = self._collection(tmp_path, vectors, quantization, pool=50)
+        collection.delete(ids=[f"c{i}" for i in range(10)])
+        collection.upsert(
+            ids=["c10"], embeddings=-vectors[10:11], documents=["c10"], metadatas=[{}]
+        )
+        assert collection.dead_rows == 11
+        collection._dead_rows_mask()
+
+        # Sin filtro no se copian las filas vivas: se puntúa todo y se
+        # descartan las muertas con la máscara
+        def no_gather():
+            raise AssertionError("la búsqueda sin filtro no debe reunir filas")
+
+        monkeypatch.setattr(collection, "_live_rows", no_gather)
+        results = collection.query(query_embeddings=vectors[:12], n_results=5)
+
+        deleted = {f"c{i}" for i in range(10)}
+        assert all(not deleted & set(ids) for ids in results["ids"])
+        assert "c10" not in results["ids"][10]
+        assert results["ids"][11][0] == "c11"
+        if quantization == "none":
+            live = np.vstack([vectors[11:], -vectors[10:11]])
+            live_ids = [f"c{i}" for i in range(11, len(vectors))] + ["c10"]
+            live /= np.linalg.norm(live, axis=1, keepdims=True)
+            expected = np.argsort(-(live @ vectors[0]))[:5]
+            assert results["ids"][0] == [live_ids[i] for i in expected]
+
+    def test_unknown_quantization(self, tmp_path):
+        with pytest.raises(ValueError):
+            NumpyCollection(tmp_path / "x", quantization="pq")
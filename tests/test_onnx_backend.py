@@ -0,0 +1,72 @@
+"""
+Tests para el backend ONNX (contra el modelo diminuto de conftest)
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+pytest.importorskip("onnxruntime")
+
+TEXTS = [
+    "el impuesto a la renta del contribuyente",
+    "plazo de prescripcion de la deuda tributaria",
+    "multa",
+    "texto con palabras fuera del vocabulario",
+]
+
+
+class TestOnnxEncoder:
+    """Tests para OnnxEncoder frente a sentence-transformers"""
+
+    def test_matches_torch_embeddings(self, tiny_model_path, tmp_path):
+        from sentence_transformers import SentenceTransformer
+
+        from packages.rag_core.onnx_backend import OnnxEncoder
+
+        reference = SentenceTransformer(tiny_model_path, device="cpu").encode(TEXTS)
+        encoder = OnnxEncoder(tiny_model_path, cache_dir=tmp_path)
+
+        np.testing.assert_allclose(encoder.encode(TEXTS), reference, atol=1e-4)
+        np.testing.assert_allclose(encoder.encode(TEXTS[0]), reference[0], atol=1e-4)
+
+    def test_int8_close_to_torch(self, tiny_model_path, tmp_path):
+        pytest.importorskip("onnx")
+        from sentence_transformers import SentenceTransformer
+
+        from packages.rag_core.onnx_backend import OnnxEncoder
+
+        reference = SentenceTransformer(tiny_model_path, device="cpu").encode(TEXTS)
+        quantized = OnnxEncoder(tiny_model_path, cache_dir=tmp_path, quantize=True)
+        embeddings = quantized.encode(TEXTS)
+
+        cosine = (embeddings * reference).sum(axis=1) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(reference, axis=1)
+        )
+        assert cosine.min() > 0.95
+
+
+class TestEmbeddingVariant:
+    """Tests para los cachés según backend y precisión"""
+
+    def test_query_cache_not_shared_across_backends(
+        self, rag_settings, monkeypatch
+    ):
+        from packages.rag_core.config import get_settings
+        from packages.rag_core.vectorstore import EmbeddingModel
+
+        torch_model = EmbeddingModel()
+        torch_model.embed_query(TEXTS[0])
+
+        monkeypatch.setenv("EMBEDDING_BACKEND", "onnx")
+        monkeypatch.setenv("ONNX_QUANTIZE", "true")
+        get_settings.cache_clear()
+        onnx_model = EmbeddingModel()
+
+        assert torch_model.variant.endswith("|torch|fp32")
+        assert onnx_model.variant.endswith("|onnx|int8")
+        assert onnx_model.query_cache is torch_model.query_cache
+        assert onnx_model.query_cache.get(onnx_model.variant, TEXTS[0]) is None
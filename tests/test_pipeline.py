@@ -0,0 +1,105 @@
+"""
+Tests para la recuperación del pipeline (índice de artículos y búsqueda en batch)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.chunker import LegalChunker
+from packages.rag_core.loaders import Document
+
+_PAGES = [
+    "CODIGO TRIBUTARIO Artículo 1º.- CONCEPTO DE LA OBLIGACION TRIBUTARIA La "
+    "obligacion tributaria es el vinculo entre el contribuyente y el estado. "
+    "Artículo 2º.- NACIMIENTO DE LA OBLIGACION TRIBUTARIA La obligacion nace "
+    "cuando se realiza el hecho previsto en la ley.",
+    "Artículo 43°.- PLAZOS DE PRESCRIPCION La prescripcion de la deuda "
+    "tributaria es de cuatro años. Artículo 180°.- TIPOS DE SANCIONES La multa "
+    "es una sancion tributaria que se paga en el plazo de pago de la deuda.",
+]
+
+QUESTIONS = [
+    "¿Qué dice el artículo 43 del código tributario?",
+    "plazo de pago de la deuda",
+    "compara los artículos 1 y 2",
+]
+
+
+@pytest.fixture
+def pipeline(rag_settings):
+    from packages.rag_core.pipeline import RAGPipeline
+
+    pipeline = RAGPipeline(
+        enable_guardrails=False, enable_cache=False, enable_routing=False
+    )
+    docs = [
+        Document(content=text, metadata={"source": "codigo.pdf", "page": page})
+        for page, text in enumerate(_PAGES, 1)
+    ]
+    pipeline.vector_store.add_chunks(LegalChunker().split_documents(docs))
+    return pipeline
+
+
+def _ids(chunks: list[dict]) -> list[str]:
+    return [chunk["chunk_id"] for chunk in chunks]
+
+
+class TestRetrieveMany:
+    """Tests para retrieve_many frente a la recuperación de query()"""
+
+    @pytest.fixture
+    def searched(self, pipeline, monkeypatch):
+        """Registra las preguntas que llegan a search_many"""
+        calls = []
+        original = pipeline.vector_store.search_many
+
+        def search_many(queries, **kwargs):
+            calls.append(list(queries))
+            return original(queries, **kwargs)
+
+        monkeypatch.setattr(pipeline.vector_store, "search_many", search_many)
+        return calls
+
+    def test_article_references_use_article_index(self, pipeline, searched):
+        from packages.rag_core.pipeline import normalize_query
+
+        results = pipeline.retrieve_many(QUESTIONS, top_k=3)
+
+        assert _ids(results[0]) == _ids(pipeline._article_lookup(QUESTIONS[0], 3))
+        assert [c["metadata"]["article"] for c in results[0]] == ["43"]
+        assert [c["metadata"]["article"] for c in results[2]] == ["1", "2"]
+        single = pipeline.vector_store.search(normalize_query(QUESTIONS[1]), top_k=3)
+        assert _ids(results[1]) == _ids(single)
+        # Solo la pregunta sin artículos pasa por la búsqueda híbrida
+        assert searched == [[normalize_query(QUESTIONS[1])]]
+
+    def test_without_fast_path_all_go_to_search(
+        self, pipeline, searched, monkeypatch
+    ):
+        from packages.rag_core.config import get_settings
+
+        monkeypatch.setenv("ARTICLE_FAST_PATH", "false")
+        get_settings.cache_clear()
+        pipeline.settings = get_settings()
+
+        results = pipeline.retrieve_many(QUESTIONS, top_k=3)
+
+        assert len(results) == len(QUESTIONS)
+        assert len(searched[0]) == len(QUESTIONS)
+
+    def test_falls_back_to_search_when_filters_exclude_article(
+        self, pipeline, searched
+    ):
+        from packages.rag_core.pipeline import normalize_query
+
+        # El artículo 43 está en la página 2: con page_to=1 no hay atajo
+        [results] = pipeline.retrieve_many(
+            QUESTIONS[:1], top_k=3, filters={"page_to": 1}
+        )
+
+        assert results
+        assert all(c["metadata"]["page"] == 1 for c in results)
+        assert searched == [[normalize_query(QUESTIONS[0])]]
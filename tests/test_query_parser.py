@@ -0,0 +1,66 @@
+"""
+Tests para el parser de referencias a artículos
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.query_parser import (
+    ArticleReference,
+    mentions_part,
+    parse_article_references,
+    resolve_sources,
+)
+
+
+class TestParseArticleReferences:
+    """Tests para parse_article_references"""
+
+    def test_single_article(self):
+        refs = parse_article_references("¿Qué dice el artículo 132 del Código Tributario?")
+        assert refs == [ArticleReference("132")]
+
+    def test_several_articles_and_suffix(self):
+        refs = parse_article_references("Compara los artículos 43 y 44 con el art. 102-A")
+        assert [r.article for r in refs] == ["43", "44", "102-A"]
+
+    def test_inciso_and_numeral(self):
+        assert parse_article_references("inciso b) del artículo 43°")[0].inciso == "b"
+        assert parse_article_references("numeral 2 del art 170")[0].numeral == "2"
+
+    def test_norma_titulo_preliminar(self):
+        refs = parse_article_references("¿Qué establece la Norma IV del Título Preliminar?")
+        assert refs == [ArticleReference("NORMA IV")]
+
+    def test_no_reference(self):
+        assert parse_article_references("¿Qué es la prescripción tributaria?") == []
+        assert parse_article_references("La parte 3 del arte 5") == []
+
+
+class TestResolveSources:
+    """Tests para resolve_sources"""
+
+    SOURCES = ["Codigo-Tributario.pdf", "Ley-27444.pdf", "Ley-30057.pdf"]
+
+    def test_named_document(self):
+        question = "¿Qué dice el artículo 132 del Código Tributario?"
+        assert resolve_sources(question, self.SOURCES) == ["Codigo-Tributario.pdf"]
+        assert resolve_sources("artículo 3 de la Ley 27444", self.SOURCES) == ["Ley-27444.pdf"]
+
+    def test_unnamed_document_returns_all(self):
+        assert resolve_sources("¿Qué dice el artículo 43?", self.SOURCES) == self.SOURCES
+
+
+class TestMentionsPart:
+    """Tests para mentions_part"""
+
+    def test_inciso(self):
+        ref = ArticleReference("43", inciso="b")
+        assert mentions_part("a) El deudor. b) El responsable.", ref)
+        assert not mentions_part("a) El deudor.", ref)
+
+    def test_numeral(self):
+        ref = ArticleReference("170", numeral="2")
+        assert mentions_part("1. Cuando... 2. Cuando...", ref)
+        assert not mentions_part("1. Cuando... 12. Cuando...", ref)
@@ -0,0 +1,272 @@
+"""
+Tests para VectorStore (con el modelo de embeddings diminuto de conftest)
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from packages.rag_core.chunker import Chunk
+
+_TEXTS = [
+    "el impuesto a la renta del contribuyente",
+    "la deuda tributaria y su plazo de pago",
+    "la multa es una sancion tributaria",
+    "prescripcion de la obligacion tributaria",
+    "unidad impositiva tributaria del codigo",
+    "el codigo tributario en su articulo de sancion",
+]
+
+
+def _chunks() -> list[Chunk]:
+    return [
+        Chunk(
+            chunk_id=f"{source}::c{i}",
+            content=text,
+            metadata={"source": source, "source_type": "pdf", "page": page},
+        )
+        for source in ("codigo.pdf", "renta.pdf")
+        for i, (page, text) in enumerate(enumerate(_TEXTS, 1))
+    ]
+
+
+@pytest.fixture
+def store(rag_settings):
+    from packages.rag_core.vectorstore import VectorStore
+
+    store = VectorStore(collection_name="test")
+    store.add_chunks(_chunks())
+    return store
+
+
+class TestChromaWrites:
+    """Tests para las escrituras a Chroma"""
+
+    def test_batch_size_capped_by_chroma(self, rag_settings, monkeypatch):
+        from packages.rag_core.config import get_settings
+        from packages.rag_core.vectorstore import VectorStore
+
+        monkeypatch.setenv("WRITE_BATCH_SIZE", "1000000")
+        get_settings.cache_clear()
+        store = VectorStore(collection_name="test")
+
+        assert store.write_batch_size == store.client.get_max_batch_size()
+
+    def test_upsert_accepts_ndarray(self, store):
+        data = store.collection.get(ids=["codigo.pdf::c0"], include=["embeddings"])
+        embedding = store.embedding_model.embed_query(_TEXTS[0])
+
+        assert store.count() == 2 * len(_TEXTS)
+        assert list(data["embeddings"][0]) == pytest.approx(embedding, abs=1e-5)
+
+
+class FlakyCollection:
+    """Envuelve una colección: los primeros `failures` upserts fallan"""
+
+    def __init__(self, collection, failures: int = 0):
+        self.collection = collection
+        self.failures = failures
+        self.attempts: list[int] = []
+        self.upserts: list[list[str]] = []
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        self.attempts.append(len(ids))
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("chroma no disponible")
+        self.upserts.append(list(ids))
+        self.collection.upsert(
+            ids=ids, embeddings=embeddings, documents=documents, metadatas=metadatas
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+class TestBatchedWrites:
+    """Tests para add_chunks por batches y _upsert_with_retry"""
+
+    @pytest.fixture
+    def empty_store(self, rag_settings, monkeypatch):
+        from packages.rag_core import vectorstore
+
+        delays = []
+        monkeypatch.setattr(vectorstore.time, "sleep", delays.append)
+        store = vectorstore.VectorStore(collection_name="test")
+        store.delays = delays
+        return store
+
+    def test_batches_and_progress(self, empty_store):
+        store = empty_store
+        store.collection = FlakyCollection(store.collection)
+        chunks = _chunks()
+        progress = []
+
+        added = store.add_chunks(
+            chunks, batch_size=5, progress=lambda *a: progress.append(a)
+        )
+
+        assert added == 12
+        assert [len(ids) for ids in store.collection.upserts] == [5, 5, 2]
+        assert sum(store.collection.upserts, []) == [c.chunk_id for c in chunks]
+        assert progress == [(5, 12), (10, 12), (12, 12)]
+        assert store.count() == 12
+        assert len(store.keyword_index) == 12
+
+    def test_batch_size_capped_by_write_batch_size(self, empty_store):
+        store = empty_store
+        store.collection = FlakyCollection(store.collection)
+        store.write_batch_size = 4
+
+        store.add_chunks(_chunks(), batch_size=10)
+
+        assert [len(ids) for ids in store.collection.upserts] == [4, 4, 4]
+
+    def test_retries_with_backoff(self, empty_store):
+        store = empty_store
+        store.write_retries = 3
+        store.collection = FlakyCollection(store.collection, failures=2)
+
+        assert store.add_chunks(_chunks(), batch_size=6) == 12
+
+        assert store.collection.attempts == [6, 6, 6, 6]
+        assert store.delays == [0.5, 1.0]
+        assert store.count() == 12
+
+    def test_raises_after_last_retry(self, empty_store):
+        store = empty_store
+        store.write_retries = 2
+        store.collection = FlakyCollection(store.collection, failures=2)
+        progress = []
+
+        # El primer batch se escribe al tercer intento; el segundo agota
+        # los reintentos y el error llega al llamador
+        chunks = _chunks()
+        store.add_chunks(chunks[:6], batch_size=6)
+        store.collection.failures = 3
+        with pytest.raises(ConnectionError, match="chroma no disponible"):
+            store.add_chunks(
+                chunks[6:], batch_size=6, progress=lambda *a: progress.append(a)
+            )
+
+        assert store.delays == [0.5, 1.0, 0.5, 1.0]
+        assert progress == []
+        assert store.count() == 6
+        # Los índices guardados solo tienen lo que llegó a la colección
+        reloaded = type(store)(collection_name="test")
+        assert len(reloaded.keyword_index) == 6
+
+    def test_failed_batch_keeps_previous_batches(self, empty_store):
+        store = empty_store
+        store.write_retries = 0
+        store.collection = FlakyCollection(store.collection)
+        original = store.collection.upsert
+
+        def fail_second(ids, embeddings, documents, metadatas):
+            if store.collection.upserts:
+                raise ConnectionError("chroma no disponible")
+            original(ids, embeddings, documents, metadatas)
+
+        store.collection.upsert = fail_second
+        with pytest.raises(ConnectionError):
+            store.add_chunks(_chunks(), batch_size=5)
+
+        assert store.count() == 5
+        assert len(type(store)(collection_name="test").keyword_index) == 5
+
+
+class TestSearchMany:
+    """Tests para search_many frente a search por query"""
+
+    QUERIES = [
+        "impuesto a la renta",
+        "plazo de pago de la deuda",
+        "sancion tributaria",
+        "articulo del codigo tributario",
+    ]
+
+    @staticmethod
+    def _summary(results: list[dict]) -> list[tuple[str, float]]:
+        return [(r["chunk_id"], round(r["score"], 6)) for r in results]
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            None,
+            {"source": "renta.pdf"},
+            {"page_from": 2, "page_to": 4},
+            {"source": "codigo.pdf", "page_to": 3},
+        ],
+    )
+    @pytest.mark.parametrize("hybrid", ["true", "false"])
+    def test_matches_individual_search(self, store, monkeypatch, filters, hybrid):
+        from packages.rag_core.config import get_settings
+
+        monkeypatch.setenv("HYBRID_SEARCH", hybrid)
+        get_settings.cache_clear()
+
+        batched = store.search_many(self.QUERIES, top_k=3, filters=filters)
+        single = [store.search(q, top_k=3, filters=filters) for q in self.QUERIES]
+
+        assert len(batched) == len(self.QUERIES)
+        for many, one in zip(batched, single):
+            assert self._summary(many) == self._summary(one)
+            assert [r["content"] for r in many] == [r["content"] for r in one]
+            assert [r["metadata"] for r in many] == [r["metadata"] for r in one]
+
+    def test_filters_are_applied(self, store):
+        results = store.search_many(
+            self.QUERIES, top_k=5, filters={"source": "renta.pdf", "page_from": 3}
+        )
+        hits = [r["metadata"] for query_results in results for r in query_results]
+        assert hits
+        assert all(m["source"] == "renta.pdf" and m["page"] >= 3 for m in hits)
+
+    def test_empty_queries(self, store):
+        assert store.search_many([]) == []
+
+
+class TestNumpyBackend:
+    """Tests para VectorStore sobre NumpyCollection"""
+
+    @pytest.fixture
+    def numpy_store(self, rag_settings, monkeypatch):
+        from packages.rag_core.config import get_settings
+        from packages.rag_core.vectorstore import VectorStore
+
+        monkeypatch.setenv("VECTOR_BACKEND", "numpy")
+        get_settings.cache_clear()
+        store = VectorStore(collection_name="test")
+        store.add_chunks(_chunks())
+        return store
+
+    def test_delete_compacts_past_dead_ratio(self, numpy_store):
+        store = numpy_store
+        before = store.search(
+            "sancion tributaria", top_k=3, filters={"source": "codigo.pdf"}
+        )
+
+        # Un chunk de 12 (8%) no alcanza el umbral de 20%
+        store.delete_chunks(["renta.pdf::c0"])
+        assert store.collection.dead_rows == 1
+
+        assert store.delete_source("renta.pdf") == len(_TEXTS) - 1
+        assert store.collection.dead_rows == 0
+        assert store.compact() == 0
+
+        reloaded = type(store)(collection_name="test")
+        after = reloaded.search("sancion tributaria", top_k=3)
+        assert reloaded.count() == len(_TEXTS)
+        assert [r["chunk_id"] for r in after] == [r["chunk_id"] for r in before]
+
+    def test_reingest_compacts_replaced_rows(self, numpy_store):
+        store = numpy_store
+        store.add_chunks(_chunks()[:2])
+        assert store.compact_if_needed() == 0
+
+        store.add_chunks(_chunks()[:6])
+        assert store.compact_if_needed() == 8
+        assert store.collection.dead_rows == 0
+        assert store.count() == 12